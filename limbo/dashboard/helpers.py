@@ -3,17 +3,16 @@ import importlib
 import pandas as pd
 
 import solution.factory as solution_loader
+import solution.registry as registry
 
 
 def get_py_solutions():
     data = []
-    py_solutions = solution_loader.all_solutions_scenarios()
-    for name in py_solutions:
-        solution_module = importlib.import_module("solution." + name)
-        for scenario in solution_module.scenarios.values():
-            row = {"solution": name, "scenario": scenario.name}
-            row["pds_adoption_basis"] = scenario.soln_pds_adoption_basis
-            row["ref_adoption_basis"] = scenario.soln_ref_adoption_basis or "Default"
+    for (name, entry) in registry.index().items():
+        for scenario in entry["scenarios"]:
+            row = {"solution": name, "scenario": scenario["name"]}
+            row["pds_adoption_basis"] = scenario["pds_adoption_basis"]
+            row["ref_adoption_basis"] = scenario["ref_adoption_basis"] or "Default"
             data.append(row)
     return pd.json_normalize(data)
 
@@ -1,5 +1,3 @@
-from dataclasses import dataclass
-
 import numpy as np
 import pandas as pd
 import pytest
@@ -170,40 +168,16 @@ mock_survey_data = pd.DataFrame(
 )
 
 
-def _mock_factory():
-    return {
-        "afforestation": (
-            "afforestation",
-            ["PDS-Drawdown-Nov2019", "PDS-Plausible-Nov2019",],
-        ),
-        "airplanes": (
-            "airplanes",
-            ["PDS1-Efficiency (Book Ed.1)", "PDS2-Manufacturer (Book Ed.1)",],
-        ),
-        "altcement": ("altcement", ["PDS1-Availability (Book Ed.1)"],),
-        "bamboo": (
-            "bamboo",
-            ["PDS-Optimum-CustomPDS", "PDS-BookVersion1", "PDS-CustomPDS-July2019",],
-        ),
-    }
-
-
-def _mock_importlib(name):
-    @dataclass
-    class Scenario:
-        name: str
-        soln_pds_adoption_basis: str
-        soln_ref_adoption_basis: str
-
-    @dataclass
-    class Module:
-        scenarios: dict
-
-    return Module({"a": Scenario("a", "a", None), "b": Scenario("b", "b", "Custom")})
+def _mock_index():
+    scenarios = [
+        {"name": "a", "pds_adoption_basis": "a", "ref_adoption_basis": None},
+        {"name": "b", "pds_adoption_basis": "b", "ref_adoption_basis": "Custom"},
+    ]
+    return {name: {"name": name, "scenarios": scenarios}
+            for name in ["afforestation", "airplanes", "altcement", "bamboo"]}
 
 
-@patch("dashboard.helpers.solution_loader.all_solutions_scenarios", _mock_factory)
-@patch("dashboard.helpers.importlib.import_module", _mock_importlib)
+@patch("dashboard.helpers.registry.index", _mock_index)
 def test_get_py_solutions():
     df = get_py_solutions()
     pd.testing.assert_frame_equal(
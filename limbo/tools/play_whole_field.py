@@ -1,10 +1,11 @@
 """Generate animation of impact of the different Drawdown sectors, to show that all are needed."""
 import argparse
-import os
+import functools
 import pathlib
 import sys
 
 import model.fairutil
+import model.portfolio
 
 import fair
 import fair.RCPs
@@ -13,6 +14,7 @@ import matplotlib.animation
 import matplotlib.pyplot as plt
 import matplotlib.style
 import pandas as pd
+import solution.batch
 import solution.factory
 import ui.color
 
@@ -29,40 +31,31 @@ def legend_no_duplicates(ax):
 
 def init():
     """Return emissions with data per sector."""
-    mmt = pd.DataFrame()
-
-    solutions = solution.factory.all_solutions_scenarios()
-    for name in solutions.keys():
-        (constructor, _) = solutions[name]
-        obj = constructor(scenario=None)
-        m = obj.c2.co2eq_mmt_reduced()
-        mmt[name] = m['World']
-
-    sector_gtons = pd.DataFrame()
-    everything = pd.read_csv(os.path.join('data', 'overview', 'solutions.csv'),
-        index_col=False, skipinitialspace=True, header=0, skip_blank_lines=True, comment='#')
-
-    for sector in everything.Sector.unique():
-        column_names = everything.loc[everything['Sector'] == sector, 'DirName'].dropna()
-        sector_members = list(set(column_names).intersection(set(mmt.columns)))
-        sector_gtons.loc[:, sector] = (mmt.loc[:, sector_members].sum(axis=1) / 1000.0) / 3.664
+    jobs = [(name, None) for name in solution.factory.all_solutions()]
+    outputs = ['co2eq_mmt_reduced']
+    portfolio = model.portfolio.Portfolio(outputs=outputs)
+    result_func = functools.partial(model.portfolio.extract, outputs=outputs)
+    for r in solution.batch.run_batch(jobs, result_func=result_func):
+        if not r.ok:
+            print(f"Skipping {r.solution}: {r.scenario}\n{r.error}", file=sys.stderr)
+            continue
+        portfolio.set_results(r.solution, r.result)
+    sector_gtons = (portfolio.sector_totals('co2eq_mmt_reduced') / 1000.0) / 3.664
 
     total = model.fairutil.baseline_emissions()
     remaining = total.copy()
     sectors = sector_gtons.sort_values(axis='columns', by=2050, ascending=False).columns
-    emissions = []
+    trajectories = pd.DataFrame(columns=total.index, dtype='float64')
     for sector in sectors:
         remaining = remaining.subtract(sector_gtons[sector], fill_value=0.0)
-        _,_,T = fair.forward.fair_scm(emissions=remaining.values, useMultigas=False,
-                r0=model.fairutil.r0, tcrecs=model.fairutil.tcrecs)
-        df_T = pd.Series(T, index=remaining.index)
-        emissions.append((sector, df_T))
+        trajectories.loc[sector] = remaining
+    CFT = model.fairutil.fair_scm_batch(trajectories)
+    emissions = [(sector, CFT.loc[sector, 'T']) for sector in sectors]
 
     fig = plt.figure()
     ax = fig.add_subplot()
     ax.set_ylabel(u'°C');
-    _,_,T = fair.forward.fair_scm(emissions=total.values, useMultigas=False, r0=model.fairutil.r0,
-            tcrecs=model.fairutil.tcrecs)
+    _,_,T = model.fairutil.fair_scm(total.values, **model.fairutil.fair_scm_kwargs())
     df_T = pd.Series(T, index=fair.RCPs.rcp45.Emissions.year)
     ax.plot(df_T.loc[2005:2050].index.values, df_T.loc[2005:2050].values,
             color='black', label='Baseline', zorder=50)
@@ -86,8 +79,7 @@ def animate(frame, ax, total, lines, emissions):
         end = 2020 + offset
         line.set_data(df_T.loc[2020:end].index.values, df_T.loc[2020:end].values)
         if sector_num == 0:
-            _,_,T = fair.forward.fair_scm(emissions=total.values, useMultigas=False,
-                    r0=model.fairutil.r0, tcrecs=model.fairutil.tcrecs)
+            _,_,T = model.fairutil.fair_scm(total.values, **model.fairutil.fair_scm_kwargs())
             prev = pd.Series(T, index=fair.RCPs.rcp45.Emissions.year)
         else:
             (_, prev) = emissions[sector_num - 1]
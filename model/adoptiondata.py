@@ -4,6 +4,7 @@ from functools import lru_cache
 import pathlib
 import re
 
+from model import csv_cache
 from model import interpolation
 from model import dd
 from model.metaclass_cache import MetaclassCache
@@ -64,7 +65,7 @@ class AdoptionData(DataHandler, object, metaclass=MetaclassCache):
                 else:
                     sources = value
                 for name, filename in sources.items():
-                    df = pd.read_csv(filename, header=0, index_col=0, skipinitialspace=True,
+                    df = csv_cache.read_csv(filename, header=0, index_col=0, skipinitialspace=True,
                             skip_blank_lines=True, comment='#')
                     for region in dd.REGIONS:
                         df_per_region[region].loc[:, name] = df.loc[:, region]
@@ -289,6 +290,13 @@ class AdoptionData(DataHandler, object, metaclass=MetaclassCache):
            Degree3: SolarPVUtil 'Adoption Data'!CN619:CR665    Exponential: 'Adoption Data'!CW619:CY665
 
         """
+        (growth, trend) = self._adoption_trend_inputs(region=region, trend=trend)
+        result = self._adoption_trend(self.adoption_low_med_high(region), growth, trend)
+        result.name = 'adoption_trend_' + self._name_to_identifier(region) + '_' + str(trend).lower()
+        return result
+
+    def _adoption_trend_inputs(self, region, trend=None):
+        """(growth, trend algorithm) used by adoption_trend for region."""
         main_region = dd.REGIONS[0]  # first columns, ex: 'World'
         if not trend:
             trend = self.adconfig.loc['trend', region]
@@ -296,9 +304,7 @@ class AdoptionData(DataHandler, object, metaclass=MetaclassCache):
             growth = self.ac.soln_pds_adoption_prognostication_growth
         else:
             growth = self.adconfig.loc['growth', region]
-        result = self._adoption_trend(self.adoption_low_med_high(region), growth, trend)
-        result.name = 'adoption_trend_' + self._name_to_identifier(region) + '_' + str(trend).lower()
-        return result
+        return (growth, trend)
 
     @lru_cache()
     @data_func
@@ -332,10 +338,23 @@ class AdoptionData(DataHandler, object, metaclass=MetaclassCache):
     @data_func
     def adoption_trend_per_region(self):
         """Return a dataframe of adoption trends, one column per region."""
+        # Fit the trends of every region with a growth and trend in a single call.
+        fit = {}
+        for region in dd.REGIONS:
+            (growth, trend) = self._adoption_trend_inputs(region=region)
+            if growth is not None and trend is not None:
+                fit[region] = (self.adoption_low_med_high(region)[growth], trend)
+        if fit:
+            data = pd.concat([d for (d, _) in fit.values()], axis=1, keys=list(fit.keys()))
+            trends = interpolation.trend_adoption(data=data, trends=[t for (_, t) in fit.values()])
+
         df = pd.DataFrame(columns=dd.REGIONS)
         for region in df.columns:
-            adoption_trend = self.adoption_trend(region=region)
             adoption_low_med_high = self.adoption_low_med_high(region=region)
+            if region in fit:
+                adoption_trend = trends[[region]].rename(columns={region: 'adoption'})
+            else:
+                adoption_trend = self._adoption_trend(adoption_low_med_high, None, None)
             self._set_adoption_one_region(result=df, region=region, adoption_trend=adoption_trend,
                     adoption_low_med_high=adoption_low_med_high)
         return df
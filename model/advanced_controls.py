@@ -5,12 +5,15 @@
 import dataclasses
 import enum
 import glob
+import hashlib
 import json
+import math
+import numbers
 import os
 import typing
 
+import numpy as np
 import pandas as pd
-import pytest
 from model import emissionsfactors as ef
 from model import excel_math
 from model.dd import REGIONS, MAIN_REGIONS
@@ -23,6 +26,9 @@ valid_pds_adoption_bases = {'Linear', 'Logistic S-Curve', 'Existing Adoption Pro
 valid_ref_adoption_bases = {'Default', 'Custom', None}
 valid_adoption_growth = {'High', 'Medium', 'Low', None}
 
+# Fields which describe a scenario or where it came from, but do not change its results.
+_NOT_HASHED = {'name', 'description', 'vmas', 'js', 'jsfile'}
+
 
 @dataclasses.dataclass(eq=True, frozen=True)
 class AdvancedControls:
@@ -917,30 +923,39 @@ class AdvancedControls:
                 result[reg] = self.vmas[vma_title].avg_high_low(key=stat.lower(), region=reg)
         else:
             result = self.vmas[vma_title].avg_high_low(key=stat.lower())
-        if raw_val_from_excel is not None and result != pytest.approx(raw_val_from_excel):
+        if raw_val_from_excel is not None and not _approx_equal(result, raw_val_from_excel):
             # pylint: disable=no-member
             self.incorrect_cached_values[vma_title] = (raw_val_from_excel, result)
             result = raw_val_from_excel
         return result
 
-    def _hash_item(self, item):
-        if isinstance(item, pd.DataFrame) or isinstance(item, pd.Series):
-            item = tuple(pd.util.hash_pandas_object(item))
-        try:
-            return hash(item)
-        except TypeError:
-            pass
-        try:
-            return hash(tuple(item))
-        except TypeError as e:
-            raise e
+    def content_hash(self):
+        """Hex digest of the values of the fields which affect results.
+
+           Covers every field after VMA statistics like 'mean' have been substituted,
+           including regional Series, but not name, description, or the vmas, js and
+           jsfile they were loaded from. The digest is the same in every process, so it
+           can key caches of results on disk. It is computed once and kept, like the rest
+           of AdvancedControls the fields must not be modified after construction.
+        """
+        digest = self.__dict__.get('_content_hash', None)
+        if digest is None:
+            h = hashlib.sha256()
+            for field in dataclasses.fields(self):
+                if field.name not in _NOT_HASHED:
+                    _update_digest(h, field.name)
+                    _update_digest(h, getattr(self, field.name))
+            digest = h.hexdigest()
+            object.__setattr__(self, '_content_hash', digest)
+        return digest
 
     def __hash__(self):
-        key = 0x811c9dc5
-        key = key ^ id(self)
-        for field in dataclasses.fields(self):
-            key = key ^ self._hash_item(field)
-        return key
+        return int(self.content_hash()[:16], 16)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self is other or self.content_hash() == other.content_hash()
 
     def write_to_json_file(self):
         jsfilenew = self.jsfile + '.new'
@@ -952,6 +967,58 @@ class AdvancedControls:
             os.replace(jsfilenew, self.jsfile)
 
 
+def _approx_equal(actual, expected, rel=1e-6, abs_tol=1e-12):
+    """actual == pytest.approx(expected), without importing pytest at runtime.
+       NaN is not equal to anything, and infinities only to themselves."""
+    actual = np.asarray(actual, dtype=np.float64)
+    expected = float(expected)
+    if not np.isfinite(expected):
+        return bool(np.all(actual == expected))
+    tolerance = max(rel * math.fabs(expected), abs_tol)
+    return bool(np.all(np.abs(actual - expected) <= tolerance))
+
+
+def _update_digest(h, value):
+    """Add a canonical encoding of value to hashlib object h. Numbers are encoded by
+       their float value, so that 1 and 1.0 (or numpy.float64(1.0)) hash the same."""
+    if value is None:
+        h.update(b'N;')
+    elif isinstance(value, (bool, np.bool_)):
+        h.update(b'B1;' if value else b'B0;')
+    elif isinstance(value, numbers.Real):
+        h.update(b'F' + float(value).hex().encode('ascii') + b';')
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        h.update(b'S%d:' % len(data) + data)
+    elif isinstance(value, enum.Enum):
+        _update_digest(h, f'{type(value).__qualname__}.{value.name}')
+    elif isinstance(value, (pd.Series, pd.DataFrame)):
+        h.update(b'P')
+        _update_digest(h, list(value.index))
+        if isinstance(value, pd.DataFrame):
+            _update_digest(h, list(value.columns))
+        try:
+            h.update(np.ascontiguousarray(value.to_numpy(dtype='<f8')).tobytes())
+        except (TypeError, ValueError):
+            _update_digest(h, value.to_numpy().tolist())
+    elif isinstance(value, dict):
+        h.update(b'D%d:' % len(value))
+        items = []
+        for (k, v) in value.items():
+            kh = hashlib.sha256()
+            _update_digest(kh, k)
+            items.append((kh.digest(), v))
+        for (k, v) in sorted(items, key=lambda item: item[0]):
+            h.update(k)
+            _update_digest(h, v)
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        h.update(b'L%d:' % len(value))
+        for v in value:
+            _update_digest(h, v)
+    else:
+        _update_digest(h, f'{type(value).__qualname__}:{value!r}')
+
+
 def fill_missing_regions_from_world(data):
     """
     AdvancedControls attributes linked to VMAs can optionally be Series of regional values rather than
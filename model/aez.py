@@ -8,13 +8,21 @@ Areas are pulled from CSVs in the 'land/world' directory, and allocations from t
 directory. These in turn are generated from their corresponding spreadsheets in the 'land' directory. These
 values are fixed across all solutions but if they do need updating the xls sheets can be changed and the CSVs
 can be updated by running the relevant script in the 'tools' directory.
+
+There are several hundred of those CSV files, one per cohort x thermal moisture regime x AEZ, and each
+solution needs only one cell from each. land_cube() compiles all of them into dense arrays once, stored in
+$DRAWDOWN_CACHE_DIR/land and memory mapped read-only, so processes share a single copy and constructing
+an AEZ is a lookup. The compiled arrays are rebuilt automatically when any of the CSVs change.
 """
 
+import functools
+import hashlib
 import pathlib
 import re
 
 import numpy as np
 import pandas as pd
+from model import csv_cache
 from model import dd
 from model.metaclass_cache import MetaclassCache
 
@@ -23,6 +31,168 @@ from model.decorators import data_func
 
 LAND_CSV_PATH = pathlib.Path(__file__).parents[1].joinpath('data', 'land')
 
+ALLOCATION_COHORTS = [2018, 2019, 2020]
+WORLD_VERSIONS = ['2018', '2020']
+ALL_REGIMES = dd.THERMAL_MOISTURE_REGIMES + [r for r in dd.THERMAL_MOISTURE_REGIMES8
+        if r not in dd.THERMAL_MOISTURE_REGIMES]
+_CUBE_FORMAT = 1
+
+
+def _to_filename(name):
+    """Removes special characters and separates words with single underscores"""
+    return re.sub(' +', '_', re.sub('[^a-zA-Z0-9' '\n]', ' ', name)).strip('_')
+
+
+class LandCube:
+    """Land allocation and world land area for every cohort, solution, regime and AEZ.
+
+       allocation: 'Total % allocated' from land/allocation<cohort>, indexed by
+         [cohort, solution, regime, AEZ]. NaN where a cohort does not have that regime or
+         solution, 0.0 for AEZ29 which is not included in land allocation.
+       world: area in km2 from land/world/<version>, indexed by [version, regime, region, AEZ].
+         NaN where a version does not have that regime.
+       labels: dict of the labels along each of those axes.
+    """
+
+    def __init__(self, allocation, world, labels):
+        self.allocation = allocation
+        self.world = world
+        self.labels = labels
+        self._index = {axis: {label: i for (i, label) in enumerate(values)}
+                for (axis, values) in labels.items()}
+
+    def _lookup(self, axis, label):
+        try:
+            return self._index[axis][label]
+        except KeyError:
+            raise KeyError(label) from None
+
+    def solution_allocation(self, cohort, solution_name, regimes):
+        """Array of 'Total % allocated' for one solution, shape (len(regimes), len(dd.AEZS))."""
+        c = self._lookup('cohorts', cohort)
+        s = self._lookup('solutions', solution_name)
+        if np.isnan(self.allocation[c, s, :, 0]).all():
+            raise KeyError(solution_name)
+        rows = [self._lookup('regimes', tmr) for tmr in regimes]
+        result = np.array(self.allocation[c, s, rows, :])
+        if np.isnan(result[:, -1]).any():
+            raise KeyError(f"{cohort} land allocation has no regime in {regimes}")
+        return result
+
+    def world_area(self, version, regime):
+        """DataFrame of land area in km2 by region and AEZ for one thermal moisture regime."""
+        v = self._lookup('versions', version)
+        r = self._lookup('regimes', regime)
+        values = np.array(self.world[v, r, :, :])
+        if np.isnan(values).all():
+            raise KeyError(f"world land data {version} has no regime {regime}")
+        return pd.DataFrame(values, index=list(self.labels['regions']),
+                columns=list(self.labels['aezs']))
+
+
+def _cube_sources():
+    return sorted(LAND_CSV_PATH.glob('allocation*/*/*.csv')) + sorted(
+            LAND_CSV_PATH.glob('world/*/*.csv'))
+
+
+def _cube_key():
+    h = hashlib.sha256(f"{_CUBE_FORMAT}\0{np.__version__}".encode('utf-8'))
+    for path in _cube_sources():
+        st = path.stat()
+        h.update(f"{path.relative_to(LAND_CSV_PATH)}\0{st.st_mtime_ns}\0{st.st_size}\0".encode(
+            'utf-8'))
+    return h.hexdigest()
+
+
+def _build_cube():
+    """Read every allocation and world land CSV, returns (allocation, world, labels)."""
+    solutions = []
+    tables = {}
+    for cohort in ALLOCATION_COHORTS:
+        for tmr in ALL_REGIMES:
+            tmr_path = LAND_CSV_PATH.joinpath(f'allocation{cohort}', _to_filename(tmr))
+            if not tmr_path.is_dir():
+                continue
+            for col in dd.AEZS:
+                if col.startswith('AEZ29'):  # this zone is not included in land allocation
+                    continue
+                la_df = pd.read_csv(tmr_path.joinpath(_to_filename(col) + '.csv'), index_col=0)
+                tables[(cohort, tmr, col)] = la_df['Total % allocated']
+                solutions.extend(s for s in la_df.index if s not in solutions)
+
+    shape = (len(ALLOCATION_COHORTS), len(solutions), len(ALL_REGIMES), len(dd.AEZS))
+    allocation = np.full(shape, np.nan)
+    for (c, cohort) in enumerate(ALLOCATION_COHORTS):
+        for (r, tmr) in enumerate(ALL_REGIMES):
+            if (cohort, tmr, dd.AEZS[0]) not in tables:
+                continue
+            for (a, col) in enumerate(dd.AEZS):
+                series = tables.get((cohort, tmr, col), None)
+                if series is None:
+                    allocation[c, :len(solutions), r, a] = 0.0
+                    continue
+                allocation[c, :, r, a] = series.reindex(solutions).values
+
+    regions = None
+    world = None
+    for (v, version) in enumerate(WORLD_VERSIONS):
+        for (r, tmr) in enumerate(ALL_REGIMES):
+            path = LAND_CSV_PATH.joinpath('world', version, _to_filename(tmr) + '.csv')
+            if not path.is_file():
+                continue
+            df = pd.read_csv(path, index_col=0)[dd.AEZS]
+            if regions is None:
+                regions = list(df.index)
+                world = np.full((len(WORLD_VERSIONS), len(ALL_REGIMES), len(regions),
+                    len(dd.AEZS)), np.nan)
+            elif list(df.index) != regions:
+                raise ValueError(f"{path}: regions differ from other world land data files")
+            world[v, r, :, :] = df.values
+
+    # A solution missing from one cohort must not look like an all-zero allocation there.
+    for (c, cohort) in enumerate(ALLOCATION_COHORTS):
+        for (s, solution) in enumerate(solutions):
+            if np.isnan(allocation[c, s, :, :-1]).all():
+                allocation[c, s, :, :] = np.nan
+
+    labels = {'cohorts': ALLOCATION_COHORTS, 'solutions': solutions, 'regimes': ALL_REGIMES,
+            'aezs': dd.AEZS, 'versions': WORLD_VERSIONS, 'regions': regions}
+    return (allocation, world, labels)
+
+
+def _load_cube(key):
+    allocation = csv_cache.load('land', key + '-allocation')
+    world = csv_cache.load('land', key + '-world')
+    labels = csv_cache.load('land', key + '-labels')
+    if allocation is None or world is None or labels is None:
+        return None
+    return LandCube(allocation=allocation, world=world, labels=labels)
+
+
+def _store_cube(key, allocation, world, labels):
+    # each part is written atomically. A reader finding only some of them builds the cube
+    # itself, and parts written by other processes with the same key are identical.
+    csv_cache.store('land', key + '-allocation', allocation)
+    csv_cache.store('land', key + '-world', world)
+    csv_cache.store('land', key + '-labels', labels)
+
+
+@functools.lru_cache(maxsize=None)
+def land_cube():
+    """Returns the LandCube, compiling it from the CSV files on first use."""
+    key = _cube_key()
+    cube = _load_cube(key)
+    if cube is not None:
+        return cube
+    (allocation, world, labels) = _build_cube()
+    _store_cube(key, allocation, world, labels)
+    cube = _load_cube(key)
+    if cube is not None:
+        return cube
+    allocation.setflags(write=False)
+    world.setflags(write=False)
+    return LandCube(allocation=allocation, world=world, labels=labels)
+
 
 class AEZ(DataHandler, object, metaclass=MetaclassCache):
     """AEZ Data module.
@@ -56,7 +226,7 @@ class AEZ(DataHandler, object, metaclass=MetaclassCache):
 
     def _to_filename(self, name):
         """Removes special characters and separates words with single underscores"""
-        return re.sub(' +', '_', re.sub('[^a-zA-Z0-9' '\n]', ' ', name)).strip('_')
+        return _to_filename(name)
 
     def _populate_solution_land_allocation(self):
         """Calculates solution specific land allocation using values from 'allocation' directory.
@@ -67,21 +237,10 @@ class AEZ(DataHandler, object, metaclass=MetaclassCache):
         if self.ignore_allocation:
             self.soln_land_alloc_df = df.fillna(1)
             return
-        else:
-            df = df.fillna(0)
-
-        for tmr in self.regimes:
-            tmr_path = LAND_CSV_PATH.joinpath(f'allocation{self.cohort}', self._to_filename(tmr))
-            for col in df:
-                if col.startswith('AEZ29'):  # this zone is not included in land allocation
-                    continue
-                aez_path = tmr_path.joinpath(self._to_filename(col) + '.csv')
-                la_df = pd.read_csv(aez_path, index_col=0)
-                total_perc_allocated = la_df.loc[self.solution_name]['Total % allocated']
-                if total_perc_allocated > 0:
-                    df.at[tmr, col] = total_perc_allocated
-        else:
-            self.soln_land_alloc_df = df
+        values = land_cube().solution_allocation(cohort=self.cohort,
+                solution_name=self.solution_name, regimes=self.regimes)
+        df.loc[:, :] = np.where(values > 0, values, 0.0)
+        self.soln_land_alloc_df = df
 
 
     def _get_applicable_zones(self):
@@ -91,7 +250,7 @@ class AEZ(DataHandler, object, metaclass=MetaclassCache):
            applicable_zones will be redundant in solutions which use DD allocation.
            'AEZ Data'!A2:AD29
         """
-        row = pd.read_csv(LAND_CSV_PATH.joinpath('aez', 'solution_aez_matrix.csv'),
+        row = csv_cache.read_csv(LAND_CSV_PATH.joinpath('aez', 'solution_aez_matrix.csv'),
                 index_col=0).loc[self.solution_name]
         self.applicable_zones = row[row].index.tolist()
 
@@ -104,9 +263,9 @@ class AEZ(DataHandler, object, metaclass=MetaclassCache):
         """
         self.world_land_alloc_dict = {}
         subdir = '2020' if len(self.regimes) == 8 else '2018'
+        cube = land_cube()
         for tmr in self.regimes:
-            df = pd.read_csv(LAND_CSV_PATH.joinpath('world', subdir,
-                    self._to_filename(tmr) + '.csv'), index_col=0).drop('Total Area (km2)', 1)
+            df = cube.world_area(subdir, tmr)
             # apply fixed world fraction to each region
             self.world_land_alloc_dict[tmr] = df.mul(self.soln_land_alloc_df.loc[tmr],
                     axis=1) / 10000
@@ -121,12 +280,19 @@ class AEZ(DataHandler, object, metaclass=MetaclassCache):
         """
         cols = self.regimes
         soln_df = pd.DataFrame(columns=cols, index=self.regions).fillna(0.)
-        for reg in self.regions:
-            for tmr, df in self.world_land_alloc_dict.items():
-                if reg == 'Global':
-                    soln_df.at[reg, tmr] = soln_df.loc[dd.MAIN_REGIONS, tmr].sum()
-                else:
-                    soln_df.at[reg, tmr] = df.loc[reg, self.applicable_zones].sum()
+        regions = [reg for reg in self.regions if reg != 'Global']
+        rows = soln_df.index.get_indexer(regions)
+        main = soln_df.index.get_indexer(dd.MAIN_REGIONS)
+        glob = soln_df.index.get_loc('Global')
+        for tmr, df in self.world_land_alloc_dict.items():
+            values = df.values[np.ix_(df.index.get_indexer(regions),
+                df.columns.get_indexer(self.applicable_zones))]
+            # C order, so each row is summed the same (pairwise) way as a single region's Series.
+            values = np.ascontiguousarray(np.where(np.isnan(values), 0.0, values))
+            column = np.zeros(len(soln_df.index))
+            column[rows] = values.sum(axis=1)
+            column[glob] = column[main].sum()
+            soln_df[tmr] = column
 
         soln_df['All'] = soln_df.sum(axis=1)
         soln_df.name = 'land_distribution'
@@ -3,14 +3,10 @@
 Computes reductions in CO2-equivalent emissions.
 """
 
-from functools import lru_cache, wraps
-import hashlib
+from functools import lru_cache
 import math
 #from numba import jit
-import json
-from io import StringIO
 
-import fair
 import numpy as np
 import pandas as pd
 import model.advanced_controls
@@ -24,71 +20,65 @@ C_TO_CO2EQ = 3.666
 # Note: a different value of 3.64 is sometimes used for certain results in Excel
 # Here we will always use this value for consistency
 
-class NumpyEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return json.JSONEncoder.default(self, obj)
-
-@lru_cache
-def fair_scm_cached(json_input: str):
-    input = json.loads(json_input)
-    values = np.array(input['values'])
-    kwargs = {}
-    for k in input['kwargs']:
-        if isinstance(input['kwargs'][k], list):
-            kwargs[k] = np.array(input['kwargs'][k])
-        else:
-            kwargs[k] = input['kwargs'][k]
-    return fair.forward.fair_scm(emissions=values, useMultigas=input['useMultigas'], **kwargs)
-
-def fair_scm(values, useMultigas, **kwargs):
-    key = json.dumps({
-        'values': values,
-        'useMultigas': useMultigas,
-        'kwargs': kwargs
-    }, cls=NumpyEncoder)
-    return fair_scm_cached(key)
-
-@lru_cache
-def co2_ppm_calculator_cached(
-    co2_vals,
-    solution_category,
-    report_start_year,
-    ):
-
-    co2_vals = pd.read_csv(StringIO(co2_vals), index_col=0, squeeze=True, float_precision='round_trip')
-
-    columns = ['PPM', 'Total'] + list(range(2015, 2061))
-    ppm_calculator = pd.DataFrame(0, columns=columns, index=co2_vals.index.copy(),
-                                      dtype=np.float64)
-    ppm_calculator.index = ppm_calculator.index.astype(int)
+@lru_cache()
+def bern_impulse_response(first_year, last_year):
+    """Fraction of a CO2 pulse remaining in the atmosphere, as a (year x pulse year) matrix.
+
+       matrix[i, j] is the fraction of a pulse emitted in year first_year + j which
+       remains in year first_year + i, zero for years before the pulse. The pulse
+       year itself counts as the first year of decay. Simplified Bern Carbon Cycle
+       model from Myhrvald and Caldeira (2012).
+
+       The matrix is computed once per process for each range of years and is read-only.
+    """
+    n = last_year - first_year + 1
+    kernel = np.array([0.217 + 0.259 * math.exp(-delta / 172.9) +
+                       0.338 * math.exp(-delta / 18.51) + 0.186 * math.exp(-delta / 1.186)
+                       for delta in range(1, n + 1)])
+    deltas = np.arange(n).reshape(-1, 1) - np.arange(n).reshape(1, -1)
+    matrix = np.where(deltas >= 0, kernel[np.clip(deltas, 0, None)], 0.0)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def co2_ppm_table(co2_vals, solution_category, report_start_year):
+    """CO2 PPM calculator table for a Series of yearly CO2 reductions (in MMT).
+
+       Returns a DataFrame indexed by year with columns 'PPM', 'Total' and one column
+       per pulse year 2015-2060 holding the CO2 remaining from that year's pulse.
+    """
+    years = co2_vals.index.astype(int)
+    first_year = years.min()
+    last_year = years.max()
+    pulses = co2_vals.to_numpy(dtype=np.float64).copy()
+    computed = np.ones(len(years), dtype=bool)
+    if solution_category != model.advanced_controls.SOLUTION_CATEGORY.LAND:
+        # On RRS xls models this skips the calc but on LAND the calc is done anyway
+        # Note that this affects the values for all years and should probably NOT be
+        # skipped (i.e. LAND is the correct implementation)
+        # see: https://docs.google.com/document/d/19sq88J_PXY-y_EnqbSJDl0v9CdJArOdFLatNNUFhjEA/edit#
+        computed = np.asarray(years >= report_start_year)
+        pulses[~computed] = 0.0
+
+    matrix = bern_impulse_response(first_year, last_year)
+    vals = np.where(matrix != 0.0, matrix * pulses.reshape(1, -1), 0.0)
+    total = matrix @ np.where(np.isnan(pulses), 0.0, pulses)
+
+    # the Excel table has columns for 2015-2060, pulses in any other year which
+    # are computed are appended to the right.
+    columns = list(range(2015, 2061))
+    columns += [y for (y, c) in zip(years, computed) if c and y not in columns]
+    pulse_table = pd.DataFrame(vals, index=years, columns=years).reindex(
+            columns=columns, fill_value=0.0)
+
+    ppm_calculator = pd.concat([
+        pd.DataFrame({'PPM': total / (44.01 * 1.8 * 100), 'Total': total}, index=years),
+        pulse_table], axis=1)
     ppm_calculator.index.name = 'Year'
-    first_year = ppm_calculator.first_valid_index()
-    last_year = ppm_calculator.last_valid_index()
-    for year in ppm_calculator.index:
-        if (year < report_start_year and
-                solution_category != model.advanced_controls.SOLUTION_CATEGORY.LAND):
-            # On RRS xls models this skips the calc but on LAND the calc is done anyway
-            # Note that this affects the values for all years and should probably NOT be
-            # skipped (i.e. LAND is the correct implementation)
-            # see: https://docs.google.com/document/d/19sq88J_PXY-y_EnqbSJDl0v9CdJArOdFLatNNUFhjEA/edit#
-            continue
-        b = co2_vals[year]
-        for delta in range(1, last_year - first_year + 2):
-            if (year + delta - 1) > last_year:
-                break
-            val = 0.217
-            val += 0.259 * math.exp(-delta / 172.9)
-            val += 0.338 * math.exp(-delta / 18.51)
-            val += 0.186 * math.exp(-delta / 1.186)
-            ppm_calculator.loc[year + delta - 1, year] = b * val
-    ppm_calculator.loc[:, 'Total'] = ppm_calculator.sum(axis=1)
-    for year in ppm_calculator.index:
-        ppm_calculator.at[year, 'PPM'] = ppm_calculator.at[year, 'Total'] / (44.01 * 1.8 * 100)
     ppm_calculator.name = 'co2_ppm_calculator'
     return ppm_calculator
 
+
 class CO2Calcs(DataHandler):
     """CO2 Calcs module.
         Arguments:
@@ -352,7 +342,7 @@ class CO2Calcs(DataHandler):
             co2_vals = self.co2_sequestered_global()['All'] + self.co2eq_mmt_reduced()['World']
             assert self.ac.emissions_use_co2eq, 'Land/ocean models must use CO2 eq'
 
-        return co2_ppm_calculator_cached(co2_vals.to_csv(), self.ac.solution_category, self.ac.report_start_year)
+        return co2_ppm_table(co2_vals, self.ac.solution_category, self.ac.report_start_year)
 
     @lru_cache()
     @data_func
@@ -367,11 +357,11 @@ class CO2Calcs(DataHandler):
                 index=co2_ppm_calculator.index.copy(), dtype=np.float64)
         ppm_calculator.index = ppm_calculator.index.astype(int)
         ppm_calculator["CO2 PPM"] = co2_ppm_calculator["PPM"]
-        ppm_calculator["CO2 RF"] = ppm_calculator["CO2 PPM"].apply(co2_rf)
+        ppm_calculator["CO2 RF"] = co2_rf(ppm_calculator["CO2 PPM"].values)
         ppm_calculator["CH4 PPB"] = self.ch4_ppb_calculator["PPB"]
-        ppm_calculator["CH4 RF"] = ppm_calculator["CH4 PPB"].apply(ch4_rf)
+        ppm_calculator["CH4 RF"] = ch4_rf(ppm_calculator["CH4 PPB"].values)
         s = ppm_calculator["CO2 RF"] + ppm_calculator["CH4 RF"]
-        ppm_calculator["CO2-eq PPM"] = s.apply(co2eq_ppm)
+        ppm_calculator["CO2-eq PPM"] = co2eq_ppm(s.values)
         return ppm_calculator
 
 
@@ -556,7 +546,7 @@ class CO2Calcs(DataHandler):
              T: Change in temperature since pre-industrial time in Kelvin
         """
         kwargs = model.fairutil.fair_scm_kwargs()
-        (C, F, T) = fair_scm(self.baseline.values, False, **kwargs)
+        (C, F, T) = model.fairutil.fair_scm(self.baseline.values, False, **kwargs)
         result = pd.DataFrame({'C': C, 'F': F, 'T': T}, index=self.baseline.index)
         result.name = 'FaIR_CFT_baseline'
         return result
@@ -586,7 +576,7 @@ class CO2Calcs(DataHandler):
             emissions = emissions.subtract(other=gtonsC, fill_value=0.0)
 
         kwargs = model.fairutil.fair_scm_kwargs()
-        (C, F, T) = fair_scm(emissions.values, False, **kwargs)
+        (C, F, T) = model.fairutil.fair_scm(emissions.values, False, **kwargs)
         result = pd.DataFrame({'C': C , 'F': F, 'T': T}, index=emissions.index)
         result.name = 'FaIR_CFT'
         return result
@@ -606,23 +596,25 @@ class CO2Calcs(DataHandler):
              T: Change in temperature since pre-industrial time in Kelvin
         """
         kwargs = model.fairutil.fair_scm_kwargs()
-        (C, F, T) = fair_scm(fair.RCPs.rcp45.Emissions.emissions[:, 0],False, **kwargs)
-        result = pd.DataFrame({'C': C, 'F': F, 'T': T}, index=fair.RCPs.rcp45.Emissions.year)
+        rcp45 = model.fairutil.rcp45_emissions()
+        (C, F, T) = model.fairutil.fair_scm(rcp45.emissions[:, 0], False, **kwargs)
+        result = pd.DataFrame({'C': C, 'F': F, 'T': T}, index=rcp45.year)
         result.name = 'FaIR_CFT_RCP45'
         return result
 
 # The following formulae come from the SolarPVUtil Excel implementation of 27Aug18.
 # There was no explanation of where they came from or what they really mean.
+# They accept either scalars or numpy arrays.
 
 #@jit
 def co2_rf(x):
     original_co2 = 400
-    return 5.35 * math.log((original_co2 + x) / original_co2)
+    return 5.35 * np.log((original_co2 + x) / original_co2)
 
 
 #@jit
 def f(M, N):
-    return 0.47 * math.log(
+    return 0.47 * np.log(
         1 + 2.01 * 10 ** -5 * (M * N) ** 0.75 + 5.31 * 10 ** -15 * M * (M * N) ** 1.52)
 
 
@@ -640,4 +632,4 @@ def ch4_rf(x):
 #@jit
 def co2eq_ppm(x):
     original_co2 = 400
-    return (original_co2 * math.exp(x / 5.35)) - original_co2
+    return (original_co2 * np.exp(x / 5.35)) - original_co2
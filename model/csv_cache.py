@@ -0,0 +1,146 @@
+"""Cache of parsed input CSV files.
+
+Every Scenario reads dozens of CSV files (TAM and adoption data sources, custom adoption,
+VMAs, AEZ allocations) and many of them, like data/energy/*.csv, are shared by many
+solutions. read_csv() is a drop-in replacement for pd.read_csv which:
+  + memoizes the parsed DataFrame in-process, keyed by the file and the read_csv arguments.
+  + persists the parsed DataFrame to a binary cache on disk, so that a fresh process
+    (cold start, or a worker in a process pool) unpickles it instead of parsing CSV.
+
+Cache entries are keyed by a digest of the resolved path, modification time and size of
+the file plus the read_csv arguments and pandas version, so editing a CSV file invalidates
+its entries. The on-disk cache lives in $DRAWDOWN_CACHE_DIR/csv, defaulting to
+~/.cache/drawdown/csv. Setting DRAWDOWN_CACHE_DIR to an empty string disables the on-disk
+cache, the in-process cache is always used. Files published by model/shared_data.py are
+taken from shared memory instead of either.
+
+Callers receive a copy of the cached DataFrame and are free to modify it, unless they ask
+for copy=False.
+"""
+
+import hashlib
+import os
+import pathlib
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from model import shared_data
+
+_memory = {}
+
+
+def cache_dir(name='csv'):
+    """Directory holding the on-disk cache, or None if it is disabled.
+       name: subdirectory of $DRAWDOWN_CACHE_DIR, other modules keep their caches alongside
+         through load() and store().
+    """
+    base = os.environ.get('DRAWDOWN_CACHE_DIR', None)
+    if base is None:
+        base = pathlib.Path.home().joinpath('.cache', 'drawdown')
+    elif not base:
+        return None
+    return pathlib.Path(base).joinpath(name)
+
+
+def _key(path, kwargs):
+    """Digest identifying one parse of one version of a file."""
+    st = path.stat()
+    args = repr(sorted(kwargs.items()))
+    text = f"{path}\0{st.st_mtime_ns}\0{st.st_size}\0{args}\0{pd.__version__}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def cache_key(filepath, **kwargs):
+    """Key of the cache entry for read_csv(filepath, **kwargs), see shared_data.publish()."""
+    return _key(pathlib.Path(filepath).resolve(), kwargs)
+
+
+def load(name, key):
+    """Object stored by store(name, key, obj), or None if there is none, it cannot be read
+       or the on-disk cache is disabled. Arrays are returned memory-mapped read-only."""
+    directory = cache_dir(name)
+    if directory is None:
+        return None
+    try:
+        path = directory.joinpath(key + '.npy')
+        if path.exists():
+            return np.load(path, mmap_mode='r')
+        with open(directory.joinpath(key + '.pkl'), 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError,
+            ValueError):
+        return None
+
+
+def store(name, key, obj):
+    """Keep obj in the on-disk cache directory name, see cache_dir(), as key.
+       numpy arrays are written as .npy files so that load() can memory-map them, anything
+       else is pickled. Failures are ignored, the cache is only an optimization.
+    """
+    directory = cache_dir(name)
+    if directory is None:
+        return
+    suffix = '.npy' if isinstance(obj, np.ndarray) else '.pkl'
+    tmpname = None
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file and rename, so concurrent readers never see a partial file.
+        (fd, tmpname) = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            if suffix == '.npy':
+                np.save(f, obj)
+            else:
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpname, directory.joinpath(key + suffix))
+    except OSError:
+        if tmpname is not None:
+            try:
+                os.unlink(tmpname)
+            except OSError:
+                pass
+
+
+def read_csv(filepath_or_buffer, copy=True, **kwargs):
+    """Equivalent to pd.read_csv(filepath_or_buffer, **kwargs), using cached results.
+
+       Only filenames (str or pathlib.Path) are cached, file-like objects are passed
+       straight through to pd.read_csv.
+       copy: if False, the result shares its values with the cache and must not be
+         modified, which saves copying reference data that callers only read.
+    """
+    if not isinstance(filepath_or_buffer, (str, pathlib.PurePath)):
+        return pd.read_csv(filepath_or_buffer, **kwargs)
+
+    path = pathlib.Path(filepath_or_buffer).resolve()
+    key = _key(path, kwargs)
+    df = _memory.get(key, None)
+    if df is None:
+        df = shared_data.get(key)
+        if df is None:
+            df = load('csv', key)
+        if df is None:
+            df = pd.read_csv(path, **kwargs)
+            store('csv', key, df)
+        _memory[key] = df
+    return df.copy(deep=copy)
+
+
+def discard(keys):
+    """Remove the entries of cache_key()s from the in-process cache."""
+    for key in keys:
+        _memory.pop(key, None)
+
+
+def clear(disk=False):
+    """Empty the in-process cache and, if disk=True, the on-disk cache."""
+    _memory.clear()
+    directory = cache_dir()
+    if disk and directory is not None and directory.is_dir():
+        for filename in directory.glob('*.pkl'):
+            try:
+                filename.unlink()
+            except OSError:
+                pass
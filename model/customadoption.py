@@ -2,6 +2,7 @@
 
 from functools import lru_cache
 from model.metaclass_cache import MetaclassCache
+from model import csv_cache
 import model.dd as dd
 import pandas as pd
 import numpy as np
@@ -111,7 +112,7 @@ class CustomAdoption(object, metaclass=MetaclassCache):
 
     def _read_csv(self, filename):
         """Read in a CSV file from filename."""
-        df = pd.read_csv(filename, header=0, index_col=0, skipinitialspace=True,
+        df = csv_cache.read_csv(filename, header=0, index_col=0, skipinitialspace=True,
                          skip_blank_lines=True, comment='#', dtype=np.float64)
         df.index = df.index.astype(int)
         df.index.name = 'Year'
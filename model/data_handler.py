@@ -1,9 +1,39 @@
 """ Super class to contain and manage data """
+import inspect
+import json
+import math
 import pandas as pd
 import numpy as np
 import copy
 from typing import List
 
+_registry = {}
+
+
+def _selected(data, regions):
+    """Boolean mask over the keys (columns of a DataFrame, index of a Series) of data to export.
+       If regions is given and data is broken out by region, only those regions are kept."""
+    keys = data.keys()
+    if regions is not None and 'World' in keys:
+        return np.array([k in regions for k in keys], dtype=bool)
+    return np.ones(len(keys), dtype=bool)
+
+
+def _label(key):
+    return str(key) if isinstance(key, np.integer) else key
+
+
+def _clean_value(value):
+    """JSON-safe Python scalar for one value, with NaN and infinity replaced by 0."""
+    if isinstance(value, (float, np.floating)):
+        return float(value) if math.isfinite(value) else 0.0
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or value is pd.NA or value is pd.NaT:
+        return 0
+    return value
+
+
 class DataHandler:
 
     def clean_nan(dataframe):
@@ -15,25 +45,104 @@ class DataHandler:
         dataframe = dataframe.fillna(0)
         return dataframe
 
+    @classmethod
+    def data_functions(cls):
+        """Names of the @data_func methods of this class which take no arguments.
+
+           Computed once per class, so exporting results does not need to walk dir(self).
+        """
+        names = _registry.get(cls, None)
+        if names is None:
+            names = []
+            for name in sorted(dir(cls)):
+                func = inspect.getattr_static(cls, name, None)
+                if not getattr(func, 'data_func', False) or not callable(func):
+                    continue
+                params = list(inspect.signature(func).parameters.values())[1:]
+                if all(p.default is not p.empty or p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD)
+                        for p in params):
+                    names.append(name)
+            names = tuple(names)
+            _registry[cls] = names
+        return names
+
+    def iter_data(self):
+        """Yields (name, result) for each data function, computing them one at a time.
+
+           Results are frequently shared with an lru_cache and must not be modified.
+        """
+        for name in self.data_functions():
+            yield (name, getattr(self, name)())
+
     def to_json(self, regions: List[str]=None, clean_nan=clean_nan):
         outputs = dict()
-        obj_vars = dir(self)
-        limit_regions = (regions is not None)
-        for k in obj_vars:
-            func = getattr(self, k)
-            if hasattr(func, 'data_func'):
-                data = func()
-                if data is not None and (isinstance(data, pd.DataFrame) or isinstance(data, pd.Series)):
-                    data_keys = data.keys()
-                    for l in data.keys():
-                        if limit_regions and 'World' in data_keys and l not in regions:
-                            del data[l]
-                        else:
-                            if isinstance(l, np.int64):
-                                label = str(l)
-                                data[label] = data[l]
-                                del data[l]
-                    outputs[k] = clean_nan(data)
+        for (k, data) in self.iter_data():
+            if data is not None and (isinstance(data, pd.DataFrame) or isinstance(data, pd.Series)):
+                mask = _selected(data, regions)
+                if isinstance(data, pd.DataFrame):
+                    data = data.loc[:, mask]
+                    data.columns = [_label(c) for c in data.columns]
                 else:
-                    outputs[k] = data
+                    data = data.loc[mask]
+                    data.index = [_label(i) for i in data.index]
+                outputs[k] = clean_nan(data)
+            else:
+                outputs[k] = data
         return outputs
+
+    def iter_records(self, regions: List[str]=None):
+        """Yields one dict per row of every data function result, for streaming export.
+
+           Each record has the data function name under 'table', the row label under
+           'index' and one entry per column (or 'value' for a Series), with NaN and
+           infinite values replaced by 0 as in to_json. regions selects the regional columns
+           to export. Rows are produced directly from the cached results, without
+           building a cleaned copy of each table.
+        """
+        for (name, data) in self.iter_data():
+            if isinstance(data, pd.DataFrame):
+                positions = np.flatnonzero(_selected(data, regions))
+                labels = [str(_label(data.columns[p])) for p in positions]
+                columns = [data.iloc[:, p].values for p in positions]
+                for (i, idx) in enumerate(data.index):
+                    record = {'table': name, 'index': _clean_value(idx)}
+                    for (label, column) in zip(labels, columns):
+                        record[label] = _clean_value(column[i])
+                    yield record
+            elif isinstance(data, pd.Series):
+                values = data.values
+                for p in np.flatnonzero(_selected(data, regions)):
+                    yield {'table': name, 'index': _clean_value(_label(data.index[p])),
+                            'value': _clean_value(values[p])}
+            elif data is not None:
+                yield {'table': name, 'index': None, 'value': _clean_value(data)}
+
+    def write_ndjson(self, stream, regions: List[str]=None):
+        """Write all data function results to stream as newline-delimited JSON, one line
+           per row as produced by iter_records. Only one table is held at a time.
+        """
+        for record in self.iter_records(regions=regions):
+            stream.write(json.dumps(record))
+            stream.write('\n')
+
+    def iter_arrow(self, regions: List[str]=None):
+        """Yields (name, pyarrow.RecordBatch) for each DataFrame or Series result.
+
+           The batch has an 'index' column holding the row labels followed by the selected
+           columns. Float columns are handed to Arrow without copying, with NaN as null.
+           Requires the optional pyarrow package. Each batch can be written as an Arrow IPC
+           stream with pyarrow.ipc.new_stream(sink, batch.schema).
+        """
+        import pyarrow
+
+        for (name, data) in self.iter_data():
+            if isinstance(data, pd.Series):
+                data = data.to_frame(name='value')
+            if not isinstance(data, pd.DataFrame):
+                continue
+            arrays = [pyarrow.array(np.asarray(data.index))]
+            names = ['index']
+            for p in np.flatnonzero(_selected(data, regions)):
+                arrays.append(pyarrow.array(data.iloc[:, p].values, from_pandas=True))
+                names.append(str(_label(data.columns[p])))
+            yield (name, pyarrow.RecordBatch.from_arrays(arrays, names=names))
@@ -1,21 +1,28 @@
 """Utilities and definitions for https://github.com/OMS-NetZero/FAIR"""
 
+import collections
+import concurrent.futures
+import hashlib
+import os
 import pathlib
+import threading
 
-import fair
-import fair.RCPs.rcp26
-import fair.RCPs.rcp45
-import fair.RCPs.rcp60
-import fair.RCPs.rcp85
 import numpy as np
 import pandas as pd
 
+from model import shared_data
+
 
 topdir = pathlib.Path(__file__).parents[1]
 baselineCO2_path = topdir.joinpath('data', 'baselineCO2.csv')
 tcrecs = np.array([1.7, 3.2])  # GRL https://doi.org/10.1029/2019GL082442
 r0 = 35  # https://github.com/OMS-NetZero/FAIR/issues/19
 
+# FaIR results are cached by a digest of their inputs, most recently used last.
+CACHE_MAXSIZE = 1024
+_results = collections.OrderedDict()
+_results_lock = threading.Lock()
+
 # AR5 without climate-carbon feedback
 CO2_MULT = 3.664
 CH4_MULT = 28
@@ -65,10 +72,24 @@ ghg = {
 }
 
 
+def rcp45_emissions():
+    """fair.RCPs.rcp45.Emissions, the RCP4.5 emissions dataset.
+
+       fair is imported on first use rather than with this module, importing it also
+       imports much of scipy and takes longer than the rest of the model package.
+    """
+    import fair.RCPs.rcp45
+    return fair.RCPs.rcp45.Emissions
+
+
 def baseline_emissions():
-    """Return emissions to use as a baseline for Drawdown solutions."""
-    rcp = pd.DataFrame(fair.RCPs.rcp45.Emissions.emissions.copy(), columns=ghg.keys(),
-            index=fair.RCPs.rcp45.Emissions.year)
+    """Return emissions to use as a baseline for Drawdown solutions.
+       Read-only when published by model/shared_data.py."""
+    shared = shared_data.get(shared_data.BASELINE_EMISSIONS)
+    if shared is not None:
+        return shared
+    emissions = rcp45_emissions()
+    rcp = pd.DataFrame(emissions.emissions.copy(), columns=ghg.keys(), index=emissions.year)
     baseline = (rcp['FossilCO2']  + rcp['OtherCO2'] +
              # Global Warming Potential of individual GHGs in CO2 equivalence
              # CH4 and N2O values from Project Drawdown, noted as "AR5 with feedback"
@@ -127,3 +148,125 @@ def baseline_emissions():
 
 def fair_scm_kwargs():
     return {"r0": r0, "tcrecs": tcrecs}
+
+
+def _digest(emissions, useMultigas, kwargs):
+    """Binary digest identifying one FaIR run."""
+    h = hashlib.blake2b(digest_size=16)
+    emissions = np.ascontiguousarray(emissions, dtype=np.float64)
+    h.update(repr((emissions.shape, bool(useMultigas))).encode('utf-8'))
+    h.update(emissions.tobytes())
+    for key in sorted(kwargs.keys()):
+        value = kwargs[key]
+        h.update(key.encode('utf-8'))
+        if isinstance(value, np.ndarray):
+            h.update(repr(value.shape).encode('utf-8'))
+            h.update(np.ascontiguousarray(value, dtype=np.float64).tobytes())
+        else:
+            h.update(repr(value).encode('utf-8'))
+    return h.digest()
+
+
+def _cache_get(key):
+    with _results_lock:
+        result = _results.get(key, None)
+        if result is not None:
+            _results.move_to_end(key)
+        return result
+
+
+def _cache_put(key, result):
+    with _results_lock:
+        _results[key] = result
+        while len(_results) > CACHE_MAXSIZE:
+            _results.popitem(last=False)
+
+
+def cache_clear():
+    """Discard all cached FaIR results."""
+    with _results_lock:
+        _results.clear()
+
+
+def _run(emissions, useMultigas, kwargs):
+    """Run FaIR once, returning (C, F, T) as read-only arrays."""
+    import fair.forward
+    (C, F, T) = fair.forward.fair_scm(emissions=emissions, useMultigas=useMultigas, **kwargs)
+    result = (np.asarray(C), np.asarray(F), np.asarray(T))
+    for arr in result:
+        arr.setflags(write=False)
+    return result
+
+
+def fair_scm(emissions, useMultigas=False, **kwargs):
+    """Cached equivalent of fair.forward.fair_scm, returns (C, F, T).
+
+       The returned arrays are shared with the cache and are read-only.
+    """
+    key = _digest(emissions, useMultigas, kwargs)
+    result = _cache_get(key)
+    if result is None:
+        result = _run(emissions, useMultigas, kwargs)
+        _cache_put(key, result)
+    return result
+
+
+def fair_scm_batch(emissions, max_workers=None, **kwargs):
+    """Run FaIR for many CO2 emissions trajectories.
+
+       emissions: DataFrame with one row per trajectory and one column per year, in
+         Gigatons of carbon per year. A 2-D array of shape (N trajectories, years) is
+         also accepted, its rows are numbered 0..N-1 and the years are those of the
+         baseline RCP4.5 emissions.
+       max_workers: number of worker processes to spread uncached runs across, default
+         os.cpu_count(). max_workers=0 runs everything in the calling process.
+       kwargs: passed to fair.forward.fair_scm, default fair_scm_kwargs().
+
+       Results are cached per trajectory, so only trajectories which have not been seen
+       before (or are duplicated within the batch) are computed.
+
+       Returns a DataFrame indexed by (Trajectory, Year) with columns C, F, T:
+         C: CO2 concentration in ppm for the World.
+         F: Radiative forcing in watts per square meter
+         T: Change in temperature since pre-industrial time in Kelvin
+    """
+    if not kwargs:
+        kwargs = fair_scm_kwargs()
+    if isinstance(emissions, pd.DataFrame):
+        names = emissions.index
+        years = emissions.columns
+        values = emissions.values.astype(np.float64)
+    else:
+        values = np.atleast_2d(np.asarray(emissions, dtype=np.float64))
+        names = pd.RangeIndex(values.shape[0])
+        years = rcp45_emissions().year[:values.shape[1]].astype(int)
+
+    keys = [_digest(row, False, kwargs) for row in values]
+    results = {key: _cache_get(key) for key in keys}
+    todo = {}
+    for (key, row) in zip(keys, values):
+        if results[key] is None:
+            todo.setdefault(key, row)
+
+    if max_workers == 0 or len(todo) <= 1:
+        for (key, row) in todo.items():
+            results[key] = _run(row, False, kwargs)
+    else:
+        max_workers = min(max_workers or os.cpu_count(), len(todo))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {key: executor.submit(_run, row, False, kwargs)
+                    for (key, row) in todo.items()}
+            for (key, future) in futures.items():
+                results[key] = future.result()
+                for arr in results[key]:
+                    arr.setflags(write=False)
+    for key in todo.keys():
+        _cache_put(key, results[key])
+
+    num_years = len(years)
+    panel = np.empty((len(keys) * num_years, 3))
+    for (i, key) in enumerate(keys):
+        panel[i * num_years:(i + 1) * num_years, :] = np.column_stack(results[key])
+    index = pd.MultiIndex.from_product([names, years],
+            names=[names.name or 'Trajectory', 'Year'])
+    return pd.DataFrame(panel, index=index, columns=['C', 'F', 'T'])
@@ -159,19 +159,118 @@ def single_trend(data):
     return result
 
 
+TRENDS = ('linear', 'degree2', 'degree3', 'exponential')
+
+_TREND_ALIASES = {
+    'linear': 'linear',
+    '2nd poly': 'degree2', '2nd_poly': 'degree2', 'degree2': 'degree2',
+    '3rd poly': 'degree3', '3rd_poly': 'degree3', 'degree3': 'degree3',
+    'exponential': 'exponential', 'exp': 'exponential',
+    'single': 'single', 'single source': 'single',
+}
+
+
+def trend_name(trend):
+    """Canonical name of a trend algorithm, like 'degree3' for '3rd Poly'."""
+    name = _TREND_ALIASES.get(str(trend).lower(), None)
+    if name is None:
+        raise ValueError('invalid trend algorithm: ' + str(trend))
+    return name
+
+
 def trend_algorithm(data, trend):
     """Fit of data via one of several trend interpolation algorithms."""
-    t = trend.lower()
-    if t == "linear": return linear_trend(data=data)
-    if t == "2nd poly" or t == "2nd_poly" or t == "degree2":
-        return poly_degree2_trend(data=data)
-    if t == "3rd poly" or t == "3rd_poly" or t == "degree3":
-        return poly_degree3_trend(data=data)
-    if t == "exponential" or t == "exp":
-        return exponential_trend(data=data)
-    if t == "single" or t == "single source":
-        return single_trend(data)
-    raise ValueError('invalid trend algorithm: ' + str(trend))
+    t = trend_name(trend)
+    if t == 'linear': return linear_trend(data=data)
+    if t == 'degree2': return poly_degree2_trend(data=data)
+    if t == 'degree3': return poly_degree3_trend(data=data)
+    if t == 'exponential': return exponential_trend(data=data)
+    return single_trend(data)
+
+
+def _polyfit_columns(x, y, deg):
+    """np.polyfit of each column of y, all columns solved against one Vandermonde matrix.
+       Columns with values which are not finite (like the log of a negative number) are
+       fit one at a time, so they cannot affect the others."""
+    finite = np.isfinite(y).all(axis=0)
+    coeffs = np.empty((deg + 1, y.shape[1]))
+    if finite.any():
+        coeffs[:, finite] = np.polyfit(x, y[:, finite], deg)
+    for j in np.flatnonzero(~finite):
+        coeffs[:, j] = np.polyfit(x, y[:, j], deg)
+    return coeffs
+
+
+def fit_trends(data, trends=TRENDS):
+    """Fit every column of data with each of several trend algorithms at once.
+
+       data: DataFrame indexed by year, with one column per series to fit (for example one
+         per region). Like trend_algorithm, each column is fit to its non-NaN values.
+       trends: names of trend algorithms, as accepted by trend_algorithm.
+
+       Returns a float64 array of shape (trend x year x column) for the years 2014-2060,
+       holding the 'adoption' column trend_algorithm would return for that trend and column.
+       Columns with the same missing values share one least squares problem per degree,
+       solved for all of those columns together.
+    """
+    years = np.arange(2014, 2061)
+    offsets = np.arange(len(years))
+    names = [trend_name(t) for t in trends]
+    values = data.to_numpy(dtype=np.float64)
+    x_all = np.asarray(data.index) - 2014
+    result = np.full((len(names), len(years), values.shape[1]), np.nan)
+
+    groups = {}
+    for j in range(values.shape[1]):
+        valid = ~np.isnan(values[:, j])
+        if valid.any():
+            groups.setdefault(valid.tobytes(), (valid, []))[1].append(j)
+
+    for (valid, cols) in groups.values():
+        x = x_all[valid]
+        y = values[valid][:, cols]
+        off = offsets[:, np.newaxis]
+        for (i, name) in enumerate(names):
+            if name == 'linear':
+                (slope, intercept) = _polyfit_columns(x, y, 1)
+                result[i][:, cols] = off * slope + intercept
+            elif name == 'degree2':
+                (c2, c1, intercept) = _polyfit_columns(x, y, 2)
+                result[i][:, cols] = off * c1 + (off ** 2) * c2 + intercept
+            elif name == 'degree3':
+                (c3, c2, c1, intercept) = _polyfit_columns(x, y, 3)
+                result[i][:, cols] = off * c1 + (off ** 2) * c2 + (off ** 3) * c3 + intercept
+            elif name == 'exponential':
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    logy = np.log(y)
+                (ce, coeff) = _polyfit_columns(x, logy, 1)
+                result[i][:, cols] = np.exp(off * ce) * np.exp(coeff)
+
+    if 'single' in names:
+        single = data.reindex(years).to_numpy(dtype=np.float64)
+        for (i, name) in enumerate(names):
+            if name == 'single':
+                result[i] = single
+    return result
+
+
+def trend_adoption(data, trends):
+    """The 'adoption' trend of each column of data, each with its own trend algorithm.
+
+       data: DataFrame indexed by year, with one column per series to fit.
+       trends: list of trend algorithm names, one per column of data.
+
+       Returns a DataFrame indexed by Year 2014-2060 with the same columns as data, the
+       columns fit together by fit_trends.
+    """
+    names = [trend_name(t) for t in trends]
+    unique = sorted(set(names))
+    fits = fit_trends(data, trends=unique)
+    values = np.empty(fits.shape[1:])
+    for (j, name) in enumerate(names):
+        values[:, j] = fits[unique.index(name), :, j]
+    return pd.DataFrame(values, index=pd.Index(np.arange(2014, 2061), name='Year'),
+            columns=data.columns)
 
 
 def matching_data_sources(data_sources, name, groups_only, region_key=None):
@@ -5,21 +5,135 @@ Passing in the same arguments will return the same object, shared by all callers
 This is especially useful for objects with expensive methods which are decorated
 @lru_cache, like TAM.py. Sharing a single object means when any of them have warmed
 the cache, all solutions benefit.
+
+Each class using the metaclass has its own least-recently-used cache, bounded by a
+maximum number of instances and optionally by an estimate of the memory they hold.
+Limits can be set on the class:
+
+    class TAM(DataHandler, object, metaclass=MetaclassCache):
+        cache_maxsize = 64
+        cache_maxbytes = 512 * 1024 * 1024
+
+or at runtime with TAM.cache_configure(maxsize=..., maxbytes=...). TAM.cache_stats()
+returns hit/miss/eviction counters and TAM.cache_clear() empties the cache; the module
+level stats() and clear() do the same for every class.
+
+DataFrame and Series arguments are treated as immutable once passed to a cached
+constructor (the cached instance holds on to them, so modifying them would already
+invalidate its results). Their hashes are computed once per object and reused.
 """
 
-import pandas as pd
+import collections
+import hashlib
 import json
+import threading
+import weakref
+
+import pandas as pd
 
 # pylint is confused by the __call__ syntax
 # pylint: disable=no-value-for-parameter
 
-class MetaclassCache(type):
+DEFAULT_MAXSIZE = 256
+
+_lock = threading.RLock()
+_caches = {}
+_pandas_hashes = {}
+
+
+class _InstanceCache:
+    """LRU of instances for one class, with counters."""
+
+    def __init__(self, maxsize, maxbytes):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.entries = collections.OrderedDict()  # key -> (instance, nbytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self.entries.get(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, instance, nbytes):
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        self.entries[key] = (instance, nbytes)
+        self.nbytes += nbytes
+        self.shrink()
+
+    def shrink(self):
+        while self.entries and (
+                (self.maxsize is not None and len(self.entries) > self.maxsize) or
+                (self.maxbytes is not None and self.nbytes > self.maxbytes and
+                    len(self.entries) > 1)):
+            (_, (_, nbytes)) = self.entries.popitem(last=False)
+            self.nbytes -= nbytes
+            self.evictions += 1
 
-    cache = {}
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.entries), 'maxsize': self.maxsize,
+                'nbytes': self.nbytes, 'maxbytes': self.maxbytes}
+
+
+def _pandas_hash(item):
+    """Hash of a DataFrame or Series, computed once per object."""
+    ident = id(item)
+    entry = _pandas_hashes.get(ident, None)
+    if entry is not None and entry[0]() is item:
+        return entry[1]
+    hashes = pd.util.hash_pandas_object(item, index=True).values
+    digest = hashlib.blake2b(hashes.tobytes(), digest_size=8)
+    digest.update(repr(list(item.columns) if isinstance(item, pd.DataFrame)
+                       else item.name).encode('utf-8'))
+    value = hash(digest.digest())
+    try:
+        ref = weakref.ref(item)
+        weakref.finalize(item, _pandas_hashes.pop, ident, None)
+    except TypeError:
+        return value
+    _pandas_hashes[ident] = (ref, value)
+    return value
+
+
+def _instance_nbytes(instance):
+    """Rough estimate of the memory held by pandas objects referenced by instance."""
+    total = 0
+    for value in vars(instance).values():
+        values = value.values() if isinstance(value, dict) else [value]
+        for v in values:
+            # DataFrame.memory_usage() is slow enough to show up when constructing small
+            # objects, assume 8 bytes per value and index label instead.
+            if isinstance(v, (pd.DataFrame, pd.Series)):
+                total += 8 * (v.size + len(v.index))
+    return total
+
+
+def stats():
+    """Returns a dict of class name to cache statistics for every cached class."""
+    with _lock:
+        return {cls.__qualname__: cache.stats() for (cls, cache) in _caches.items()}
+
+
+def clear():
+    """Empty the instance caches of every class, resetting counters."""
+    with _lock:
+        _caches.clear()
+
+
+class MetaclassCache(type):
 
     def hash_item(self, item):
         if isinstance(item, pd.DataFrame) or isinstance(item, pd.Series):
-            item = tuple(pd.util.hash_pandas_object(item))
+            return _pandas_hash(item)
         try:
             return hash(item)
         except TypeError:
@@ -40,17 +154,43 @@ class MetaclassCache(type):
         except TypeError as e:
             raise e
 
+    def _instance_cache(self):
+        cache = _caches.get(self, None)
+        if cache is None:
+            cache = _InstanceCache(maxsize=getattr(self, 'cache_maxsize', DEFAULT_MAXSIZE),
+                    maxbytes=getattr(self, 'cache_maxbytes', None))
+            _caches[self] = cache
+        return cache
+
+    def cache_configure(self, maxsize=DEFAULT_MAXSIZE, maxbytes=None):
+        """Set the maximum number of instances and/or bytes cached for this class.
+           None means unbounded."""
+        with _lock:
+            cache = self._instance_cache()
+            cache.maxsize = maxsize
+            cache.maxbytes = maxbytes
+            cache.shrink()
+
+    def cache_stats(self):
+        """Returns a dict of hits, misses, evictions, size and limits for this class."""
+        with _lock:
+            return self._instance_cache().stats()
+
+    def cache_clear(self):
+        """Empty the instance cache for this class, resetting counters."""
+        with _lock:
+            _caches.pop(self, None)
 
     def __call__(self, *args, **kwargs):
-        key = self.hash_item(self)
-        for arg in args:
-            key = (key << 64) ^ self.hash_item(arg)
-        for arg in sorted(kwargs.keys()):
-            key = (key << 64) ^ self.hash_item(arg)
-            key = (key << 64) ^ self.hash_item(kwargs[arg])
-        try:
-            return self.cache[key]
-        except KeyError:
-            instance = type.__call__(self, *args, **kwargs)
-            self.cache[key] = instance
+        key = (self.hash_item(self),
+               tuple(self.hash_item(arg) for arg in args),
+               tuple((arg, self.hash_item(kwargs[arg])) for arg in sorted(kwargs.keys())))
+        with _lock:
+            instance = self._instance_cache().get(key)
+        if instance is not None:
             return instance
+        instance = type.__call__(self, *args, **kwargs)
+        nbytes = _instance_nbytes(instance)
+        with _lock:
+            self._instance_cache().put(key, instance, nbytes)
+        return instance
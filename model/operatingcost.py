@@ -2,12 +2,10 @@
 
 from functools import lru_cache
 import math
-from io import StringIO
 
 import model.dd as dd
 from model.advanced_controls import SOLUTION_CATEGORY
 import numpy as np
-import numpy_financial
 import pandas as pd
 #from numba import jit
 import model
@@ -15,66 +13,103 @@ import model
 from model.data_handler import DataHandler
 from model.decorators import data_func
 
-@lru_cache
+class HashableSeries:
+    """Wraps a Series so that it can be passed to an lru_cache'd function.
+       Two wrappers are equal if their index and float64 values are identical.
+    """
+    def __init__(self, series):
+        self.series = series
+        self._key = (tuple(series.index), series.to_numpy(dtype=np.float64).tobytes())
+        self._hash = hash(self._key)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return isinstance(other, HashableSeries) and self._key == other._key
+
+
+def replacement_lifetimes(lifetime_replacement, remaining_years):
+    """Lifetime covered by equipment purchased in each year, counting replacements.
+
+       Equipment is replaced as it wears out, so the lifetime is the smallest multiple
+       of lifetime_replacement whose ceiling covers the remaining_years to the end of
+       the analysis period. Multiples are accumulated by repeated addition (np.cumsum)
+       so that they round identically to the iterative Excel-derived calculation.
+    """
+    remaining_years = np.asarray(remaining_years)
+    count = int(math.ceil(remaining_years.max() / lifetime_replacement)) + 1
+    multiples = np.cumsum(np.full(count, float(lifetime_replacement)))
+    return multiples[np.searchsorted(np.ceil(multiples), remaining_years, side='left')]
+
+
 def annual_breakout(
-    new_funits_per_year, 
+    new_funits_per_year,
     new_annual_iunits_reqd,
-    lifetime_replacement, 
-    var_oper_cost_per_funit, 
+    lifetime_replacement,
+    var_oper_cost_per_funit,
     fuel_cost_per_funit,
     fixed_oper_cost_per_iunit,
     report_end_year,
     has_var_costs,
     conversion_factor_vom,
     conversion_factor_fom):
-
-    # index_col = year
-    # squeeze -> pd.Dataframe to pd.Series
-    # round_trip retains float precision
-    new_funits_per_year = pd.read_csv(StringIO(new_funits_per_year), index_col=0, squeeze=True, float_precision='round_trip')
-    new_annual_iunits_reqd = pd.read_csv(StringIO(new_annual_iunits_reqd), index_col=0,  squeeze=True, float_precision='round_trip')
-
     """Breakout of operating cost per year, including replacements.
         Supplies calculations for:
         SolarPVUtil 'Operating Cost'!B262:AV386 for soln_pds
         SolarPVUtil 'Operating Cost'!B399:AV523 for conv_ref
+
+        new_funits_per_year and new_annual_iunits_reqd are Series indexed by year.
+        Results are cached on the values of the arguments, the returned DataFrame is
+        shared between callers and must not be modified.
     """
+    return _annual_breakout(HashableSeries(new_funits_per_year),
+            HashableSeries(new_annual_iunits_reqd), lifetime_replacement,
+            var_oper_cost_per_funit, fuel_cost_per_funit, fixed_oper_cost_per_iunit,
+            report_end_year, has_var_costs, conversion_factor_vom, conversion_factor_fom)
+
+
+@lru_cache()
+def _annual_breakout(new_funits_per_year, new_annual_iunits_reqd, lifetime_replacement,
+        var_oper_cost_per_funit, fuel_cost_per_funit, fixed_oper_cost_per_iunit,
+        report_end_year, has_var_costs, conversion_factor_vom, conversion_factor_fom):
     first_year = dd.CORE_START_YEAR
     last_year = report_end_year
-    last_column = dd.CORE_END_YEAR
+    last_column = max(dd.CORE_END_YEAR, last_year)
     last_row = 2139
-    breakout = pd.DataFrame(0, index=np.arange(first_year, last_row + 1),
-                            columns=np.arange(first_year, last_column + 1), dtype='float')
-    breakout.index.name = 'Year'
-    breakout.index = breakout.index.astype(int)
+    rows = np.arange(first_year, last_row + 1)
+    columns = np.arange(first_year, last_column + 1)
+    values = np.zeros((len(rows), len(columns)), dtype=np.float64)
 
     # if there are no operating costs we return a table of 0s
-    if not has_var_costs and not fixed_oper_cost_per_iunit:
-        return breakout
-
-    for year in range(first_year, last_year + 1):
-        # within the years of interest, assume replacement of worn out equipment.
-        lifetime = lifetime_replacement
+    if has_var_costs or fixed_oper_cost_per_iunit:
         assert lifetime_replacement != 0, 'Cannot have a lifetime replacement of 0 and non-zero operating costs'
-        while math.ceil(lifetime) < (last_year + 1 - year):
-            lifetime += lifetime_replacement
+        years = np.arange(first_year, last_year + 1)
 
         cost = var_oper_cost_per_funit + fuel_cost_per_funit if has_var_costs else 0
-        total = new_funits_per_year.loc[year] * cost * conversion_factor_vom
-        cost = fixed_oper_cost_per_iunit
-        total += new_annual_iunits_reqd.loc[year] * cost * conversion_factor_fom
-
-        # for each year, add in operating costs for equipment purchased in that
-        # starting year through the year where it wears out.
-        for row in range(year, last_row + 1):
-            remaining_lifetime = np.clip(lifetime, 0, 1)
-            val = total * remaining_lifetime
-            breakout.loc[row, year] = val if math.fabs(val) > 0.01 else 0.0
-            lifetime -= 1
-            if lifetime <= 0:
-                break
+        funits = new_funits_per_year.series.loc[years].to_numpy(dtype=np.float64)
+        total = funits * cost * conversion_factor_vom
+        iunits = new_annual_iunits_reqd.series.loc[years].to_numpy(dtype=np.float64)
+        total += iunits * fixed_oper_cost_per_iunit * conversion_factor_fom
+
+        # within the years of interest, assume replacement of worn out equipment.
+        lifetime = replacement_lifetimes(lifetime_replacement, last_year + 1 - years)
+
+        # Each column holds the operating costs for equipment purchased in that year,
+        # weighted by the fraction of each following year the equipment is still in
+        # service (partial in the final year, zero once worn out).
+        age = rows[:, np.newaxis] - years[np.newaxis, :]
+        weight = np.where(age >= 0, np.clip(lifetime[np.newaxis, :] - age, 0, 1), 0.0)
+        with np.errstate(invalid='ignore'):
+            val = total[np.newaxis, :] * weight
+            values[:, :len(years)] = np.where(np.abs(val) > 0.01, val, 0.0)
+
+    breakout = pd.DataFrame(values, index=rows, columns=columns)
+    breakout.index.name = 'Year'
+    breakout.index = breakout.index.astype(int)
     return breakout
 
+
 class OperatingCost(DataHandler):
     """Implementation for the Operating Cost module.
 
@@ -301,8 +336,8 @@ class OperatingCost(DataHandler):
                          lifetime_replacement, var_oper_cost_per_funit, fuel_cost_per_funit,
                          fixed_oper_cost_per_iunit):
         return annual_breakout(
-            new_funits_per_year.to_csv(),
-            new_annual_iunits_reqd.to_csv(),
+            new_funits_per_year,
+            new_annual_iunits_reqd,
             lifetime_replacement,
             var_oper_cost_per_funit,
             fuel_cost_per_funit,
@@ -364,12 +399,8 @@ class OperatingCost(DataHandler):
         """Marginal First Cost.
            SolarPVUtil 'Operating Cost'!E126:E250
         """
-        npv = []
         net_cash_flow = self.soln_net_cash_flow()
-        for n in range(len(net_cash_flow.index)):
-            l = [0] * (n + 1) + [net_cash_flow.iloc[n]]
-            npv.append(numpy_financial.npv(rate=self.ac.npv_discount_rate, values=l))
-        result = pd.Series(npv, index=net_cash_flow.index)
+        result = pd.Series(self._npv(net_cash_flow.values, offset=1), index=net_cash_flow.index)
         result.name = 'soln_net_present_value'
         return result
 
@@ -386,67 +417,90 @@ class OperatingCost(DataHandler):
                appropriately in each case).
            SolarPVUtil 'Operating Cost'!I126:I250
         """
+        (result, years, lifetime) = self._single_iunit_years()
+        result.name = 'soln_vs_conv_single_iunit_cashflow'
+        conv_usage_mult = self._conv_usage_mult()
+
+        # A new conventional iunit is costed as many times as needed to cover the
+        # lifetime and output of a solution iunit.
+        conv_cost = np.zeros(len(years))
+        conv_lifetime = self.ac.conv_lifetime_replacement
+        if conv_lifetime is not None and conv_lifetime != 0:
+            remainder = np.mod(years - (dd.CORE_START_YEAR - 1), conv_lifetime)
+            purchase = (remainder <= 1) & (remainder > 0)
+            soln_first_cost = lifetime[purchase] / conv_lifetime
+            cost_years = np.minimum(dd.CORE_END_YEAR, years[purchase] +
+                    (self.single_iunit_purchase_year - dd.CORE_START_YEAR))
+            install_cost = self.conv_ref_install_cost_per_iunit.loc[cost_years].values
+            conv_cost[purchase] = (install_cost * conv_usage_mult *
+                    np.minimum(1, soln_first_cost))
+
+        cost = self._single_iunit_cost(conv_cost, lifetime)
+        if conv_lifetime is None or conv_lifetime == 0:
+            cost[:] = np.nan
+        else:
+            cost[np.abs(cost) < 0.01] = 0.0
+        result.iloc[:len(cost)] = cost
+        return result
+
+
+    def _conv_usage_mult(self):
+        if self.ac.soln_avg_annual_use is not None and self.ac.conv_avg_annual_use is not None:
+            return self.ac.soln_avg_annual_use / self.ac.conv_avg_annual_use  # RRS
+        return 1  # LAND
+
+
+    def _single_iunit_years(self):
+        """Zeroed cashflow Series over 2015-2139 for a single iunit, the years in which the
+           iunit is in service and its remaining lifetime at the start of each of those years.
+        """
         first_year = dd.CORE_START_YEAR
         last_year = max(dd.CORE_END_YEAR,
                 dd.CORE_START_YEAR + self.ac.soln_lifetime_replacement_rounded)
         last_row = 2139
-        result = pd.Series(0, index=np.arange(first_year, last_row+ 1), dtype='float')
+        result = pd.Series(0, index=np.arange(first_year, last_row + 1), dtype='float')
         result.index.name = 'Year'
         result.index = result.index.astype(int)
-        result.name = 'soln_vs_conv_single_iunit_cashflow'
 
         soln_lifetime = self.ac.soln_lifetime_replacement
-        if self.ac.soln_avg_annual_use is not None and self.ac.conv_avg_annual_use is not None:
-            conv_usage_mult = self.ac.soln_avg_annual_use / self.ac.conv_avg_annual_use  # RRS
-        else:
-            conv_usage_mult = 1  # LAND
-
-        for year in range(first_year, last_year + 1):
-            cost = 0
-            if soln_lifetime <= 0:
-                break
-            if self.ac.conv_lifetime_replacement is None or self.ac.conv_lifetime_replacement == 0:
-                remainder = 0
-            else:
-                remainder = (year - (first_year - 1)) % self.ac.conv_lifetime_replacement
-            if remainder <= 1 and remainder > 0:
-                # A new conventional iunit is costed as many times as needed to cover the
-                # lifetime and output of a solution iunit.
-                soln_first_cost = (self.ac.soln_lifetime_replacement - (year - first_year) + 0)
-                soln_first_cost /= self.ac.conv_lifetime_replacement
-                cost_year = min(dd.CORE_END_YEAR,
-                                year + (self.single_iunit_purchase_year - dd.CORE_START_YEAR))
-                cost += (self.conv_ref_install_cost_per_iunit[cost_year] * conv_usage_mult *
-                         min(1, soln_first_cost))
-
-            if year == first_year:
-                # account for the cost of the solution iunit in the first year.
-                cost -= self.soln_pds_install_cost_per_iunit.loc[self.single_iunit_purchase_year]
-
-            # Difference in fixed operating cost of conventional versus that of solution
-            cost += (self.ac.conv_fixed_oper_cost_per_iunit * conv_usage_mult -
-                     self.ac.soln_fixed_oper_cost_per_iunit) * self.conversion_factor_fom
-
-            # Difference in variable operating cost of conventional versus that of solution
-            if self.ac.has_var_costs:
-                conv_var_cost = self.ac.conv_var_oper_cost_per_funit + self.ac.conv_fuel_cost_per_funit
-                soln_var_cost = self.ac.soln_var_oper_cost_per_funit + self.ac.soln_fuel_cost_per_funit
-                cost += (self.ac.soln_avg_annual_use * conv_var_cost - self.ac.soln_avg_annual_use *
-                        soln_var_cost) * self.conversion_factor_vom
-
-            # account for a partial year at the end of the lifetime.
-            cost *= min(1, soln_lifetime)
-            if self.ac.conv_lifetime_replacement is None or self.ac.conv_lifetime_replacement == 0:
-                result[year] = np.nan
-            elif math.fabs(cost) < 0.01:
-                result[year] = 0.0
-            else:
-                result[year] = cost
-
-            soln_lifetime -= 1
+        years = np.arange(first_year, last_year + 1)
+        years = years[:max(0, int(math.ceil(soln_lifetime)))]
+        lifetime = soln_lifetime - (years - first_year)
+        return (result, years, lifetime)
 
-        return result
 
+    def _single_iunit_cost(self, conv_cost, lifetime):
+        """Cashflow of a single iunit in each year of its lifetime, before rounding.
+           conv_cost: cost of conventional iunits avoided in each year, or zeros.
+        """
+        cost = conv_cost.copy()
+        # account for the cost of the solution iunit in the first year.
+        if len(cost):
+            cost[0] -= self.soln_pds_install_cost_per_iunit.loc[self.single_iunit_purchase_year]
+
+        # Difference in fixed operating cost of conventional versus that of solution
+        cost += (self.ac.conv_fixed_oper_cost_per_iunit * self._conv_usage_mult() -
+                 self.ac.soln_fixed_oper_cost_per_iunit) * self.conversion_factor_fom
+
+        # Difference in variable operating cost of conventional versus that of solution
+        if self.ac.has_var_costs:
+            conv_var_cost = self.ac.conv_var_oper_cost_per_funit + self.ac.conv_fuel_cost_per_funit
+            soln_var_cost = self.ac.soln_var_oper_cost_per_funit + self.ac.soln_fuel_cost_per_funit
+            cost += (self.ac.soln_avg_annual_use * conv_var_cost - self.ac.soln_avg_annual_use *
+                    soln_var_cost) * self.conversion_factor_vom
+
+        # account for a partial year at the end of the lifetime.
+        return cost * np.minimum(1, lifetime)
+
+
+    def _npv(self, cashflow, offset):
+        """Net Present Value of the cashflow in each year on its own, that cashflow being
+           offset + n years in the future for the n'th year. Equal to numpy_financial.npv of
+           [0] * (n + offset) + [cashflow[n]], which is how Excel computes it, using one vector
+           of discount factors instead of building and summing a list for each year.
+        """
+        discount = (1 + self.ac.npv_discount_rate) ** np.arange(offset, offset + len(cashflow))
+        return np.asarray(cashflow, dtype=np.float64) / discount
 
 
     @lru_cache()
@@ -455,13 +509,9 @@ class OperatingCost(DataHandler):
         """Net Present Value of single iunit cashflow.
            SolarPVUtil 'Operating Cost'!J126:J250
         """
-        npv = []
         svcsic = self.soln_vs_conv_single_iunit_cashflow()
         offset = self.single_iunit_purchase_year - svcsic.first_valid_index() + 1
-        for n in range(len(svcsic.index)):
-            l = [0] * (n + offset) + [svcsic.iloc[n]]
-            npv.append(numpy_financial.npv(rate=self.ac.npv_discount_rate, values=l))
-        result = pd.Series(npv, index=svcsic.index.copy())
+        result = pd.Series(self._npv(svcsic.values, offset=offset), index=svcsic.index.copy())
         result.name = 'soln_vs_conv_single_iunit_npv'
         return result
 
@@ -473,7 +523,7 @@ class OperatingCost(DataHandler):
         """Whether the solution has paid off versus the conventional, for each year.
            SolarPVUtil 'Operating Cost'!K126:K250
         """
-        result = self.soln_vs_conv_single_iunit_cashflow().cumsum().apply(lambda x: 1 if x >= 0 else 0)
+        result = self.soln_vs_conv_single_iunit_cashflow().cumsum().ge(0).astype('int64')
         result.name = 'soln_vs_conv_single_iunit_payback'
         return result
 
@@ -485,7 +535,7 @@ class OperatingCost(DataHandler):
         """Whether the solution NPV has paid off versus the conventional, for each year.
            SolarPVUtil 'Operating Cost'!L126:L250
         """
-        result = self.soln_vs_conv_single_iunit_npv().cumsum().apply(lambda x: 1 if x >= 0 else 0)
+        result = self.soln_vs_conv_single_iunit_npv().cumsum().ge(0).astype('int64')
         result.name = 'soln_vs_conv_single_iunit_payback_discounted'
         return result
 
@@ -497,46 +547,10 @@ class OperatingCost(DataHandler):
         """
            SolarPVUtil 'Operating Cost'!M126:M250
         """
-        first_year = dd.CORE_START_YEAR
-        last_year = max(dd.CORE_END_YEAR,
-                dd.CORE_START_YEAR + self.ac.soln_lifetime_replacement_rounded)
-        last_row = 2139
-        result = pd.Series(0, index=np.arange(first_year, last_row + 1), dtype='float')
-        result.index.name = 'Year'
-        result.index = result.index.astype(int)
+        (result, years, lifetime) = self._single_iunit_years()
         result.name = 'soln_only_single_iunit_cashflow'
-
-        soln_lifetime = self.ac.soln_lifetime_replacement
-        if self.ac.soln_avg_annual_use is not None and self.ac.conv_avg_annual_use is not None:
-            conv_usage_mult = self.ac.soln_avg_annual_use / self.ac.conv_avg_annual_use  # RRS
-        else:
-            conv_usage_mult = 1  # LAND
-
-        for year in range(first_year, last_year + 1):
-            cost = 0
-            if soln_lifetime <= 0:
-                break
-
-            if year == first_year:
-                # account for the cost of the solution iunit in the first year.
-                cost -= self.soln_pds_install_cost_per_iunit.loc[self.single_iunit_purchase_year]
-
-            # Difference in fixed operating cost of conventional versus that of solution
-            cost += (self.ac.conv_fixed_oper_cost_per_iunit * conv_usage_mult -
-                     self.ac.soln_fixed_oper_cost_per_iunit) * self.conversion_factor_fom
-
-            # Difference in variable operating cost of conventional versus that of solution
-            if self.ac.has_var_costs:
-                conv_var_cost = self.ac.conv_var_oper_cost_per_funit + self.ac.conv_fuel_cost_per_funit
-                soln_var_cost = self.ac.soln_var_oper_cost_per_funit + self.ac.soln_fuel_cost_per_funit
-                cost += (self.ac.soln_avg_annual_use * conv_var_cost -
-                         self.ac.soln_avg_annual_use * soln_var_cost) * self.conversion_factor_vom
-
-            # account for a partial year at the end of the lifetime.
-            cost *= min(1, soln_lifetime)
-            result[year] = cost if math.fabs(cost) > 0.01 else 0.0
-
-            soln_lifetime -= 1
+        cost = self._single_iunit_cost(np.zeros(len(years)), lifetime)
+        result.iloc[:len(cost)] = np.where(np.abs(cost) > 0.01, cost, 0.0)
         return result
 
 
@@ -547,13 +561,9 @@ class OperatingCost(DataHandler):
         """Net Present Value of single iunit cashflow, looking only at costs of the Solution.
            SolarPVUtil 'Operating Cost'!N126:N250
         """
-        npv = []
         sosic = self.soln_only_single_iunit_cashflow()
         offset = self.single_iunit_purchase_year - sosic.first_valid_index() + 1
-        for n in range(len(sosic.index)):
-            l = [0] * (n + offset) + [sosic.iloc[n]]
-            npv.append(numpy_financial.npv(rate=self.ac.npv_discount_rate, values=l))
-        result = pd.Series(npv, index=sosic.index.copy())
+        result = pd.Series(self._npv(sosic.values, offset=offset), index=sosic.index.copy())
         result.name = 'soln_only_single_iunit_npv'
         return result
 
@@ -565,7 +575,7 @@ class OperatingCost(DataHandler):
         """Whether the solution has paid off, for each year.
            SolarPVUtil 'Operating Cost'!O126:O250
         """
-        result = self.soln_only_single_iunit_cashflow().cumsum().apply(lambda x: 1 if x >= 0 else 0)
+        result = self.soln_only_single_iunit_cashflow().cumsum().ge(0).astype('int64')
         result.name = 'soln_only_single_iunit_payback'
         return result
 
@@ -577,6 +587,6 @@ class OperatingCost(DataHandler):
         """Whether the solution NPV has paid off, for each year.
            SolarPVUtil 'Operating Cost'!P126:P250
         """
-        result = self.soln_only_single_iunit_npv().cumsum().apply(lambda x: 1 if x >= 0 else 0)
+        result = self.soln_only_single_iunit_npv().cumsum().ge(0).astype('int64')
         result.name = 'soln_only_single_iunit_payback_discounted'
         return result
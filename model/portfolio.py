@@ -0,0 +1,212 @@
+"""
+Portfolio of solutions.
+
+Computes per-solution, per-sector and whole-portfolio totals of selected results, like
+emissions reduced, adoption and costs, across many solution scenarios at once.
+
+Each output is held as a single stacked array of shape (solution x year x region), so
+sector and portfolio totals are one reduction over the first axis rather than summing a
+DataFrame one column at a time. Results of each solution are extracted once and reused;
+Portfolio.update() only recomputes a solution whose scenario or Advanced Controls differ
+from those its results were extracted from, and totals are only recomputed for outputs
+whose stack changed.
+
+Extraction is a plain module-level function, so it can also run in worker processes:
+
+    for r in solution.batch.run_batch(jobs, result_func=model.portfolio.extract):
+        portfolio.set_results(r.solution, r.result)
+"""
+
+import pathlib
+
+import numpy as np
+import pandas as pd
+from model import dd
+
+OVERVIEW_PATH = pathlib.Path(__file__).parents[1].joinpath('data', 'overview', 'solutions.csv')
+
+# output name: (Scenario attribute, attribute or method of that object)
+OUTPUTS = {
+    'co2eq_mmt_reduced': ('c2', 'co2eq_mmt_reduced'),
+    'soln_pds_funits_adopted': ('ua', 'soln_pds_funits_adopted'),
+    'soln_net_annual_funits_adopted': ('ua', 'soln_net_annual_funits_adopted'),
+    'soln_pds_annual_world_first_cost': ('fc', 'soln_pds_annual_world_first_cost'),
+    'soln_pds_annual_operating_cost': ('oc', 'soln_pds_annual_operating_cost'),
+    'marginal_annual_operating_cost': ('oc', 'marginal_annual_operating_cost'),
+}
+
+YEARS = list(range(2014, 2061))
+
+
+def solution_sectors(filename=OVERVIEW_PATH):
+    """Returns a dict of solution name (its directory, like 'solarpvutil') to Drawdown sector."""
+    overview = pd.read_csv(filename, index_col=False, skipinitialspace=True, header=0,
+            skip_blank_lines=True, comment='#')
+    overview = overview.dropna(subset=['DirName'])
+    return dict(zip(overview['DirName'], overview['Sector']))
+
+
+def extract(obj, outputs=None):
+    """Returns a dict of output name to result for one Scenario, for use with Portfolio.
+
+       outputs: list of names from OUTPUTS, default all of them. Outputs which the
+         scenario does not have (for example no operating cost module) are left out.
+    """
+    results = {}
+    for name in (outputs if outputs is not None else OUTPUTS.keys()):
+        (module, attr) = OUTPUTS[name]
+        value = getattr(getattr(obj, module, None), attr, None)
+        if callable(value):
+            value = value()
+        if value is not None:
+            results[name] = value
+    return results
+
+
+def _to_array(data, years, regions):
+    """(year x region) float array of a result, Series are World-only. NaN where missing."""
+    if isinstance(data, pd.Series):
+        data = data.to_frame(name='World')
+    data = data.reindex(index=years, columns=regions)
+    return np.array(data.values, dtype=np.float64, order='C')
+
+
+class Portfolio:
+    """Stacked results of one scenario for each of many solutions.
+
+       outputs: names from OUTPUTS to track, default all of them.
+       years: years to hold results for, default 2014-2060.
+       regions: regions to hold results for, default dd.REGIONS.
+       sectors: dict of solution name to sector, default from data/overview/solutions.csv.
+         Solutions not listed are in sector 'Other'.
+    """
+
+    def __init__(self, outputs=None, years=None, regions=None, sectors=None):
+        self.outputs = list(outputs if outputs is not None else OUTPUTS.keys())
+        self.years = list(years if years is not None else YEARS)
+        self.regions = list(regions if regions is not None else dd.REGIONS)
+        self.sectors = sectors if sectors is not None else solution_sectors()
+        self._keys = {}       # solution -> inputs its results were extracted from
+        self._results = {}    # solution -> {output: (year x region) array}
+        self._rows = {}       # solution -> row in the stacks
+        self._stacks = {}     # output -> (solution x year x region) array
+        self._totals = {}     # (output, kind) -> cached DataFrame
+        self.recomputed = 0
+
+    @property
+    def solutions(self):
+        """Names of the solutions in the portfolio, in stack order."""
+        return sorted(self._results.keys())
+
+    @staticmethod
+    def _inputs_key(obj):
+        ac = getattr(obj, 'ac', None)
+        if ac is None:
+            return None
+        return (type(obj), getattr(obj, 'scenario', None), ac)
+
+    def update(self, name, obj):
+        """Set the scenario for solution name, extracting its results only if its inputs
+           changed since the last update. Returns True if results were extracted."""
+        key = self._inputs_key(obj)
+        if key is not None and name in self._keys and self._keys[name] == key:
+            return False
+        self.set_results(name, extract(obj, outputs=self.outputs), key=key)
+        self.recomputed += 1
+        return True
+
+    def set_results(self, name, results, key=None):
+        """Set the results of solution name, a dict as returned by extract()."""
+        arrays = {}
+        for output in self.outputs:
+            data = results.get(output, None)
+            if data is None:
+                arrays[output] = np.full((len(self.years), len(self.regions)), np.nan)
+            else:
+                arrays[output] = _to_array(data, self.years, self.regions)
+        if name in self._results:
+            # Same set of solutions, overwrite its row of each stack already built and
+            # drop only the totals of outputs whose values changed.
+            for (output, stack) in self._stacks.items():
+                stack.flags.writeable = True
+                stack[self._rows[name]] = arrays[output]
+                stack.flags.writeable = False
+            for output in self.outputs:
+                if not np.array_equal(arrays[output], self._results[name][output], equal_nan=True):
+                    self._invalidate(output)
+        else:
+            self._stacks.clear()
+            self._rows.clear()
+            self._totals.clear()
+        self._results[name] = arrays
+        self._keys[name] = key
+
+    def remove(self, name):
+        """Remove solution name from the portfolio."""
+        if self._results.pop(name, None) is not None:
+            self._keys.pop(name, None)
+            self._stacks.clear()
+            self._rows.clear()
+            self._totals.clear()
+
+    def _invalidate(self, output):
+        for k in [k for k in self._totals.keys() if k[0] == output]:
+            del self._totals[k]
+
+    def stack(self, output):
+        """Read-only (solution x year x region) array of output, solutions in the order of
+           self.solutions. NaN where a solution has no value."""
+        stack = self._stacks.get(output, None)
+        if stack is None:
+            solutions = self.solutions
+            self._rows = {name: row for (row, name) in enumerate(solutions)}
+            if solutions:
+                stack = np.stack([self._results[name][output] for name in solutions])
+            else:
+                stack = np.zeros((0, len(self.years), len(self.regions)))
+            stack.flags.writeable = False
+            self._stacks[output] = stack
+        return stack
+
+    def _sector_membership(self):
+        """(sector names, sector x solution 0/1 matrix)."""
+        solutions = self.solutions
+        of = [self.sectors.get(name, 'Other') for name in solutions]
+        names = sorted(set(of))
+        membership = np.zeros((len(names), len(solutions)))
+        membership[[names.index(s) for s in of], np.arange(len(solutions))] = 1.0
+        return (names, membership)
+
+    def solution_results(self, output, region='World'):
+        """DataFrame of output for region, indexed by year with one column per solution.
+           Results are cached and shared between callers, and must not be modified."""
+        result = self._totals.get((output, 'solution', region), None)
+        if result is None:
+            values = self.stack(output)[:, :, self.regions.index(region)]
+            result = pd.DataFrame(values.T, index=pd.Index(self.years, name='Year'),
+                    columns=self.solutions)
+            self._totals[(output, 'solution', region)] = result
+        return result
+
+    def sector_totals(self, output, region='World'):
+        """DataFrame of output summed over each sector for region, indexed by year with one
+           column per sector. Missing values are treated as zero."""
+        result = self._totals.get((output, 'sector', region), None)
+        if result is None:
+            values = np.nan_to_num(self.stack(output)[:, :, self.regions.index(region)])
+            (names, membership) = self._sector_membership()
+            result = pd.DataFrame((membership @ values).T,
+                    index=pd.Index(self.years, name='Year'), columns=names)
+            self._totals[(output, 'sector', region)] = result
+        return result
+
+    def total(self, output):
+        """DataFrame of output summed over every solution, indexed by year with one column
+           per region. Missing values are treated as zero."""
+        result = self._totals.get((output, 'total', None), None)
+        if result is None:
+            values = np.nansum(self.stack(output), axis=0)
+            result = pd.DataFrame(values, index=pd.Index(self.years, name='Year'),
+                    columns=self.regions)
+            self._totals[(output, 'total', None)] = result
+        return result
@@ -0,0 +1,240 @@
+"""Opt-in timing of the model classes.
+
+Records, for each lru_cache'd or @data_func method of the model classes and for each
+class constructed through MetaclassCache, the number of calls, how many of those were
+answered from a cache, cumulative and self time, and the size of the DataFrame or Series
+returned. Nothing is instrumented until profiling is enabled, so there is no cost in
+normal use:
+
+    with profiling.profile() as p:
+        obj = solution.solarpvutil.Scenario()
+    print(p.stats().sort_values('Self', ascending=False).head(20))
+    with open('solarpvutil.folded', 'w') as f:
+        p.write_folded(f)
+
+write_folded() produces the "folded stacks" format read by flamegraph.pl, speedscope and
+similar tools: one line per call stack, with the self time spent in it in microseconds.
+
+Enabling replaces those methods on their classes with timing wrappers, and disabling puts
+the originals back. Only one profile can be active at a time, and calls from other
+threads are not expected while it is.
+
+It can be run as a script ala `python -m model.profiling solarpvutil --folded out.folded`
+to profile constructing a Scenario and computing all of its data functions.
+"""
+
+import argparse
+import collections
+import contextlib
+import functools
+import importlib
+import inspect
+import sys
+import time
+
+import pandas as pd
+
+from model import metaclass_cache
+
+# Modules holding the model classes to instrument.
+MODULES = tuple('model.' + name for name in ('adoptiondata', 'aez', 'ch4calcs', 'co2calcs',
+    'customadoption', 'dez', 'emissionsfactors', 'firstcost', 'helpertables',
+    'operatingcost', 's_curve', 'tam', 'tla', 'toa', 'unitadoption', 'vma'))
+
+_active = None
+
+
+class _Entry:
+    """Counters for one instrumented method or class."""
+
+    __slots__ = ('calls', 'hits', 'cumulative', 'self_time', 'rows', 'columns', 'nbytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.cumulative = 0.0
+        self.self_time = 0.0
+        self.rows = None
+        self.columns = None
+        self.nbytes = None
+
+
+class Profile:
+    """Timings gathered while profiling was enabled."""
+
+    def __init__(self):
+        self.entries = collections.defaultdict(_Entry)
+        self.folded = collections.defaultdict(float)  # call stack -> self seconds
+        self._stack = []  # [name, start, seconds in children]
+        self._depth = collections.Counter()
+        self._patched = []
+
+    def _call(self, name, func, args, kwargs, hit):
+        """Call func(*args, **kwargs) as name. hit() reports whether the call was
+           answered from a cache, it is called before and after func."""
+        before = hit()
+        self._stack.append([name, time.perf_counter(), 0.0])
+        self._depth[name] += 1
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            (_, start, children) = self._stack.pop()
+            elapsed = time.perf_counter() - start
+            self._depth[name] -= 1
+            entry = self.entries[name]
+            entry.calls += 1
+            entry.self_time += elapsed - children
+            if not self._depth[name]:
+                entry.cumulative += elapsed  # outermost call only, for recursion.
+            if self._stack:
+                self._stack[-1][2] += elapsed
+            path = ';'.join([s[0] for s in self._stack] + [name])
+            self.folded[path] += elapsed - children
+        if hit() != before:
+            entry.hits += 1
+        elif isinstance(result, (pd.DataFrame, pd.Series)):
+            entry.rows = len(result.index)
+            entry.columns = len(result.columns) if isinstance(result, pd.DataFrame) else 1
+            entry.nbytes = 8 * (result.size + len(result.index))
+        return result
+
+    def _wrap_method(self, name, method):
+        profile = self
+        info = getattr(method, 'cache_info', None)
+        hit = (lambda: info().hits) if info is not None else (lambda: 0)
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            return profile._call(name, method, args, kwargs, hit)
+
+        if info is not None:
+            wrapper.cache_info = method.cache_info
+            wrapper.cache_clear = method.cache_clear
+        return wrapper
+
+    def _wrap_constructor(self, call):
+        profile = self
+
+        @functools.wraps(call)
+        def wrapper(cls, *args, **kwargs):
+            hit = lambda: cls.cache_stats()['hits']
+            return profile._call(cls.__qualname__ + '()', call, (cls,) + args, kwargs, hit)
+
+        return wrapper
+
+    def _enable(self):
+        for module_name in MODULES:
+            module = importlib.import_module(module_name)
+            for (_, cls) in inspect.getmembers(module, inspect.isclass):
+                if cls.__module__ != module.__name__:
+                    continue
+                for (attr, value) in list(vars(cls).items()):
+                    if hasattr(value, 'cache_info') or getattr(value, 'data_func', False):
+                        self._patch(cls, attr, self._wrap_method(
+                            f'{cls.__qualname__}.{attr}', value))
+        call = metaclass_cache.MetaclassCache.__call__
+        self._patch(metaclass_cache.MetaclassCache, '__call__', self._wrap_constructor(call))
+
+    def _patch(self, obj, attr, value):
+        self._patched.append((obj, attr, vars(obj)[attr]))
+        setattr(obj, attr, value)
+
+    def _disable(self):
+        for (obj, attr, value) in reversed(self._patched):
+            setattr(obj, attr, value)
+        self._patched.clear()
+
+    def stats(self):
+        """DataFrame of counters, one row per instrumented method or class constructor.
+
+           Calls: number of calls.
+           Hits: calls answered from the lru_cache or MetaclassCache.
+           Hit Rate: Hits / Calls.
+           Cumulative: seconds spent in the method, including what it called.
+           Self: seconds spent in the method but not in other instrumented methods.
+           Rows, Columns, Bytes: size of the last DataFrame or Series computed, if any.
+        """
+        rows = []
+        for (name, e) in self.entries.items():
+            rows.append((name, e.calls, e.hits, e.hits / e.calls if e.calls else 0.0,
+                e.cumulative, e.self_time, e.rows, e.columns, e.nbytes))
+        df = pd.DataFrame(rows, columns=['Name', 'Calls', 'Hits', 'Hit Rate', 'Cumulative',
+            'Self', 'Rows', 'Columns', 'Bytes']).set_index('Name')
+        return df.sort_values('Cumulative', ascending=False)
+
+    def write_folded(self, stream, root=None):
+        """Write call stacks in folded format, with self time in integer microseconds.
+           root: optional name prepended to every stack, like the solution name."""
+        for (path, seconds) in sorted(self.folded.items()):
+            micros = int(round(seconds * 1e6))
+            if micros > 0:
+                stack = f'{root};{path}' if root else path
+                stream.write(f'{stack} {micros}\n')
+
+
+def enable():
+    """Start profiling, returning the Profile which will collect timings."""
+    global _active
+    if _active is not None:
+        raise RuntimeError('profiling is already enabled')
+    _active = Profile()
+    _active._enable()
+    return _active
+
+
+def disable():
+    """Stop profiling, returning the Profile with the timings collected."""
+    global _active
+    p = _active
+    if p is not None:
+        p._disable()
+    _active = None
+    return p
+
+
+@contextlib.contextmanager
+def profile():
+    """Context manager enabling profiling for the duration of a with block."""
+    p = enable()
+    try:
+        yield p
+    finally:
+        disable()
+
+
+def profile_scenario(solution, scenario=None):
+    """Profile constructing one solution scenario and computing all of its data functions.
+       Returns the Profile."""
+    from model.data_handler import DataHandler
+    from solution import factory
+
+    with profile() as p:
+        obj = factory.load_scenario(solution, scenario=scenario)
+        for value in vars(obj).values():
+            if isinstance(value, DataHandler):
+                for name in value.data_functions():
+                    try:
+                        getattr(value, name)()
+                    except Exception:
+                        pass  # the timing is still of interest.
+    return p
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+            description='Time the model classes while computing a solution scenario.')
+    parser.add_argument('solution', help='Solution name, like solarpvutil')
+    parser.add_argument('--scenario', default=None, required=False,
+            help='Scenario name, default the solution\'s default scenario.')
+    parser.add_argument('--folded', default=None, required=False,
+            help='File to write folded call stacks to, for flame graphs.')
+    parser.add_argument('--top', default=25, type=int, required=False,
+            help='Number of rows of the table to print.')
+    args = parser.parse_args(sys.argv[1:])
+
+    p = profile_scenario(args.solution, scenario=args.scenario)
+    with pd.option_context('display.width', 200, 'display.max_columns', 20):
+        print(p.stats().head(args.top))
+    if args.folded:
+        with open(args.folded, 'w') as f:
+            p.write_folded(f, root=args.solution)
@@ -1,5 +1,4 @@
 """Sigmoid Curve adoption implementation."""
-import math
 import numpy as np
 import pandas as pd
 
@@ -8,6 +7,101 @@ import model.dd as dd
 from model.data_handler import DataHandler
 from model.decorators import data_func
 
+
+# In Excel models last_percent is set to 0.999999999999999 to mean 100% adoption
+# (which Excel helpfully displays as 100%).
+# LN(1/AH$21-1) = LN(1/1-1) = LN(0) (which doesn't exist), so being asymptotically
+# close to 100% ends up being approximately LN(0.0000000000000009) instead of LN(0).
+# We pull in the value which Excel comes up with, -34.65735902799730.
+MAGIC_LAST_PERCENT_LOG_TERM = -34.65735902799730
+
+
+def sigmoid_logistic(years, base_year, last_year, base_percent, last_percent,
+                     base_adoption, pds_tam_2050):
+    """Logistic sigmoid for any number of regions and years at once.
+
+       years: 1-D array of years to compute.
+       All other arguments are scalars or 1-D arrays with one entry per region, with the
+       meaning described in SCurve._sigmoid_logistic.
+
+       Returns (first_half, second_half), arrays of shape (len(years), number of regions).
+       Regions for which the Excel formula divides by zero are NaN for every year, years
+       before a region's base_year are NaN. A negative percentage, or a base_percent of
+       100% or more, raises ValueError ala math.log.
+    """
+    year = np.asarray(years, dtype=np.float64)[:, np.newaxis]
+    (base_year, last_year, base_percent, last_percent, base_adoption,
+            pds_tam_2050) = [np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in
+                    (base_year, last_year, base_percent, last_percent, base_adoption,
+                        pds_tam_2050)]
+
+    last_is_100 = last_percent >= 0.999999
+    last_is_zero = ~last_is_100 & (last_percent == 0.0)
+    base_is_zero = base_percent == 0.0
+    domain_error = (~last_is_100 & (last_percent < 0.0)) | (~last_is_zero & ~base_is_zero &
+            ((base_percent < 0.0) | (base_percent >= 1.0)))
+    if domain_error.any():
+        raise ValueError('math domain error')
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # lcot == log change over time
+        # =((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))
+        last_percent_log_term = np.where(last_is_100, MAGIC_LAST_PERCENT_LOG_TERM,
+                np.log(1.0 / last_percent - 1.0))
+        base_percent_log_term = np.log(1.0 / base_percent - 1.0)
+        lcot = (base_percent_log_term - last_percent_log_term) / (last_year - base_year)
+
+        # term1a = ((1-AH$18)/(1+EXP(-((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))*
+        #     ($AG24-(LN(1/AH$18-1)/((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))+AH$17))
+        #     ))*'Unit Adoption Calculations'!B$105)
+        term1a = ((1.0 - base_percent) / (1.0 + np.exp(-lcot * (year - (
+            base_percent_log_term / lcot + base_year)))) * pds_tam_2050)
+
+        # term1b = AH$21*AH$18*'Unit Adoption Calculations'!B$105
+        term1b = last_percent * base_percent * pds_tam_2050
+
+        # term2 = ((($AG$60-$AG$24)-($AG$60-$AG24))/($AG$60-$AG$24))
+        term2 = ((last_year - base_year) - (last_year - year)) / (last_year - base_year)
+
+        # term3 = ((($AG$60-$AG24)/($AG$60-base_year))*AH$19)
+        term3 = ((last_year - year) / (last_year - base_year)) * base_adoption
+
+        first_half = (term1a + term1b) * term2 + term3
+
+        # This is the same as term1a plus (AH$19/AH$21), see SCurve._sigmoid_logistic.
+        second_half = term1a + (base_adoption / last_percent)
+
+    zero_division = (last_is_zero | base_is_zero | (last_year == base_year) | (lcot == 0.0))
+    invalid = zero_division[np.newaxis, :] | (year < base_year)
+    first_half[invalid] = np.nan
+    second_half[invalid] = np.nan
+    return (first_half, second_half)
+
+
+def bass_diffusion(years, base_year, base_adoption, M, P, Q):
+    """Bass Diffusion model for any number of regions and years at once.
+
+       years: 1-D array of consecutive years to compute.
+       base_year, base_adoption, M (TAM in 2050), P (innovation) and Q (imitation) are
+       scalars or 1-D arrays with one entry per region.
+
+       Returns an array of shape (len(years), number of regions), NaN before base_year.
+       Each year depends on the year before it, so this steps through the years with all
+       regions computed together.
+    """
+    years = np.asarray(years)
+    (base_year, base_adoption, M, P, Q) = [np.atleast_1d(np.asarray(x, dtype=np.float64))
+            for x in (base_year, base_adoption, M, P, Q)]
+    result = np.full((len(years), len(base_adoption)), np.nan)
+    prev = result[0]
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for (i, year) in enumerate(years):
+            b = prev + (P + (Q * prev / M)) * (M - prev)
+            b = np.where(year == base_year, base_adoption, np.where(year > base_year, b, np.nan))
+            result[i] = prev = b
+    return result
+
+
 class SCurve(DataHandler):
     def __init__(self, transition_period, sconfig):
         """S-Curve (sigmoid adoption forecast) implementation.
@@ -23,6 +117,10 @@ class SCurve(DataHandler):
         self.transition_period = transition_period
         self.sconfig = sconfig
 
+    def _years(self):
+        """Years from the earliest base_year through dd.CORE_END_YEAR."""
+        return np.arange(int(self.sconfig['base_year'].min()), dd.CORE_END_YEAR + 1)
+
     @data_func
     def _sigmoid_logistic(self, base_year, last_year, base_percent, last_percent,
                           base_adoption, pds_tam_2050):
@@ -31,8 +129,30 @@ class SCurve(DataHandler):
         Appendix 4 of Documentation/RRS_Model_Framework_and_Guidelines_v1.1.pdf
         describes the S-Curve implementations. This is the first one, the logistic sigmoid.
         Though this sigmoid resembles other market growth sigmoid functions, it was developed
-        by and is unique to Drawdown. We have directly converted the Excel implementation
-        to Python, with comments noting what was done and why.
+        by and is unique to Drawdown. We have converted the Excel implementation to Python
+        in sigmoid_logistic(), this method computes it for a single region.
+
+        the First Half function from Building Automation Systems "S Curve"!AH24:
+        =(((1-AH$18)/(1+EXP(-((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))
+            *($AG24-(LN(1/AH$18-1)/((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))+AH$17))))
+            *'Unit Adoption Calculations'!B$105)+AH$21*AH$18*'Unit Adoption Calculations'!B$105)
+         *
+        ((($AG$60-$AG$24)-($AG$60-$AG24))/($AG$60-$AG$24))
+         +
+        ((($AG$60-$AG24)/($AG$60-base_year))*AH$19)
+        where:
+          $AG24 = year
+          AH$17 = $AG$24 = 2014 = base_year
+          AH$18 = base_percent
+          AH$19 = base_adoption
+          AH$20 = $AG$60 = 2050 = last_year
+          AH$21 = last_percent
+          'Unit Adoption Calculations'!B$105 = pds_tam_2050
+
+        The Second Half function from Building Automation Systems "S Curve"!AI24:
+        =((1-AH$18)/(1+EXP(-((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))
+           *($AG24-(LN(1/AH$18-1)/((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))+AH$17))))
+           *'Unit Adoption Calculations'!B$105+AH$19/AH$21)
 
         Arguments:
           base_year (int): base year of the calculation, Yb in Appendix 4.
@@ -43,103 +163,39 @@ class SCurve(DataHandler):
           base_adoption (float): number of funits adopted at base_year.
           pds_tam_2050 (float): total addressible market in 2050.
         """
-        result = pd.DataFrame(dtype=np.float64)
-        for year in range(base_year, dd.CORE_END_YEAR + 1):
-            # the First Half function from Building Automation Systems "S Curve"!AH24:
-            # =(((1-AH$18)/(1+EXP(-((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))
-            #     *($AG24-(LN(1/AH$18-1)/((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))+AH$17))))
-            #     *'Unit Adoption Calculations'!B$105)+AH$21*AH$18*'Unit Adoption Calculations'!B$105)
-            #  *
-            # ((($AG$60-$AG$24)-($AG$60-$AG24))/($AG$60-$AG$24))
-            #  +
-            # ((($AG$60-$AG24)/($AG$60-base_year))*AH$19)
-            # where:
-            #   $AG24 = year
-            #   AH$17 = $AG$24 = 2014 = base_year
-            #   AH$18 = base_percent
-            #   AH$19 = base_adoption
-            #   AH$20 = $AG$60 = 2050 = last_year
-            #   AH$21 = last_percent
-            #   'Unit Adoption Calculations'!B$105 = pds_tam_2050
-
-            #
-            # In Excel models last_percent is set to 0.999999999999999 to mean 100% adoption
-            # (which Excel helpfully displays as 100%).
-            # LN(1/AH$21-1) = LN(1/1-1) = LN(0) (which doesn't exist), so being asymptotically
-            # close to 100% ends up being approximately LN(0.0000000000000009) instead of LN(0).
-            # We pull in the value which Excel comes up with, -34.65735902799730.
-            magic = -34.65735902799730
-            np_err_settings = np.seterr(divide='raise')
-            try:
-                # lcot == log change over time
-                # =((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))
-                last_percent_log_term = magic if last_percent >= 0.999999 else math.log(
-                    1.0 / last_percent - 1.0)
-                lcot = ((math.log(1.0 / base_percent - 1.0) - last_percent_log_term) /
-                    (last_year - base_year))
-
-                # term1a = ((1-AH$18)/(1+EXP(-((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))*
-                #     ($AG24-(LN(1/AH$18-1)/((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))+AH$17))
-                #     ))*'Unit Adoption Calculations'!B$105)
-                term1a = ((1.0 - base_percent) / (1.0 + math.exp(-lcot * (year - (math.log(
-                    1.0 / base_percent - 1.0) / lcot + base_year)))) * pds_tam_2050)
-
-                # term1b = AH$21*AH$18*'Unit Adoption Calculations'!B$105
-                term1b = last_percent * base_percent * pds_tam_2050
-
-                # term2 = ((($AG$60-$AG$24)-($AG$60-$AG24))/($AG$60-$AG$24))
-                term2 = ((last_year - base_year) - (last_year - year)) / (last_year - base_year)
-
-                # term3 = ((($AG$60-$AG24)/($AG$60-base_year))*AH$19)
-                term3 = ((last_year - year) / (last_year - base_year)) * base_adoption
-
-                firstHalf = (term1a + term1b) * term2 + term3
-
-                # The Second Half function from Building Automation Systems "S Curve"!AI24:
-                # =((1-AH$18)/(1+EXP(-((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))
-                #    *($AG24-(LN(1/AH$18-1)/((LN(1/AH$18-1)-LN(1/AH$21-1))/(AH$20-AH$17))+AH$17))))
-                #    *'Unit Adoption Calculations'!B$105+AH$19/AH$21)
-                #
-                # using the same definitions for the cells as in the First Half function above.
-                # This is the same as term1a plus (AH$19/AH$21)
-                secondHalf = term1a + (base_adoption / last_percent)
-            except (ZeroDivisionError, FloatingPointError):
-                firstHalf = np.nan
-                secondHalf = np.nan
-            np.seterr(**np_err_settings)
-            result.loc[year, 'first_half'] = firstHalf
-            result.loc[year, 'second_half'] = secondHalf
-
+        years = np.arange(base_year, dd.CORE_END_YEAR + 1)
+        (first_half, second_half) = sigmoid_logistic(years=years, base_year=base_year,
+                last_year=last_year, base_percent=base_percent, last_percent=last_percent,
+                base_adoption=base_adoption, pds_tam_2050=pds_tam_2050)
+        result = pd.DataFrame({'first_half': first_half[:, 0], 'second_half': second_half[:, 0]},
+                index=years)
         result.index.name = 'Year'
         return result
 
     @data_func
     def logistic_adoption(self):
         """Calculate Logistic S-Curve for a solution."""
-        result = pd.DataFrame()
-        for region in self.sconfig.index:
-            last_year = self.sconfig.loc[region, 'last_year']
-            last_percent = self.sconfig.loc[region, 'last_percent']
-            df = self._sigmoid_logistic(
-                base_year=self.sconfig.loc[region, 'base_year'],
-                last_year=last_year,
-                base_percent=self.sconfig.loc[region, 'base_percent'],
-                last_percent=last_percent,
-                base_adoption=self.sconfig.loc[region, 'base_adoption'],
-                pds_tam_2050=self.sconfig.loc[region, 'pds_tam_2050'])
-            for year, row in df.iterrows():
-                if last_percent == 0.0:
-                    result.loc[year, region] = np.nan
-                elif (year <= (last_year - (self.transition_period / 2))):
-                    result.loc[year, region] = row['first_half']
-                elif (year < (last_year + (self.transition_period / 2))):
-                    a = ((last_year + self.transition_period / 2 - year) /
-                         self.transition_period) * row['first_half']
-                    b = ((year - (last_year - self.transition_period / 2)) /
-                         self.transition_period) * row['second_half']
-                    result.loc[year, region] = a + b
-                else:
-                    result.loc[year, region] = row['second_half']
+        sc = self.sconfig
+        years = self._years()
+        last_year = sc['last_year'].values.astype(np.float64)
+        last_percent = sc['last_percent'].values.astype(np.float64)
+        (first_half, second_half) = sigmoid_logistic(years=years, base_year=sc['base_year'],
+                last_year=last_year, base_percent=sc['base_percent'], last_percent=last_percent,
+                base_adoption=sc['base_adoption'], pds_tam_2050=sc['pds_tam_2050'])
+
+        # blend linearly from the first half to the second half over the transition period.
+        tp = self.transition_period
+        year = years.astype(np.float64)[:, np.newaxis]
+        first = year <= (last_year - (tp / 2))
+        transition = year < (last_year + (tp / 2))
+        with np.errstate(invalid='ignore'):
+            a = ((last_year + tp / 2 - year) / tp) * first_half
+            b = ((year - (last_year - tp / 2)) / tp) * second_half
+        values = np.where(first, first_half, np.where(transition, a + b, second_half))
+        values[:, last_percent == 0.0] = np.nan
+
+        result = pd.DataFrame(values, index=years, columns=sc.index.copy())
+        result.columns.name = None
         result.name = 'logistic_adoption'
         result.index.name = 'Year'
         return result
@@ -147,17 +203,13 @@ class SCurve(DataHandler):
     @data_func
     def bass_diffusion_adoption(self):
         """Calculate Bass Diffusion S-Curve for a solution."""
-        result = pd.DataFrame()
-        for region in self.sconfig.index:
-            M = self.sconfig.loc[region, 'pds_tam_2050']
-            P = self.sconfig.loc[region, 'innovation']
-            Q = self.sconfig.loc[region, 'imitation']
-            base_year = self.sconfig.loc[region, 'base_year']
-            result.loc[base_year, region] = prev = self.sconfig.loc[region, 'base_adoption']
-            for year in range(base_year + 1, dd.CORE_END_YEAR + 1):
-                b = prev + (P + (Q * prev / M)) * (M - prev)
-                result.loc[year, region] = b
-                prev = b
+        sc = self.sconfig
+        years = self._years()
+        values = bass_diffusion(years=years, base_year=sc['base_year'],
+                base_adoption=sc['base_adoption'], M=sc['pds_tam_2050'],
+                P=sc['innovation'], Q=sc['imitation'])
+        result = pd.DataFrame(values, index=years, columns=sc.index.copy())
+        result.columns.name = None
         result.name = 'bass_diffusion_adoption'
         result.index.name = 'Year'
         return result
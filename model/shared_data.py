@@ -0,0 +1,190 @@
+"""Reference datasets shared read-only between processes.
+
+Some tables are the same for every solution and scenario:
+  + population and GDP by region, data/unitadoption_*.csv, see UnitAdoption.ref_population,
+  + the TAM data sources in data/energy,
+  + the baseline emissions of fairutil.baseline_emissions().
+Each worker of a batch or WarmPool would otherwise parse them and hold its own copy.
+
+publish() writes them once, as .npy files in a directory in shared memory (/dev/shm where
+the platform has it), and sets $DRAWDOWN_SHARED_DATA to that directory. Processes started
+afterwards inherit the variable and memory-map the files read-only on first use, so every
+process on the machine uses the same physical pages:
+
+    with shared_data.publish():
+        for result in batch.run_batch(jobs):
+            ...
+
+csv_cache.read_csv() and fairutil.baseline_emissions() look datasets up here before reading
+them. The values of a shared dataset are read-only, modifying them raises ValueError.
+
+The files are used directly rather than through multiprocessing.shared_memory, whose
+resource tracker unlinks a block when a process which only attached to it exits.
+"""
+
+import os
+import pathlib
+import pickle
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from model import csv_cache
+from model import dd
+
+ENV = 'DRAWDOWN_SHARED_DATA'
+MANIFEST = 'manifest.pkl'
+BASELINE_EMISSIONS = 'fairutil.baseline_emissions'
+
+datadir = pathlib.Path(__file__).parents[1].joinpath('data')
+
+# Arguments UnitAdoption and TAMs pass to csv_cache.read_csv for the files published.
+UNITADOPTION_CSV_ARGS = dict(index_col=0, skipinitialspace=True, skip_blank_lines=True,
+        comment='#')
+TAM_CSV_ARGS = dict(header=0, index_col="Year", skipinitialspace=True, skip_blank_lines=True,
+        comment='#')
+
+_lock = threading.Lock()
+_attached = None  # (directory, manifest, {key: DataFrame or Series}) of this process
+
+
+def reference_csvs():
+    """List of (filename, read_csv arguments) of the CSV files which are published."""
+    csvs = [(str(f), UNITADOPTION_CSV_ARGS) for f in
+            sorted(datadir.glob('unitadoption_*.csv'))]
+    for f in sorted(datadir.joinpath('energy').glob('tam_*.csv')):
+        csvs.append((str(f), dict(TAM_CSV_ARGS, usecols=["Year"] + dd.REGIONS)))
+        csvs.append((str(f), dict(TAM_CSV_ARGS, usecols=["Year", dd.REGIONS[0]])))
+    return csvs
+
+
+def reference_datasets():
+    """dict of key to DataFrame or Series of everything publish() shares by default."""
+    import model.fairutil
+    datasets = {}
+    for (filename, kwargs) in reference_csvs():
+        datasets[csv_cache.cache_key(filename, **kwargs)] = csv_cache.read_csv(filename,
+                **kwargs)
+    datasets[BASELINE_EMISSIONS] = model.fairutil.baseline_emissions()
+    return datasets
+
+
+class Publication:
+    """Directory of published datasets, removed by close()."""
+
+    def __init__(self, directory, keys, previous):
+        self.directory = directory
+        self.keys = keys
+        self._previous = previous
+
+    def close(self):
+        """Remove the published files and restore $DRAWDOWN_SHARED_DATA. Processes which
+           already attached keep their mappings until they exit."""
+        if self._previous is None:
+            os.environ.pop(ENV, None)
+        else:
+            os.environ[ENV] = self._previous
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def publish(datasets=None, directory=None):
+    """Write datasets to directory and make them available to this process and to the
+       processes it starts afterwards.
+
+       datasets: dict of key to DataFrame or Series, default reference_datasets(). Keys of
+         CSV files are csv_cache.cache_key() of the file. Only datasets with numeric values
+         of a single dtype are shared, others are skipped.
+       directory: where to write, default a new directory in /dev/shm or the temp directory.
+       Returns a Publication.
+    """
+    global _attached
+    if datasets is None:
+        datasets = reference_datasets()
+    if directory is None:
+        shm = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        directory = tempfile.mkdtemp(prefix='drawdown-', dir=shm)
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    manifest = {}
+    for (key, data) in datasets.items():
+        frame = data.to_frame() if isinstance(data, pd.Series) else data
+        dtypes = set(frame.dtypes)
+        if len(dtypes) != 1 or dtypes.pop().kind not in 'biuf':
+            continue
+        filename = f'{len(manifest)}.npy'
+        # Fortran order keeps each column contiguous, so frames wrap it without copying.
+        np.save(directory.joinpath(filename), np.asfortranarray(frame.to_numpy()))
+        manifest[key] = {'file': filename, 'series': isinstance(data, pd.Series),
+                'index': frame.index, 'columns': frame.columns,
+                'name': getattr(data, 'name', None)}
+    (fd, tmpname) = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(manifest, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmpname, directory.joinpath(MANIFEST))
+
+    previous = os.environ.get(ENV, None)
+    os.environ[ENV] = str(directory)
+    with _lock:
+        _attached = None
+    # so that this process also uses the shared copies from now on.
+    csv_cache.discard(manifest.keys())
+    return Publication(directory=directory, keys=list(manifest.keys()), previous=previous)
+
+
+def _attach():
+    """(manifest, frames) of the directory named by $DRAWDOWN_SHARED_DATA."""
+    global _attached
+    directory = os.environ.get(ENV, None)
+    if _attached is None or _attached[0] != directory:
+        manifest = {}
+        if directory:
+            try:
+                with open(os.path.join(directory, MANIFEST), 'rb') as f:
+                    manifest = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                manifest = {}
+        _attached = (directory, manifest, {})
+    return _attached[1:]
+
+
+def get(key):
+    """Shared DataFrame or Series for key, or None if it has not been published.
+
+       The result is a new object for every call, so callers can rename it or replace its
+       index, but its values are read-only views of the shared memory.
+    """
+    with _lock:
+        (manifest, frames) = _attach()
+        entry = manifest.get(key, None)
+        if entry is None:
+            return None
+        data = frames.get(key, None)
+        if data is None:
+            directory = os.environ[ENV]
+            try:
+                values = np.load(os.path.join(directory, entry['file']), mmap_mode='r')
+            except (OSError, ValueError):
+                return None
+            if entry['series']:
+                data = pd.Series(values[:, 0], index=entry['index'], name=entry['name'],
+                        copy=False)
+            else:
+                data = pd.DataFrame(values, index=entry['index'], columns=entry['columns'],
+                        copy=False)
+                if entry['name'] is not None:
+                    data.name = entry['name']
+            frames[key] = data
+    result = data.copy(deep=False)
+    if isinstance(data, pd.DataFrame) and entry['name'] is not None:
+        result.name = entry['name']
+    return result
@@ -4,9 +4,11 @@ from functools import lru_cache
 import pathlib
 import re
 
+from model import csv_cache
 from model import dd
 from model.metaclass_cache import MetaclassCache
 from model import interpolation
+from model import shared_data
 import numpy as np
 import pandas as pd
 
@@ -71,8 +73,8 @@ class TAM(DataHandler, object, metaclass=MetaclassCache):
                 sources = {name: value} if self._is_path(value) else value
 
                 for name, filename in sources.items():
-                    df = pd.read_csv(filename, header=0, index_col="Year", skipinitialspace=True,
-                            skip_blank_lines=True, comment='#', usecols=["Year"] + regions)
+                    df = csv_cache.read_csv(filename, copy=False, usecols=["Year"] + regions,
+                            **shared_data.TAM_CSV_ARGS)
                     for region in regions:
                         df_per_region[region][name] = df[region]
 
@@ -81,8 +83,8 @@ class TAM(DataHandler, object, metaclass=MetaclassCache):
                 sources = {name: value} if self._is_path(value) else value
 
                 for name, filename in sources.items():
-                    df = pd.read_csv(filename, header=0, index_col="Year", skipinitialspace=True,
-                            skip_blank_lines=True, comment='#', usecols=["Year", main_region])
+                    df = csv_cache.read_csv(filename, copy=False, usecols=["Year", main_region],
+                            **shared_data.TAM_CSV_ARGS)
                     df_per_region[main_region_pds][name] = df[main_region]
 
         self._forecast_data = df_per_region
@@ -218,10 +220,10 @@ class TAM(DataHandler, object, metaclass=MetaclassCache):
 
     def _forecast_data_regional_sum(self):
         """ SolarPVUtil 'TAM Data'!Q45:Q94 when B29:B30 are both 'Y' """
+        trends = self._forecast_trends(dd.MAIN_REGIONS)
         regional = pd.DataFrame(columns=dd.MAIN_REGIONS)
         for region in regional.columns:
-            self._set_tam_one_region(result=regional, region=region,
-                    forecast_trend=self.forecast_trend(region),
+            self._set_tam_one_region(result=regional, region=region, trend=trends[region],
                     forecast_low_med_high=self.forecast_low_med_high(region))
         regional_sum = regional.sum(axis=1)
         regional_sum.name = 'RegionalSum'
@@ -396,6 +398,14 @@ class TAM(DataHandler, object, metaclass=MetaclassCache):
            Linear: SolarPVUtil 'TAM Data'!BX677:BZ723     Degree2: SolarPVUtil 'TAM Data'!CE677:CH723
            Degree3: SolarPVUtil 'TAM Data'!CM677:CQ723    Exponential: SolarPVUtil 'TAM Data'!CV677:CX723
         """
+        (data, trend) = self._forecast_trend_inputs(region=region, trend=trend)
+        result = interpolation.trend_algorithm(data=data, trend=trend)
+        result.name = 'forecast_trend_' + self._name_to_identifier(region) + '_' + str(trend).lower()
+        return result
+
+
+    def _forecast_trend_inputs(self, region, trend=None):
+        """(forecast to fit, trend algorithm) for forecast_trend of region."""
         main_region = dd.REGIONS[0]
         if main_region in region and 'PDS' in region:
             data_sources = self._get_data_sources(
@@ -406,15 +416,20 @@ class TAM(DataHandler, object, metaclass=MetaclassCache):
         growth = self.tamconfig.loc['growth', region]
         trend = self._get_trend(trend=trend, tamconfig=self.tamconfig[region],
                 data_sources=data_sources)
-        data = self.forecast_low_med_high(region).loc[:, growth]
-        result = interpolation.trend_algorithm(data=data, trend=trend)
-        result.name = 'forecast_trend_' + self._name_to_identifier(region) + '_' + str(trend).lower()
-        return result
+        return (self.forecast_low_med_high(region).loc[:, growth], trend)
+
+
+    def _forecast_trends(self, regions):
+        """The 'adoption' column of forecast_trend for each of regions, as one DataFrame
+           with a column per region. The regions are all fit in a single call."""
+        inputs = [self._forecast_trend_inputs(region=region) for region in regions]
+        data = pd.concat([d for (d, _) in inputs], axis=1, keys=regions)
+        return interpolation.trend_adoption(data=data, trends=[t for (_, t) in inputs])
 
 
-    def _set_tam_one_region(self, result, region, forecast_trend, forecast_low_med_high):
-        """Set a single column in ref_tam_per_region."""
-        result[region] = forecast_trend.loc[:, 'adoption']
+    def _set_tam_one_region(self, result, region, trend, forecast_low_med_high):
+        """Set a single column in ref_tam_per_region from the 'adoption' trend of region."""
+        result[region] = trend
         first_year = result.first_valid_index()
         result.loc[first_year, region] = forecast_low_med_high.loc[first_year, 'Medium']
 
@@ -428,10 +443,10 @@ class TAM(DataHandler, object, metaclass=MetaclassCache):
            by reference from other tabs. For convenience, we supply it.
            SolarPVUtil 'Unit Adoption Calculations'!A16:K63
         """
+        trends = self._forecast_trends(dd.REGIONS)
         result = pd.DataFrame(columns=dd.REGIONS)
         for region in result.columns:
-            self._set_tam_one_region(result=result, region=region,
-                    forecast_trend=self.forecast_trend(region),
+            self._set_tam_one_region(result=result, region=region, trend=trends[region],
                     forecast_low_med_high=self.forecast_low_med_high(region))
         result.name = "ref_tam_per_region"
         return result
@@ -448,18 +463,19 @@ class TAM(DataHandler, object, metaclass=MetaclassCache):
            by reference from other tabs. For convenience, we supply it.
            SolarPVUtil 'Unit Adoption Calculations'!A68:K115
         """
+        regions = ['PDS ' + dd.REGIONS[0]] + dd.REGIONS[1:]
+        trends = self._forecast_trends(regions)
         result = pd.DataFrame(columns=dd.REGIONS)
         for idx, region in enumerate(result.columns):
             if idx == 0:
                 region_pds = 'PDS ' + region
-                result[region] = self.forecast_trend(region_pds).loc[:, 'adoption']
+                result[region] = trends[region_pds]
                 lmh = self.forecast_low_med_high(region)
                 growth = self.tamconfig.loc['growth', region_pds]
                 first_year = result.first_valid_index()
                 result.loc[first_year, region] = lmh.loc[first_year, 'Medium']
             else:
-                self._set_tam_one_region(result=result, region=region,
-                        forecast_trend=self.forecast_trend(region),
+                self._set_tam_one_region(result=result, region=region, trend=trends[region],
                         forecast_low_med_high=self.forecast_low_med_high(region))
         result.name = "pds_tam_per_region"
         return result
@@ -3,6 +3,8 @@
 import json
 import os
 import pathlib
+import subprocess
+import sys
 import tempfile
 
 import numpy as np
@@ -347,3 +349,35 @@ def test_vma_to_param_names():
     assert result == 'tC_storage_in_protected_land_type'
     result = advanced_controls.get_param_for_vma_name('CONVENTIONAL Fixed Operating Cost (FOM)')
     assert result == 'conv_fixed_oper_cost_per_iunit'
+
+
+def test_content_hash():
+    series = pd.Series([1.0, 2.0, nan], index=['World', 'OECD90', 'Eastern Europe'])
+    ac1 = advanced_controls.AdvancedControls(name='one', report_end_year=2050,
+            seq_rate_global=series, vma_values={'b': 2.0, 'a': 1.0})
+    ac2 = advanced_controls.AdvancedControls(name='two', report_end_year=2050.0,
+            seq_rate_global=series.copy(), vma_values={'a': 1.0, 'b': 2.0})
+    assert ac1.content_hash() == ac2.content_hash()
+    assert hash(ac1) == hash(ac2)
+    assert ac1 == ac2
+    assert len({ac1, ac2}) == 1
+    ac3 = advanced_controls.AdvancedControls(name='one', report_end_year=2050,
+            seq_rate_global=pd.Series([1.0, 2.5, nan], index=series.index))
+    assert ac3.content_hash() != ac1.content_hash()
+    assert ac3 != ac1
+    ac4 = advanced_controls.AdvancedControls(name='one', report_end_year=2051,
+            seq_rate_global=series, vma_values={'b': 2.0, 'a': 1.0})
+    assert ac4.content_hash() != ac1.content_hash()
+
+
+def test_content_hash_is_stable_across_processes():
+    code = ("from model import advanced_controls;"
+            "print(advanced_controls.AdvancedControls(name='x', npv_discount_rate=0.04,"
+            "solution_category='REPLACEMENT', ref_adoption_use_pds_years=[2015]).content_hash())")
+    ac = advanced_controls.AdvancedControls(name='x', npv_discount_rate=0.04,
+            solution_category='REPLACEMENT', ref_adoption_use_pds_years=[2015])
+    env = dict(os.environ, PYTHONHASHSEED='12345',
+            PYTHONPATH=str(pathlib.Path(__file__).parents[2]))
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True,
+            text=True, check=True)
+    assert result.stdout.strip() == ac.content_hash()
@@ -1,5 +1,7 @@
+import numpy as np
 import pytest
 from model import aez
+from model import dd
 
 
 @pytest.mark.slow
@@ -50,3 +52,37 @@ def test_tropical_tree_staples():
     ae = aez.AEZ('Tropical Tree Staples')
     result = ae.soln_land_dist_df
     assert result is not None
+
+
+def test_land_cube(tmp_path, monkeypatch):
+    monkeypatch.setenv('DRAWDOWN_CACHE_DIR', str(tmp_path))
+    aez.land_cube.cache_clear()
+    try:
+        cube = aez.land_cube()
+        assert isinstance(cube.allocation, np.memmap)
+        assert not cube.allocation.flags.writeable
+        stored = sorted(p.name for p in tmp_path.joinpath('land').iterdir())
+        assert [name.split('-', 1)[1] for name in stored] == [
+                'allocation.npy', 'labels.pkl', 'world.npy']
+        alloc = cube.solution_allocation(cohort=2019, solution_name='Peatland Protection',
+                regimes=dd.THERMAL_MOISTURE_REGIMES)
+        assert alloc.shape == (6, len(dd.AEZS))
+        assert alloc[0, 2] == pytest.approx(0.10591729011599778)
+        assert (alloc[:, -1] == 0.0).all()  # AEZ29 is not allocated
+        with pytest.raises(KeyError):
+            cube.solution_allocation(cohort=2020, solution_name='No Such Solution',
+                    regimes=dd.THERMAL_MOISTURE_REGIMES8)
+        with pytest.raises(KeyError):
+            cube.solution_allocation(cohort=2018, solution_name='Peatland Protection',
+                    regimes=dd.THERMAL_MOISTURE_REGIMES8)
+        world = cube.world_area('2018', 'Tropical-Semi-Arid')
+        assert world.loc['China', 'AEZ5: Forest, marginal, minimal'] > 0
+        assert list(world.columns) == dd.AEZS
+
+        # a second process would load the same compiled arrays.
+        aez.land_cube.cache_clear()
+        cube2 = aez.land_cube()
+        assert cube2.labels == cube.labels
+        assert np.array_equal(cube2.allocation, cube.allocation, equal_nan=True)
+    finally:
+        aez.land_cube.cache_clear()
@@ -207,6 +207,32 @@ def test_co2_ppm_calculator_land_with_avoided_emissions():
             pd.testing.assert_frame_equal(c2.co2_ppm_calculator(), expected, check_dtype=False)
 
 
+def test_bern_impulse_response():
+    matrix = co2calcs.bern_impulse_response(2015, 2060)
+    assert matrix.shape == (46, 46)
+    assert matrix is co2calcs.bern_impulse_response(2015, 2060)
+    assert matrix[0, 0] == pytest.approx(0.217 + 0.259 * np.exp(-1 / 172.9) +
+            0.338 * np.exp(-1 / 18.51) + 0.186 * np.exp(-1 / 1.186))
+    assert matrix[10, 5] == matrix[5, 0]
+    assert matrix[4, 5] == 0.0
+    assert not matrix.flags.writeable
+
+
+def test_co2_ppm_table_report_start_year():
+    co2_vals = pd.Series(1.0, index=range(2014, 2061))
+    rrs = co2calcs.co2_ppm_table(co2_vals, SOLUTION_CATEGORY.REPLACEMENT, 2020)
+    land = co2calcs.co2_ppm_table(co2_vals, SOLUTION_CATEGORY.LAND, 2020)
+    assert list(rrs.columns) == ['PPM', 'Total'] + list(range(2015, 2061))
+    assert (rrs.loc[:, 2015:2019] == 0.0).all().all()
+    assert rrs.at[2020, 2020] == pytest.approx(co2calcs.bern_impulse_response(2020, 2020)[0, 0])
+    assert rrs.at[2019, 'Total'] == 0.0
+    # LAND computes every year, including 2014 which is not otherwise a column of the table.
+    assert land.at[2016, 2015] > 0.0
+    assert 2014 in land.columns
+    assert land.at[2060, 'Total'] == pytest.approx(land.loc[2060].iloc[2:].sum())
+    assert land.at[2060, 'PPM'] == pytest.approx(land.at[2060, 'Total'] / (44.01 * 1.8 * 100))
+
+
 def test_co2eq_ppm_calculator():
     soln_pds_net_grid_electricity_units_saved = pd.DataFrame([[1.0, 1.0], [1.0, 1.0], [1.0, 1.0]],
             columns=["World", "B"], index=[2020, 2021, 2022])
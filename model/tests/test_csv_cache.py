@@ -0,0 +1,95 @@
+"""Tests for csv_cache.py."""
+
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from model import csv_cache
+
+
+@pytest.fixture
+def cachedir(tmp_path, monkeypatch):
+    monkeypatch.setenv('DRAWDOWN_CACHE_DIR', str(tmp_path.joinpath('cache')))
+    csv_cache.clear()
+    yield tmp_path.joinpath('cache', 'csv')
+    csv_cache.clear()
+
+
+def write_csv(path, text):
+    path.write_text(text)
+    return path
+
+
+def test_read_csv_matches_pandas(tmp_path, cachedir):
+    filename = write_csv(tmp_path.joinpath('a.csv'), "Year,World\n2014,1.0\n2015,2.0\n")
+    result = csv_cache.read_csv(filename, index_col=0)
+    pd.testing.assert_frame_equal(result, pd.read_csv(filename, index_col=0))
+    assert len(list(cachedir.glob('*.pkl'))) == 1
+
+
+def test_returns_copy(tmp_path, cachedir):
+    filename = write_csv(tmp_path.joinpath('a.csv'), "Year,World\n2014,1.0\n2015,2.0\n")
+    a = csv_cache.read_csv(filename, index_col=0)
+    a.loc[2014, 'World'] = 99.0
+    b = csv_cache.read_csv(str(filename), index_col=0)
+    assert b.loc[2014, 'World'] == 1.0
+
+
+def test_loads_from_disk(tmp_path, cachedir):
+    filename = write_csv(tmp_path.joinpath('a.csv'), "Year,World\n2014,1.0\n2015,2.0\n")
+    expected = csv_cache.read_csv(filename, index_col=0)
+    csv_cache.clear()  # simulate a fresh process, only the on-disk cache remains.
+    result = csv_cache.read_csv(filename, index_col=0)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_kwargs_are_part_of_key(tmp_path, cachedir):
+    filename = write_csv(tmp_path.joinpath('a.csv'), "Year,World,OECD90\n2014,1.0,3.0\n")
+    a = csv_cache.read_csv(filename, index_col=0)
+    b = csv_cache.read_csv(filename, index_col=0, usecols=['Year', 'World'])
+    assert list(a.columns) == ['World', 'OECD90']
+    assert list(b.columns) == ['World']
+
+
+def test_modified_file_is_reread(tmp_path, cachedir):
+    filename = write_csv(tmp_path.joinpath('a.csv'), "Year,World\n2014,1.0\n")
+    assert csv_cache.read_csv(filename, index_col=0).loc[2014, 'World'] == 1.0
+    write_csv(filename, "Year,World\n2014,22.0\n")
+    st = filename.stat()
+    os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert csv_cache.read_csv(filename, index_col=0).loc[2014, 'World'] == 22.0
+
+
+def test_disk_cache_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv('DRAWDOWN_CACHE_DIR', '')
+    csv_cache.clear()
+    filename = write_csv(tmp_path.joinpath('a.csv'), "Year,World\n2014,1.0\n")
+    assert csv_cache.cache_dir() is None
+    assert csv_cache.read_csv(filename, index_col=0).loc[2014, 'World'] == 1.0
+    csv_cache.clear()
+
+
+def test_buffer_passthrough(cachedir):
+    result = csv_cache.read_csv(io.StringIO("Year,World\n2014,1.0\n"), index_col=0)
+    assert result.loc[2014, 'World'] == 1.0
+    assert not cachedir.exists()
+
+
+def test_load_and_store(cachedir, monkeypatch):
+    assert csv_cache.load('other', 'k') is None
+    csv_cache.store('other', 'k', {'a': [1, 2]})
+    assert csv_cache.load('other', 'k') == {'a': [1, 2]}
+    csv_cache.store('other', 'array', np.arange(4.0))
+    array = csv_cache.load('other', 'array')
+    assert isinstance(array, np.memmap)
+    assert not array.flags.writeable
+    assert list(array) == [0.0, 1.0, 2.0, 3.0]
+    directory = cachedir.parent.joinpath('other')
+    assert sorted(p.name for p in directory.iterdir()) == ['array.npy', 'k.pkl']
+    directory.joinpath('k.pkl').write_bytes(b'not a pickle')
+    assert csv_cache.load('other', 'k') is None
+    monkeypatch.setenv('DRAWDOWN_CACHE_DIR', '')
+    csv_cache.store('other', 'disabled', 1)
+    assert csv_cache.load('other', 'disabled') is None
@@ -1,6 +1,9 @@
 """ Test for DataHandler CH4Cals being a subclass of it"""
-import pandas as pd
+import io
 import json
+
+import pandas as pd
+import pytest
 from model import advanced_controls
 from model import ch4calcs
 
@@ -26,6 +29,50 @@ def test_ch4_tons_reduced():
     assert existing_key == True
     pd.testing.assert_frame_equal(json_data['ch4_tons_reduced'].loc[2015:], expected, check_exact=False)
 
+def _c4():
+    soln_net_annual_funits_adopted = pd.DataFrame(soln_net_annual_funits_adopted_list[1:],
+                                                  columns=soln_net_annual_funits_adopted_list[0]).set_index(
+        'Year')
+    ac = advanced_controls.AdvancedControls(report_start_year=2020, report_end_year=2050,
+                                            ch4_co2_per_funit=0.01, ch4_is_co2eq=False)
+    return ch4calcs.CH4Calcs(ac=ac, soln_net_annual_funits_adopted=soln_net_annual_funits_adopted)
+
+
+def test_data_functions():
+    assert ch4calcs.CH4Calcs.data_functions() == ('ch4_tons_reduced',)
+    assert list(dict(_c4().iter_data()).keys()) == ['ch4_tons_reduced']
+
+
+def test_to_json_does_not_modify_results():
+    c4 = _c4()
+    before = c4.ch4_tons_reduced().copy()
+    json_data = c4.to_json(regions=['World', 'China'])
+    assert list(json_data['ch4_tons_reduced'].columns) == ['World', 'China']
+    pd.testing.assert_frame_equal(c4.ch4_tons_reduced(), before)
+
+
+def test_write_ndjson():
+    c4 = _c4()
+    stream = io.StringIO()
+    c4.write_ndjson(stream, regions=['World'])
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    expected = c4.to_json(regions=['World'])['ch4_tons_reduced']
+    assert len(records) == len(expected.index)
+    for record in records:
+        assert set(record.keys()) == {'table', 'index', 'World'}
+        assert record['table'] == 'ch4_tons_reduced'
+        assert record['World'] == pytest.approx(expected.loc[record['index'], 'World'])
+
+
+def test_iter_arrow():
+    pyarrow = pytest.importorskip('pyarrow')
+    c4 = _c4()
+    batches = dict(c4.iter_arrow())
+    batch = batches['ch4_tons_reduced']
+    assert batch.schema.names[0] == 'index'
+    assert batch.num_rows == len(c4.ch4_tons_reduced().index)
+
+
 # 'Unit Adoption'!B251:L298
 soln_net_annual_funits_adopted_list = [
     ["Year", "World", "OECD90", "Eastern Europe", "Asia (Sans Japan)", "Middle East and Africa", "Latin America",
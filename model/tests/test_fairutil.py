@@ -1,6 +1,7 @@
 """Tests for fairutil.py."""
 
 import fair
+import numpy as np
 import pandas as pd
 
 from model import fairutil
@@ -17,3 +18,33 @@ def test_baseline_emissions():
 def test_fair_scm_kwargs():
     k = fairutil.fair_scm_kwargs()
     assert 'r0' in k
+
+def test_fair_scm_cached():
+    fairutil.cache_clear()
+    b = fairutil.baseline_emissions()
+    kwargs = fairutil.fair_scm_kwargs()
+    (C, F, T) = fairutil.fair_scm(b.values, False, **kwargs)
+    (C2, F2, T2) = fairutil.fair_scm(b.values.copy(), False, **kwargs)
+    assert T2 is T
+    assert not T.flags.writeable
+    (_, _, T3) = fairutil.fair_scm(b.values - 1.0, False, **kwargs)
+    assert T3[-1] < T[-1]
+
+def test_fair_scm_batch():
+    fairutil.cache_clear()
+    b = fairutil.baseline_emissions()
+    trajectories = pd.DataFrame([b.values, b.values - 1.0, b.values],
+            index=['baseline', 'reduced', 'again'], columns=b.index)
+    result = fairutil.fair_scm_batch(trajectories, max_workers=2)
+    assert list(result.columns) == ['C', 'F', 'T']
+    assert result.index.names == ['Trajectory', 'Year']
+    (C, F, T) = fairutil.fair_scm(b.values, False, **fairutil.fair_scm_kwargs())
+    assert (result.loc['baseline', 'T'].values == T).all()
+    assert (result.loc['again', 'C'].values == C).all()
+    assert result.loc[('reduced', 2100), 'T'] < result.loc[('baseline', 2100), 'T']
+
+def test_fair_scm_batch_array():
+    b = fairutil.baseline_emissions()
+    result = fairutil.fair_scm_batch(np.vstack([b.values, b.values]), max_workers=0)
+    assert list(result.index.get_level_values('Trajectory').unique()) == [0, 1]
+    assert 2015 in result.loc[0].index
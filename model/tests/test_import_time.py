@@ -0,0 +1,70 @@
+"""Import-time budget for the model package.
+
+Solution workers are started on demand, so the time to import the model matters. These
+tests run `python -X importtime` in a fresh interpreter and fail if importing the model
+modules used by the solutions starts importing slow optional dependencies again, or
+takes much longer than importing pandas itself.
+"""
+
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+repodir = pathlib.Path(__file__).parents[2]
+
+# Modules imported by solution/*/__init__.py.
+MODEL_MODULES = ['model.' + name for name in ('adoptiondata', 'advanced_controls', 'aez',
+    'ch4calcs', 'co2calcs', 'customadoption', 'dd', 'emissionsfactors', 'firstcost',
+    'helpertables', 'interpolation', 'operatingcost', 's_curve', 'tam', 'tla',
+    'unitadoption', 'vma')]
+
+# Only needed by some uses of the model, and imported on first use.
+LAZY_MODULES = ['pytest', 'openpyxl', 'fair', 'scipy', 'tools.vma_xls_extract']
+
+# Import time of the model modules beyond what numpy and pandas need, as a multiple of
+# the time to import numpy and pandas. It was about 0.25 when this test was written, and
+# 1.5 to 2.5 with fair, openpyxl and pytest imported eagerly.
+BUDGET = 0.75
+
+
+def importtime(modules):
+    """dict of module name to (self, cumulative) microseconds of importing modules in a
+       new interpreter."""
+    code = 'import ' + ', '.join(modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=repodir,
+            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        (own, cumulative, name) = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def model_overhead():
+    """Seconds to import MODEL_MODULES beyond importing numpy and pandas, and seconds to
+       import numpy and pandas."""
+    base = importtime(['numpy', 'pandas'])
+    model = importtime(MODEL_MODULES)
+    base_time = sum(own for (own, _) in base.values())
+    overhead = sum(own for (name, (own, _)) in model.items() if name not in base)
+    return (overhead / 1e6, base_time / 1e6, model)
+
+
+def test_lazy_dependencies():
+    (_, _, model) = model_overhead()
+    for name in LAZY_MODULES:
+        assert name not in model, f'{name} is imported by the model package'
+
+
+@pytest.mark.slow
+def test_import_time_budget():
+    # best of a few runs, to not fail because of a busy machine.
+    ratios = []
+    for _ in range(3):
+        (overhead, base_time, _) = model_overhead()
+        ratios.append(overhead / base_time)
+    assert min(ratios) < BUDGET, f'model import takes {min(ratios):.2f}x numpy and pandas'
@@ -160,6 +160,38 @@ def test_empty_data():
     assert result.isna().all(axis=None, skipna=False)
 
 
+def test_fit_trends():
+    adoption_low_med_high = pd.DataFrame(adoption_low_med_high_list[1:],
+                                         columns=adoption_low_med_high_list[0], dtype=np.float64).set_index(
+        'Year')
+    data = adoption_low_med_high.copy()
+    data.loc[2015:2018, 'Low'] = np.nan  # a different set of missing values in one column
+    data.loc[:, 'Empty'] = np.nan
+    data.loc[2020, 'High'] = -1.0  # exponential fit of a column with a negative value
+    trends = ['Linear', '2nd Poly', '3rd Poly', 'Exponential', 'single']
+    result = itrp.fit_trends(data, trends=trends)
+    assert result.shape == (len(trends), 47, len(data.columns))
+    for (i, trend) in enumerate(trends):
+        for (j, column) in enumerate(data.columns):
+            expected = itrp.trend_algorithm(data=data[column], trend=trend)['adoption']
+            np.testing.assert_allclose(result[i, :, j], expected.values, rtol=1e-10)
+
+
+def test_trend_adoption():
+    adoption_low_med_high = pd.DataFrame(adoption_low_med_high_list[1:],
+                                         columns=adoption_low_med_high_list[0], dtype=np.float64).set_index(
+        'Year')
+    trends = ['Linear', 'Degree3', 'Linear']
+    result = itrp.trend_adoption(adoption_low_med_high, trends=trends)
+    assert list(result.columns) == list(adoption_low_med_high.columns)
+    assert result.index.name == 'Year'
+    for (column, trend) in zip(adoption_low_med_high.columns, trends):
+        expected = itrp.trend_algorithm(data=adoption_low_med_high[column], trend=trend)
+        pd.testing.assert_series_equal(result[column], expected['adoption'], check_names=False)
+    with pytest.raises(ValueError):
+        itrp.trend_adoption(adoption_low_med_high, trends=['Linear', 'invalid', 'Linear'])
+
+
 g_data_sources = {
     'Ambitious Cases': {
         'Ambitious 1': 'filename1',
@@ -1,6 +1,7 @@
 """Tests for metaclass_cache.py"""
 
 import pandas as pd
+from model import metaclass_cache
 from model.metaclass_cache import MetaclassCache
 
 # test_tam.py also exercises metaclass_cache.
@@ -32,3 +33,56 @@ def test_cache():
     a = MemoizedClass(df=df, number=6, number2=6)
     b = MemoizedClass(df=df, number=7, number2=7)
     assert a is not b
+
+
+class BoundedClass(object, metaclass=MetaclassCache):
+    cache_maxsize = 2
+
+    def __init__(self, number):
+        self.df = pd.DataFrame(number, index=range(100), columns=['A'])
+
+
+def test_lru_eviction():
+    BoundedClass.cache_clear()
+    a = BoundedClass(number=1)
+    b = BoundedClass(number=2)
+    assert BoundedClass(number=1) is a  # a is now most recently used
+    c = BoundedClass(number=3)  # evicts b
+    assert BoundedClass(number=1) is a
+    assert BoundedClass(number=3) is c
+    assert BoundedClass(number=2) is not b
+    stats = BoundedClass.cache_stats()
+    assert stats['size'] == 2
+    assert stats['hits'] == 3
+    assert stats['misses'] == 4
+    assert stats['evictions'] == 2
+
+
+def test_maxbytes():
+    BoundedClass.cache_clear()
+    nbytes = metaclass_cache._instance_nbytes(BoundedClass(number=0))
+    BoundedClass.cache_configure(maxsize=None, maxbytes=int(nbytes * 3.5))
+    instances = [BoundedClass(number=n) for n in range(10)]
+    stats = BoundedClass.cache_stats()
+    assert stats['size'] == 3
+    assert stats['nbytes'] <= stats['maxbytes']
+    assert BoundedClass(number=9) is instances[9]
+    BoundedClass.cache_clear()
+    assert BoundedClass.cache_stats()['maxsize'] == 2
+
+
+def test_clear_and_stats():
+    a = MemoizedClass(df=None, number=1, number2=2)
+    assert 'MemoizedClass' in metaclass_cache.stats()
+    metaclass_cache.clear()
+    assert MemoizedClass.cache_stats()['size'] == 0
+    assert MemoizedClass(df=None, number=1, number2=2) is not a
+
+
+def test_dataframe_hash_by_value():
+    df1 = pd.DataFrame(1.0, index=[1, 2, 3], columns=['A', 'B'])
+    df2 = df1.copy()
+    df3 = pd.DataFrame(1.0, index=[1, 2, 3], columns=['A', 'C'])
+    assert MetaclassCache.hash_item(MemoizedClass, df1) == MetaclassCache.hash_item(MemoizedClass, df2)
+    assert MetaclassCache.hash_item(MemoizedClass, df1) != MetaclassCache.hash_item(MemoizedClass, df3)
+    assert MemoizedClass(df=df1, number=0, number2=0) is MemoizedClass(df=df2, number=0, number2=0)
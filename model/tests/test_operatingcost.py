@@ -105,6 +105,30 @@ def test_conv_ref_annual_breakout_core():
     assert 2061 not in result.index
 
 
+def test_annual_breakout_cached_on_values():
+    idx = np.arange(2015, 2061)
+    funits = pd.Series(np.linspace(1.0, 46.0, 46), index=idx)
+    iunits = pd.Series(np.linspace(2.0, 92.0, 46), index=idx)
+    args = dict(lifetime_replacement=3.5, var_oper_cost_per_funit=0.1, fuel_cost_per_funit=0.2,
+            fixed_oper_cost_per_iunit=0.3, report_end_year=2050, has_var_costs=True,
+            conversion_factor_vom=1.0, conversion_factor_fom=1.0)
+    a = operatingcost.annual_breakout(funits, iunits, **args)
+    b = operatingcost.annual_breakout(funits.copy(), iunits.copy(), **args)
+    c = operatingcost.annual_breakout(funits * 2, iunits, **args)
+    assert a is b
+    assert a is not c
+    # equipment bought in 2015 is replaced every 3.5 years, covering 38.5 years.
+    assert a.loc[2052, 2015] == pytest.approx(1.0 * 0.3 + 2.0 * 0.3)
+    assert a.loc[2053, 2015] == pytest.approx(0.5 * (1.0 * 0.3 + 2.0 * 0.3))
+    assert a.loc[2054, 2015] == 0.0
+    assert (a.loc[:, 2051:] == 0.0).all().all()
+
+
+def test_replacement_lifetimes():
+    result = operatingcost.replacement_lifetimes(3.5, np.array([36, 35, 4, 3, 1]))
+    np.testing.assert_allclose(result, [38.5, 35.0, 3.5, 3.5, 3.5])
+
+
 def test_soln_pds_annual_operating_cost():
     oc = _defaultOperatingCost()
     result = oc.soln_pds_annual_operating_cost()
@@ -413,6 +437,16 @@ def test_soln_vs_conv_single_iunit_npv_purchase_year_discount_rate():
     pd.testing.assert_series_equal(result, expected, check_exact=False)
 
 
+def test_single_iunit_npv_matches_excel_formula():
+    numpy_financial = pytest.importorskip('numpy_financial')
+    oc = _defaultOperatingCost(npv_discount_rate=0.071, single_iunit_purchase_year=2025)
+    cashflow = oc.soln_vs_conv_single_iunit_cashflow()
+    offset = 2025 - cashflow.first_valid_index() + 1
+    expected = [numpy_financial.npv(rate=0.071, values=[0] * (n + offset) + [cashflow.iloc[n]])
+            for n in range(len(cashflow.index))]
+    np.testing.assert_array_equal(oc.soln_vs_conv_single_iunit_npv().values, expected)
+
+
 def test_soln_vs_conv_single_iunit_payback():
     oc = _defaultOperatingCost()
     result = oc.soln_vs_conv_single_iunit_payback()
@@ -0,0 +1,100 @@
+"""Tests for portfolio.py."""
+
+import dataclasses
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+from model import dd
+from model import portfolio
+
+
+@dataclasses.dataclass(frozen=True)
+class FakeControls:
+    scale: float = 1.0
+
+
+class FakeScenario:
+    """Just enough of a Scenario for extract(): c2.co2eq_mmt_reduced() and fc."""
+
+    def __init__(self, scale, scenario='default'):
+        self.scenario = scenario
+        self.ac = FakeControls(scale=scale)
+        years = list(range(2014, 2061))
+        mmt = pd.DataFrame(scale, index=years, columns=dd.REGIONS)
+        mmt.loc[2014] = np.nan
+        self.c2 = types.SimpleNamespace(co2eq_mmt_reduced=lambda: mmt)
+        self.fc = types.SimpleNamespace(
+                soln_pds_annual_world_first_cost=pd.Series(10.0 * scale, index=years))
+
+
+SECTORS = {'a': 'Food', 'b': 'Food', 'c': 'Materials'}
+
+
+def make_portfolio():
+    p = portfolio.Portfolio(outputs=['co2eq_mmt_reduced', 'soln_pds_annual_world_first_cost',
+        'marginal_annual_operating_cost'], sectors=SECTORS)
+    p.update('a', FakeScenario(1.0))
+    p.update('b', FakeScenario(2.0))
+    p.update('c', FakeScenario(4.0))
+    return p
+
+
+def test_stack():
+    p = make_portfolio()
+    stack = p.stack('co2eq_mmt_reduced')
+    assert stack.shape == (3, 47, len(dd.REGIONS))
+    assert stack[2, 1, 0] == 4.0
+    assert np.isnan(stack[0, 0, 0])
+    assert not stack.flags.writeable
+    # Series results are World only.
+    cost = p.stack('soln_pds_annual_world_first_cost')
+    assert cost[1, 5, 0] == 20.0
+    assert np.isnan(cost[1, 5, 1:]).all()
+    # missing outputs are NaN.
+    assert np.isnan(p.stack('marginal_annual_operating_cost')).all()
+
+
+def test_totals():
+    p = make_portfolio()
+    sectors = p.sector_totals('co2eq_mmt_reduced')
+    assert list(sectors.columns) == ['Food', 'Materials']
+    assert sectors.loc[2030, 'Food'] == pytest.approx(3.0)
+    assert sectors.loc[2030, 'Materials'] == pytest.approx(4.0)
+    assert sectors.loc[2014, 'Food'] == 0.0
+    total = p.total('co2eq_mmt_reduced')
+    assert total.loc[2050, 'China'] == pytest.approx(7.0)
+    solutions = p.solution_results('co2eq_mmt_reduced', region='EU')
+    assert list(solutions.columns) == ['a', 'b', 'c']
+    pd.testing.assert_series_equal(solutions.sum(axis=1), total['EU'], check_names=False)
+
+
+def test_update_only_recomputes_changes():
+    p = make_portfolio()
+    assert p.recomputed == 3
+    before = p.sector_totals('co2eq_mmt_reduced')
+    assert not p.update('b', FakeScenario(2.0))
+    assert p.recomputed == 3
+    assert p.sector_totals('co2eq_mmt_reduced') is before
+    assert p.update('b', FakeScenario(3.0))
+    assert p.recomputed == 4
+    assert p.sector_totals('co2eq_mmt_reduced').loc[2030, 'Food'] == pytest.approx(4.0)
+    assert p.stack('co2eq_mmt_reduced')[1, 10, 0] == 3.0
+
+
+def test_add_and_remove():
+    p = make_portfolio()
+    p.total('co2eq_mmt_reduced')
+    p.update('d', FakeScenario(8.0))
+    assert p.solutions == ['a', 'b', 'c', 'd']
+    assert p.sector_totals('co2eq_mmt_reduced').loc[2030, 'Other'] == pytest.approx(8.0)
+    p.remove('a')
+    assert p.stack('co2eq_mmt_reduced').shape[0] == 3
+    assert p.total('co2eq_mmt_reduced').loc[2030, 'World'] == pytest.approx(14.0)
+
+
+def test_solution_sectors():
+    sectors = portfolio.solution_sectors()
+    assert sectors['solarpvutil'] == 'Electricity Generation'
+    assert sectors['afforestation'] == 'Land Use'
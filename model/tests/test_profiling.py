@@ -0,0 +1,72 @@
+"""Tests for profiling.py."""
+
+import io
+from functools import lru_cache
+
+import pandas as pd
+import pytest
+from model import profiling
+from model.data_handler import DataHandler
+from model.decorators import data_func
+from model.metaclass_cache import MetaclassCache
+
+
+class Table(DataHandler, object, metaclass=MetaclassCache):
+    def __init__(self, rows):
+        self.rows = rows
+
+    @lru_cache()
+    def base(self):
+        return pd.Series(1.0, index=range(self.rows))
+
+    @lru_cache()
+    @data_func
+    def doubled(self):
+        return pd.DataFrame({'a': self.base() * 2, 'b': self.base()})
+
+
+@pytest.fixture
+def instrumented(monkeypatch):
+    monkeypatch.setattr(profiling, 'MODULES', (__name__,))
+    Table.cache_clear()
+    yield
+    profiling.disable()
+
+
+def test_stats(instrumented):
+    original = Table.__dict__['doubled']
+    with profiling.profile() as p:
+        t = Table(rows=5)
+        assert Table(rows=5) is t
+        t.doubled()
+        t.doubled()
+        assert Table.data_functions() == ('doubled',)
+    assert Table.__dict__['doubled'] is original
+    stats = p.stats()
+    assert stats.loc['Table()', 'Calls'] == 2
+    assert stats.loc['Table()', 'Hits'] == 1
+    assert stats.loc['Table.doubled', 'Calls'] == 2
+    assert stats.loc['Table.doubled', 'Hit Rate'] == 0.5
+    assert stats.loc['Table.doubled', 'Rows'] == 5
+    assert stats.loc['Table.doubled', 'Columns'] == 2
+    assert stats.loc['Table.base', 'Calls'] == 2
+    assert stats.loc['Table.doubled', 'Cumulative'] >= stats.loc['Table.base', 'Cumulative']
+    assert stats.loc['Table.doubled', 'Self'] <= stats.loc['Table.doubled', 'Cumulative']
+
+
+def test_write_folded(instrumented):
+    with profiling.profile() as p:
+        Table(rows=3).doubled()
+    stream = io.StringIO()
+    p.write_folded(stream, root='test')
+    stacks = dict(line.rsplit(' ', 1) for line in stream.getvalue().splitlines())
+    assert 'test;Table.doubled;Table.base' in stacks
+    assert all(int(v) > 0 for v in stacks.values())
+
+
+def test_only_one_profile(instrumented):
+    profiling.enable()
+    with pytest.raises(RuntimeError):
+        profiling.enable()
+    assert profiling.disable() is not None
+    assert profiling.disable() is None
@@ -128,6 +128,42 @@ def test_bass_diffusion_regions_NaN():
     pd.testing.assert_frame_equal(result, expected, check_exact=False)
 
 
+def test_sigmoid_logistic_vectorized_matches_per_region():
+    base_percent = np.array([0.346959145052, 0.677494504097, 0.0, 0.074153999059])
+    last_percent = np.array([0.95, 1.0, 0.212709603444, 0.0])
+    base_adoption = np.array([16577.8259167003, 14915.99, 325.933926458798, 1087.77094452167])
+    pds_tam_2050 = np.array([77969.4257883872, 30578.7612542884, 1532.2953039347, 25358.3339750411])
+    years = np.arange(2014, 2061)
+    (first_half, second_half) = s_curve.sigmoid_logistic(years=years, base_year=2014,
+            last_year=2050, base_percent=base_percent, last_percent=last_percent,
+            base_adoption=base_adoption, pds_tam_2050=pds_tam_2050)
+    assert first_half.shape == (len(years), 4)
+    sc = s_curve.SCurve(transition_period=None, sconfig=None)
+    for i in range(4):
+        expected = sc._sigmoid_logistic(base_year=2014, last_year=2050,
+                base_percent=base_percent[i], last_percent=last_percent[i],
+                base_adoption=base_adoption[i], pds_tam_2050=pds_tam_2050[i])
+        np.testing.assert_allclose(first_half[:, i], expected['first_half'].values)
+        np.testing.assert_allclose(second_half[:, i], expected['second_half'].values)
+    assert np.isnan(first_half[:, 2:]).all()
+
+
+def test_sigmoid_logistic_domain_error():
+    with pytest.raises(ValueError):
+        s_curve.sigmoid_logistic(years=[2014, 2015], base_year=2014, last_year=2050,
+                base_percent=[0.5, 1.0], last_percent=[0.9, 0.9],
+                base_adoption=[1.0, 1.0], pds_tam_2050=[10.0, 10.0])
+
+
+def test_bass_diffusion_base_year_per_region():
+    result = s_curve.bass_diffusion(years=np.arange(2014, 2018), base_year=[2014, 2016],
+            base_adoption=[10.0, 20.0], M=[100.0, 100.0], P=[0.001, 0.001], Q=[0.1, 0.1])
+    assert result[0, 0] == 10.0
+    assert result[1, 0] == pytest.approx(10.0 + (0.001 + 0.1 * 10.0 / 100.0) * 90.0)
+    assert np.isnan(result[:2, 1]).all()
+    assert result[2, 1] == 20.0
+
+
 
 
 # Building Automation System "S Curve"!AH24:AI70
@@ -0,0 +1,77 @@
+"""Tests for shared_data.py."""
+
+import pathlib
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from model import csv_cache
+from model import fairutil
+from model import shared_data
+
+datadir = pathlib.Path(__file__).parents[2].joinpath('data')
+
+
+@pytest.fixture
+def published(tmp_path, monkeypatch):
+    monkeypatch.delenv(shared_data.ENV, raising=False)
+    monkeypatch.setenv('DRAWDOWN_CACHE_DIR', '')
+    csv_cache.clear()
+    p = shared_data.publish(directory=tmp_path.joinpath('shared'))
+    yield p
+    p.close()
+    csv_cache.clear()
+
+
+def test_get(tmp_path, monkeypatch):
+    monkeypatch.delenv(shared_data.ENV, raising=False)
+    df = pd.DataFrame({'a': [1.0, 2.0], 'b': [3.0, 4.0]}, index=[2014, 2015])
+    df.name = 'table'
+    s = pd.Series([5.0, 6.0], index=['x', 'y'], name='series')
+    text = pd.DataFrame({'a': ['x', 'y']})
+    with shared_data.publish({'df': df, 's': s, 'text': text},
+            directory=tmp_path) as p:
+        assert sorted(p.keys) == ['df', 's']
+        result = shared_data.get('df')
+        pd.testing.assert_frame_equal(result, df)
+        assert result.name == 'table'
+        assert not result.values.flags.writeable
+        with pytest.raises(ValueError):
+            result.iloc[0, 0] = 0.0
+        result.index = result.index.astype(str)
+        assert list(shared_data.get('df').index) == [2014, 2015]
+        assert np.shares_memory(shared_data.get('df').values, shared_data.get('df').values)
+        pd.testing.assert_series_equal(shared_data.get('s'), s)
+        assert shared_data.get('text') is None
+    assert shared_data.get('df') is None
+    assert not tmp_path.exists()
+
+
+def test_read_csv(published):
+    filename = str(datadir.joinpath('unitadoption_ref_population.csv'))
+    kwargs = shared_data.UNITADOPTION_CSV_ARGS
+    assert csv_cache.cache_key(filename, **kwargs) in published.keys
+    shared = csv_cache.read_csv(filename, copy=False, **kwargs)
+    pd.testing.assert_frame_equal(shared, pd.read_csv(filename, **kwargs))
+    assert not shared.values.flags.writeable
+    copied = csv_cache.read_csv(filename, **kwargs)
+    copied.iloc[0, 0] = 0.0
+    assert shared.iloc[0, 0] != 0.0
+
+
+def test_baseline_emissions(published):
+    b = fairutil.baseline_emissions()
+    assert not b.values.flags.writeable
+    assert 2015 in b.index
+
+
+def test_child_process(published):
+    code = ('from model import fairutil, shared_data;'
+            'b = fairutil.baseline_emissions();'
+            'print(b.values.flags.writeable, b.loc[2015])')
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+            check=True, cwd=str(datadir.parent))
+    b = fairutil.baseline_emissions()
+    assert result.stdout.split() == ['False', str(b.loc[2015])]
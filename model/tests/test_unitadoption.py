@@ -1,6 +1,7 @@
 """Tests for unitadoption.py."""
 
 import pathlib
+import timeit
 import numpy as np
 import pandas as pd
 import pytest
@@ -766,6 +767,44 @@ def test_soln_pds_tot_iunits_reqd():
     pd.testing.assert_frame_equal(result, expected, check_exact=False)
 
 
+def _add_replacement_units_loop(new_units, funits_adopted, lifetime):
+    """Reference implementation, the cell-by-cell loop add_replacement_units replaced."""
+    result = new_units.copy()
+    for region in result.columns:
+        for year in result.index:
+            replacement_year = int(year - (lifetime + 1))
+            if replacement_year in result.index:
+                if funits_adopted.loc[replacement_year, region] <= funits_adopted.loc[year, region]:
+                    result.at[year, region] += result.at[replacement_year, region]
+    return result
+
+
+@pytest.mark.parametrize('lifetime', [0, 1, 3, 7, 12, 30, 50])
+def test_add_replacement_units_matches_loop(lifetime):
+    rng = np.random.default_rng(lifetime)
+    index = pd.Index(range(2014, 2061), name='Year')
+    funits = pd.DataFrame(rng.normal(100.0, 30.0, size=(len(index), 10)), index=index,
+            columns=list('ABCDEFGHIJ'))
+    funits.iloc[5:9, 2] = np.nan
+    growth = funits.diff().clip(lower=0).iloc[1:]
+    expected = _add_replacement_units_loop(growth, funits, lifetime)
+    result = unitadoption.add_replacement_units(growth, funits, lifetime)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.slow
+def test_add_replacement_units_benchmark():
+    """Microbenchmark: the vectorized recurrence against the cell-by-cell loop."""
+    index = pd.Index(range(2014, 2061), name='Year')
+    funits = pd.DataFrame(np.random.default_rng(0).normal(100.0, 30.0, size=(len(index), 10)),
+            index=index, columns=list('ABCDEFGHIJ'))
+    growth = funits.diff().clip(lower=0).iloc[1:]
+    loop = timeit.timeit(lambda: _add_replacement_units_loop(growth, funits, 3), number=10) / 10
+    vectorized = timeit.timeit(
+            lambda: unitadoption.add_replacement_units(growth, funits, 3), number=100) / 100
+    assert vectorized < loop
+
+
 def test_soln_pds_new_iunits_reqd():
     soln_pds_funits_adopted = pd.DataFrame(soln_pds_funits_adopted_list[1:],
             columns=soln_pds_funits_adopted_list[0]).set_index('Year')
@@ -305,6 +305,40 @@ def test_avg_high_low_by_region_with_special_countries():
     assert result[0] == pytest.approx(0.5)
 
 
+def test_quantile():
+    f = io.StringIO("""Source ID, Raw Data Input, Original Units, Conversion calculation, Weight, Exclude Data?, Thermal-Moisture Regime, World / Drawdown Region
+      A, 0.4, Mha,, 1.0, False, Temperate/Boreal-Humid, OECD90
+      B, 0.5, Mha,, 3.0, False, Temperate/Boreal-Humid, OECD90
+      C, 0.6, Mha,, 1.0, False, Tropical-Humid, Latin America
+      D, 9.9, Mha,, 1.0, True, Tropical-Humid, Latin America
+      """)
+    v = vma.VMA(filename=f)
+    q = np.array([0.0, 0.3, 0.4, 0.7, 0.99])
+    np.testing.assert_array_equal(v.quantile(q), [0.4, 0.4, 0.5, 0.6, 0.6])
+    np.testing.assert_array_equal(v.quantile(q, regime='Tropical-Humid'), [0.6] * 5)
+    np.testing.assert_array_equal(v.quantile(q, region='OECD90'), [0.4, 0.4, 0.4, 0.5, 0.5])
+    v = vma.VMA(filename=None)
+    assert np.isnan(v.quantile(q)).all()
+
+
+def test_quantile_weights():
+    f = io.StringIO("""Source ID, Raw Data Input, Original Units, Conversion calculation, Weight, Exclude Data?, Thermal-Moisture Regime, World / Drawdown Region
+      A, 0.4, Mha,, 1.0, False, Temperate/Boreal-Humid, OECD90
+      B, 0.5, Mha,, 3.0, False, Temperate/Boreal-Humid, OECD90
+      """)
+    v = vma.VMA(filename=f, use_weight=True)
+    np.testing.assert_array_equal(v.quantile([0.2, 0.3]), [0.4, 0.5])
+
+
+def test_quantile_fixed_summary():
+    v = vma.VMA(filename=None, fixed_summary=(2.0, 4.0, 1.0))
+    result = v.quantile(np.linspace(0.0, 1.0, 101))
+    assert result[0] == pytest.approx(1.0)
+    assert result[-1] == pytest.approx(4.0)
+    assert result[33] == pytest.approx(2.0, abs=0.01)
+    assert (np.diff(result) >= 0).all()
+
+
 def test_no_warnings_in_avg_high_low():
     f = io.StringIO("""Source ID, Raw Data Input, Original Units, Conversion calculation, Weight, Exclude Data?, Thermal-Moisture Regime, World / Drawdown Region
       A, 1.0, Mha,, 0.0, False
@@ -438,3 +472,47 @@ def test_invalid_float_range():
     assert not np.isinf(mean)
     assert not pd.isna(high)
     assert not pd.isna(low)
+
+def test_csv_read_on_first_use(tmp_path):
+    f = tmp_path.joinpath('vma.csv')
+    v = vma.VMA(filename=f)  # does not exist yet, so must not be read here.
+    f.write_text("""Source ID, Raw Data Input, Original Units, Conversion calculation, Weight, Exclude Data?, Thermal-Moisture Regime, World / Drawdown Region
+      A, 0.4, Mha,, 1.0, False
+      B, 0.6, Mha,, 1.0, False
+      """)
+    assert v.avg_high_low(key='mean') == pytest.approx(0.5)
+    assert len(v.source_data.index) == 2
+
+def test_convert_columns():
+    column = pd.Series(['12%', ' 5 ', '10-15%', 'nan', 'NaN%', 'abc', np.nan, 3, '1e3', '%%7%'],
+            dtype=object)
+    expected = column.apply(vma.convert_percentages)
+    pd.testing.assert_series_equal(vma._convert_percentages_column(column), expected)
+    numbers = pd.Series([1.0, np.nan, 2.5])
+    pd.testing.assert_series_equal(vma._convert_percentages_column(numbers), numbers)
+    column = pd.Series(['nan', 'NAN', 1.5, np.nan, 'text'], dtype=object)
+    pd.testing.assert_series_equal(vma._convert_NaN_column(column),
+            column.apply(vma.convert_NaN))
+
+@pytest.mark.parametrize('use_weight', [False, True])
+def test_avg_high_low_groups(use_weight):
+    f = io.StringIO("""Source ID, Raw Data Input, Original Units, Conversion calculation, Weight, Exclude Data?, Thermal-Moisture Regime, World / Drawdown Region
+      A, 0.4, Mha,, 1.0, False, Temperate/Boreal-Humid, OECD90
+      B, 0.5, Mha,, 2.0, False, Temperate/Boreal-Humid, USA
+      C, 0.6, Mha,, 1.0, False, Tropical-Humid, Latin America
+      D, 0.9, Mha,, 1.0, False, Tropical-Humid, OECD90
+      E, 0.7, Mha,, 1.0, False, , China
+      F, 9.9, Mha,, 1.0, True, Tropical-Humid, OECD90
+      """)
+    v = vma.VMA(filename=f, use_weight=use_weight)
+    total_weights = v.df['Weight'].sum()
+    for regime in (None, 'Temperate/Boreal-Humid', 'Tropical-Humid', 'Arctic/Tundra'):
+        for region in (None, 'World', 'OECD90', 'USA', 'Asia (Sans Japan)', 'India'):
+            (mean, high, low) = v.avg_high_low(regime=regime, region=region)
+            sources = v._sources(regime=regime, region=region)
+            if use_weight:
+                expected = (sources['Value'] * sources['Weight']).sum() / total_weights
+            else:
+                expected = sources['Value'].mean()
+            assert mean == pytest.approx(expected, nan_ok=True)
+            assert (high - mean) == pytest.approx(mean - low, nan_ok=True)
@@ -7,8 +7,10 @@ import pandas as pd
 import numpy as np
 from io import StringIO
 
+from model import csv_cache
 from model import dd
 from model import emissionsfactors
+from model import shared_data
 from model.advanced_controls import SOLUTION_CATEGORY
 
 from model.data_handler import DataHandler
@@ -50,6 +52,37 @@ def cumulative_degraded_land(
         df.loc[y, :] = row
     return df
 
+def add_replacement_units(new_units, funits_adopted, lifetime):
+    """Add units which need replacing to new_units, returning a new DataFrame.
+
+       Units added N = lifetime + 1 years earlier wear out and are replaced, if
+       adoption did not drop in the meantime (funits_adopted N years earlier <= this
+       year). Replacements are themselves replaced, so this is a recurrence with a
+       period of N years: each block of N years is computed at once from the block
+       before it, over all regions.
+
+       new_units: DataFrame of new units per year (index of consecutive years) and region.
+       funits_adopted: DataFrame of functional units adopted, covering the years of new_units
+         and the N years before them.
+       lifetime: the rounded lifetime of a unit, in years.
+    """
+    result = new_units.copy()
+    shift = int(lifetime + 1)
+    values = result.to_numpy(dtype=np.float64, copy=True)
+    years = result.index
+    if 0 < shift < len(years):
+        fa = funits_adopted.loc[:, result.columns]
+        prior = fa.loc[years[shift:] - shift].to_numpy(dtype=np.float64)
+        current = fa.loc[years[shift:]].to_numpy(dtype=np.float64)
+        replace = prior <= current
+        for start in range(shift, len(years), shift):
+            end = min(start + shift, len(years))
+            mask = replace[start - shift:end - shift]
+            values[start:end] += np.where(mask, values[start - shift:end - shift], 0.0)
+    result.loc[:, :] = values
+    return result
+
+
 class UnitAdoption(DataHandler):
     """Implementation for the Unit Adoption module.
 
@@ -90,8 +123,8 @@ class UnitAdoption(DataHandler):
            SolarPVUtil 'Unit Adoption Calculations'!P16:Z63
         """
         filename = os.path.join(self.datadir, 'unitadoption_ref_population.csv')
-        result = pd.read_csv(filename, index_col=0, skipinitialspace=True,
-                             skip_blank_lines=True, comment='#')
+        result = csv_cache.read_csv(filename, copy=False,
+                **shared_data.UNITADOPTION_CSV_ARGS)
         result.index = result.index.astype(int)
         result.name = "ref_population"
         return result
@@ -103,8 +136,8 @@ class UnitAdoption(DataHandler):
            SolarPVUtil 'Unit Adoption Calculations'!AB16:AL63
         """
         filename = os.path.join(self.datadir, 'unitadoption_ref_gdp.csv')
-        result = pd.read_csv(filename, index_col=0, skipinitialspace=True,
-                             skip_blank_lines=True, comment='#')
+        result = csv_cache.read_csv(filename, copy=False,
+                **shared_data.UNITADOPTION_CSV_ARGS)
         result.index = result.index.astype(int)
         result.name = "ref_gdp"
         return result
@@ -155,8 +188,8 @@ class UnitAdoption(DataHandler):
            SolarPVUtil 'Unit Adoption Calculations'!P68:Z115
         """
         filename = os.path.join(self.datadir, 'unitadoption_pds_population.csv')
-        result = pd.read_csv(filename, index_col=0, skipinitialspace=True,
-                             skip_blank_lines=True, comment='#')
+        result = csv_cache.read_csv(filename, copy=False,
+                **shared_data.UNITADOPTION_CSV_ARGS)
         result.index = result.index.astype(int)
         result.name = "pds_population"
         return result
@@ -167,8 +200,8 @@ class UnitAdoption(DataHandler):
            SolarPVUtil 'Unit Adoption Calculations'!AB68:AL115
         """
         filename = os.path.join(self.datadir, 'unitadoption_pds_gdp.csv')
-        result = pd.read_csv(filename, index_col=0, skipinitialspace=True,
-                             skip_blank_lines=True, comment='#')
+        result = csv_cache.read_csv(filename, copy=False,
+                **shared_data.UNITADOPTION_CSV_ARGS)
         result.index = result.index.astype(int)
         result.name = "pds_gdp"
         return result
@@ -409,17 +442,11 @@ class UnitAdoption(DataHandler):
         """
         if self.repeated_cost_for_iunits:
             return self.soln_pds_tot_iunits_reqd().iloc[1:].copy(deep=True).clip(lower=0.0)
-        result = self.soln_pds_tot_iunits_reqd().diff().clip(lower=0).iloc[1:]  # [0] nan w/ diff
-        for region, column in result.iteritems():
-            for year, value in column.iteritems():
-                # Add replacement units, if needed by adding the number of units
-                # added N * soln_lifetime_replacement ago, that now need replacement.
-                replacement_year = int(year - (self.ac.soln_lifetime_replacement_rounded + 1))
-                if replacement_year in result.index:
-                    fa = self.soln_pds_funits_adopted
-                    prior_year = year - self.ac.soln_lifetime_replacement_rounded - 1
-                    if fa.loc[prior_year, region] <= fa.loc[year, region]:
-                        result.at[year, region] += result.at[replacement_year, region]
+        growth = self.soln_pds_tot_iunits_reqd().diff().clip(lower=0).iloc[1:]  # [0] nan w/ diff
+        # Add replacement units, if needed by adding the number of units
+        # added N * soln_lifetime_replacement ago, that now need replacement.
+        result = add_replacement_units(new_units=growth, funits_adopted=self.soln_pds_funits_adopted,
+                lifetime=self.ac.soln_lifetime_replacement_rounded)
         result.name = "soln_pds_new_iunits_reqd"
         return result
 
@@ -469,34 +496,21 @@ class UnitAdoption(DataHandler):
         """
         if self.repeated_cost_for_iunits:
             return self.soln_ref_tot_iunits_reqd().iloc[1:].copy(deep=True).clip(lower=0.0)
-        result = self.soln_ref_tot_iunits_reqd().diff().clip(lower=0).iloc[1:]  # [0] NaN w/ diff
-        for region, column in result.iteritems():
-            for year, value in column.iteritems():
-                # Add replacement units, if needed by adding the number of units
-                # added N * soln_lifetime_replacement ago, that now need replacement.
-                replacement_year = int(year - (self.ac.soln_lifetime_replacement_rounded + 1))
-                if replacement_year in result.index:
-                    fa = self.soln_ref_funits_adopted
-                    prior_year = year - self.ac.soln_lifetime_replacement_rounded - 1
-                    if fa.loc[prior_year, region] <= fa.loc[year, region]:
-                        result.at[year, region] += result.at[replacement_year, region]
-        return result
+        growth = self.soln_ref_tot_iunits_reqd().diff().clip(lower=0).iloc[1:]  # [0] NaN w/ diff
+        # Add replacement units, if needed by adding the number of units
+        # added N * soln_lifetime_replacement ago, that now need replacement.
+        return add_replacement_units(new_units=growth, funits_adopted=self.soln_ref_funits_adopted,
+                lifetime=self.ac.soln_lifetime_replacement_rounded)
 
     def soln_ref_new_iunits_reqd_LAND(self):
         """New implementation units required (includes replacement units), LAND version
            Afforestation 'Unit Adoption Calculations'!AG197:AQ244
         """
-        result = self.soln_ref_funits_adopted.diff().clip(lower=0).iloc[1:]  # [0] NaN w/ diff
-        for region, column in result.iteritems():
-            for year, value in column.iteritems():
-                # Add replacement units, if needed by adding the number of units
-                # added N * conv_lifetime_replacement ago, that now need replacement.
-                replacement_year = int(year - (self.ac.conv_lifetime_replacement_rounded + 1))
-                if replacement_year in result.index:
-                    fa = self.soln_ref_funits_adopted
-                    if fa.at[replacement_year, region] <= fa.at[year, region]:
-                        result.at[year, region] += result.at[replacement_year, region]
-        return result
+        growth = self.soln_ref_funits_adopted.diff().clip(lower=0).iloc[1:]  # [0] NaN w/ diff
+        # Add replacement units, if needed by adding the number of units
+        # added N * conv_lifetime_replacement ago, that now need replacement.
+        return add_replacement_units(new_units=growth, funits_adopted=self.soln_ref_funits_adopted,
+                lifetime=self.ac.conv_lifetime_replacement_rounded)
 
     @lru_cache()
     def soln_ref_new_iunits_reqd(self):
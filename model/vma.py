@@ -1,15 +1,13 @@
 """Implementation of the Variable Meta-Analysis module."""
 
 import io
-import math
 import pathlib
 
 import numpy as np
 import pandas as pd
-import openpyxl
 
+from model import csv_cache
 import model.dd
-from tools.vma_xls_extract import VMAReader
 
 
 VMA_columns = ['Value', 'Units', 'Raw', 'Weight', 'Exclude?', 'Region', 'Main Region', 'TMR']
@@ -70,6 +68,31 @@ def convert_NaN(val):
     return val
 
 
+def _convert_percentages_column(column):
+    """convert_percentages() of every value of a Series, as a float64 Series."""
+    values = pd.to_numeric(column, errors='coerce').astype(np.float64)
+    if column.dtype.kind in 'biuf':
+        return values
+    # Values which are not plain numbers: percentages, 'nan' spelled out, or invalid.
+    failed = values.isna() & column.notna()
+    if failed.any():
+        text = column[failed].astype(str).str.strip()
+        percent = text.str.endswith('%')
+        text = text.where(~percent, text.str.strip('%').str.strip())
+        parsed = pd.to_numeric(text, errors='coerce')
+        parsed = parsed.where(~percent, parsed / 100.0)
+        is_nan = text.str.lower().isin(['nan', '+nan', '-nan'])
+        values[failed] = parsed.where(parsed.notna() | is_nan, np.inf)
+    return values
+
+
+def _convert_NaN_column(column):
+    """convert_NaN() of every value of a Series."""
+    if column.dtype != object:
+        return column
+    return column.mask(column.astype(str).str.lower() == 'nan').infer_objects()
+
+
 class VMA:
     """Meta-analysis of multiple data sources to a summary result.
        Arguments:
@@ -90,6 +113,9 @@ class VMA:
          stat_correction: discard outliers more than discard_multiplier stddev away from the mean.
          fixed_summary: if present, should be a tuple to use for (mean, high, low) instead
            of calculating those values
+
+       CSV files are not read until the data is first needed: a solution module creates a
+       VMA for every table in its vma_data directory, but most scenarios use a few of them.
     """
 
     def __init__(self, filename, title=None, low_sd=1.0, high_sd=1.0,
@@ -108,7 +134,10 @@ class VMA:
         else:
             self.stat_correction = stat_correction
         self.fixed_summary = fixed_summary
+        self._pending = None  # CSV file to read on first use
+        self._summaries = None
         self.df = pd.DataFrame(columns=VMA_columns)
+        self.source_data = pd.DataFrame()
 
         if filename:
             # Turn strings into pathlib
@@ -116,16 +145,42 @@ class VMA:
                 filename = pathlib.Path(filename)
 
             # Instantiate VMA with various file types
-            if isinstance(filename, io.StringIO) or filename.suffix == '.csv':
+            if isinstance(filename, io.StringIO):
                 self._read_csv(filename=filename)
+            elif filename.suffix == '.csv':
+                self._pending = filename
             elif filename.suffix == '.xlsx' or filename.suffix == '.xlsm':
                 self._read_xls(filename=filename, title=title)
             else:
                 raise ValueError(
                     f'{filename!r} is not a recognized filetype for vma.VMA'
                 )
-        else:
-            self.source_data = pd.DataFrame()
+
+    @property
+    def df(self):
+        """DataFrame of the sources with columns VMA_columns, cleaned up for use."""
+        self._load()
+        return self._df
+
+    @df.setter
+    def df(self, value):
+        self._df = value
+        self._summaries = None
+
+    @property
+    def source_data(self):
+        """DataFrame of the sources as read from the file."""
+        self._load()
+        return self._source_data
+
+    @source_data.setter
+    def source_data(self, value):
+        self._source_data = value
+
+    def _load(self):
+        if self._pending is not None:
+            self._read_csv(filename=self._pending)
+            self._pending = None
 
     def _read_csv(self, filename):
         """
@@ -137,7 +192,7 @@ class VMA:
 
         Populates self.source_data and self.df
         """
-        csv_df = pd.read_csv(filename, index_col=False, skipinitialspace=True, skip_blank_lines=True)
+        csv_df = csv_cache.read_csv(filename, index_col=False, skipinitialspace=True, skip_blank_lines=True)
         self._convert_from_human_readable(csv_df, filename)
 
     def _read_xls(self, filename, title):
@@ -152,6 +207,10 @@ class VMA:
         Populates self.source_data, self.df, and self.fixed_summary if the
         required values are present.
         """
+        # openpyxl is slow to import and only needed for Excel files.
+        import openpyxl
+        from tools.vma_xls_extract import VMAReader
+
         workbook = openpyxl.load_workbook(filename=filename,data_only=True,keep_links=False)
         vma_reader = VMAReader(workbook)
         if 'Variable Meta-analysis-DD' in workbook.sheetnames:
@@ -199,26 +258,25 @@ class VMA:
         if self.use_weight:
             err = f"'Use weight' selected but no weights to use in {filename}"
             assert not all(pd.isnull(readable_df['Weight'])), err
-        self.df['Weight'] = readable_df['Weight'].apply(convert_percentages)
-        self.df['Raw'] = readable_df['Raw Data Input'].apply(convert_percentages)
-        self.df['Units'] = readable_df['Original Units']
-        self.df['Value'] = readable_df['Conversion calculation'].apply(convert_NaN)
-        self.df['Exclude?'] = readable_df['Exclude Data?'].fillna(False)
+        df = pd.DataFrame(columns=VMA_columns)
+        df['Weight'] = _convert_percentages_column(readable_df['Weight'])
+        df['Raw'] = _convert_percentages_column(readable_df['Raw Data Input'])
+        df['Units'] = readable_df['Original Units']
+        df['Value'] = _convert_NaN_column(readable_df['Conversion calculation'])
+        df['Exclude?'] = readable_df['Exclude Data?'].fillna(False)
         # correct some common typos and capitalization differences from Excel files.
         normalized_region = (readable_df['World / Drawdown Region']
                 .replace('Middle East & Africa', 'Middle East and Africa')
                 .replace('Asia (sans Japan)', 'Asia (Sans Japan)'))
         readable_df['World / Drawdown Region'] = normalized_region.astype(model.dd.rgn_cat_dtype)
-        self.df['Region'] = readable_df['World / Drawdown Region']
-        main_region = normalized_region.copy()
-        for k, v in model.dd.COUNTRY_REGION_MAP.items():
-            main_region.replace(k, v, inplace=True)
-        self.df['Main Region'] = main_region
+        df['Region'] = readable_df['World / Drawdown Region']
+        df['Main Region'] = normalized_region.replace(model.dd.COUNTRY_REGION_MAP)
         if 'Thermal-Moisture Regime' in readable_df.columns:
             dft = readable_df['Thermal-Moisture Regime'].astype(model.dd.tmr_cat_dtype)
             readable_df['Thermal-Moisture Regime'] = dft
-            self.df['TMR'] = readable_df['Thermal-Moisture Regime'].fillna('')
-        self.df['Value'].fillna(self.df['Raw'], inplace=True)
+            df['TMR'] = readable_df['Thermal-Moisture Regime'].fillna('')
+        df['Value'].fillna(df['Raw'], inplace=True)
+        self.df = df
 
     def _validate_readable_df(self, readable_df):
         if readable_df is None:
@@ -241,6 +299,144 @@ class VMA:
         df = df[valid]
         return df
 
+    def _sources(self, regime=None, region=None):
+        """Rows of self.df included in the statistics for regime and region."""
+        df = self._discard_outliers() if self.stat_correction else self.df
+        df = df.loc[df['Exclude?'] == False]
+        if regime:
+            df = df.loc[df['TMR'] == regime]
+        if region in model.dd.SPECIAL_COUNTRIES:
+            df = df.loc[df['Region'] == region]
+        elif region in model.dd.MAIN_REGIONS:
+            # include values for special countries in corresponding main regions' statistics
+            df = df.loc[df['Main Region'] == region]
+        return df
+
+    @staticmethod
+    def _group_key(regime=None, region=None):
+        """Key of the (regime, region) group of sources selected by _sources()."""
+        if region not in model.dd.SPECIAL_COUNTRIES and region not in model.dd.MAIN_REGIONS:
+            region = None
+        return (regime or None, region)
+
+    def _compute_summaries(self):
+        """(mean, sd) of the sources of every group which has any, computed together.
+
+           Each source belongs to up to six groups: any or its own regime, crossed with
+           any region, its special country and its main region. Returns a dict of
+           _group_key() to (mean, sd), plus the entry None for a group with no sources.
+        """
+        df = self._sources()
+        rows = np.arange(len(df.index))
+        regime = df['TMR'].astype(object).where(df['TMR'].notna(), '')
+        region = df['Region'].astype(object)
+        special = region.where(region.isin(model.dd.SPECIAL_COUNTRIES), '')
+        main = df['Main Region'].astype(object)
+        main = main.where(main.isin(model.dd.MAIN_REGIONS), '')
+        # Rows of each of the six kinds of group, with '' for "any" regime or region.
+        anywhere = np.full(len(rows), '', dtype=object)
+        (group_regimes, group_regions, group_rows) = ([], [], [])
+        for r in (anywhere, regime.to_numpy()):
+            for g in (anywhere, special.to_numpy(), main.to_numpy()):
+                keep = ((r is anywhere) | (r != '')) & ((g is anywhere) | (g != ''))
+                group_regimes.append(r[keep])
+                group_regions.append(g[keep])
+                group_rows.append(rows[keep])
+        (regime_codes, regimes) = pd.factorize(np.concatenate(group_regimes))
+        (region_codes, regions) = pd.factorize(np.concatenate(group_regions))
+        (codes, uniques) = pd.factorize(regime_codes * len(regions) + region_codes)
+        keys = [(regimes[c // len(regions)], regions[c % len(regions)]) for c in uniques]
+        rows = np.concatenate(group_rows)
+        ngroups = len(keys) + 1  # the last group is empty.
+
+        values = df['Value'].to_numpy(dtype=np.float64)[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.use_weight:
+                # Sum the weights before discarding outliers, to match Excel.
+                # https://docs.google.com/document/d/19sq88J_PXY-y_EnqbSJDl0v9CdJArOdFLatNNUFhjEA/edit#heading=h.qkdzs364y2t2
+                # Once reproducing Excel results is no longer essential, total_weights can be
+                # the sum of the weights of only the sources included in the mean.
+                all_weights = self.df['Weight'].fillna(1.0)
+                total_weights = all_weights.sum()
+                total_weights = total_weights if total_weights != 0.0 else 1.0
+                M = (all_weights != 0).sum()
+                weights = df['Weight'].fillna(1.0).to_numpy(dtype=np.float64)[rows]
+                weighted = weights * values
+                mean = np.bincount(codes, weights=np.where(np.isnan(weighted), 0.0, weighted),
+                        minlength=ngroups) / total_weights
+                if M == 0.0:
+                    sd = np.zeros(ngroups)
+                else:
+                    # A weighted standard deviation is not the same as stddev()
+                    deviation = weights * ((values - mean[codes]) ** 2)
+                    numerator = np.bincount(codes, minlength=ngroups,
+                            weights=np.where(np.isnan(deviation), 0.0, deviation))
+                    # when Excel is deprecated, remove all_weights and use: M = (weights != 0).sum()
+                    denominator = ((M - 1) / M) * total_weights
+                    sd = np.sqrt(numerator / denominator)
+            else:
+                # mean skipping NaN, and whole population stddev (ddof=0)
+                valid = ~np.isnan(values)
+                count = np.bincount(codes, weights=valid, minlength=ngroups)
+                mean = np.bincount(codes, weights=np.where(valid, values, 0.0),
+                        minlength=ngroups) / count
+                deviation = np.where(valid, (values - mean[codes]) ** 2, 0.0)
+                sd = np.sqrt(np.bincount(codes, weights=deviation, minlength=ngroups) / count)
+
+        summaries = {(r or None, g or None): (mean[i], sd[i]) for (i, (r, g)) in enumerate(keys)}
+        summaries[None] = (mean[-1], sd[-1])
+        return summaries
+
+    def _summary(self, regime=None, region=None):
+        """(mean, sd) of the sources for regime and region."""
+        settings = (self.use_weight, self.stat_correction, self.discard_multiplier)
+        if self._summaries is None or self._summaries[0] != settings:
+            self._summaries = (settings, self._compute_summaries())
+        summaries = self._summaries[1]
+        key = self._group_key(regime=regime, region=region)
+        return summaries[key] if key in summaries else summaries[None]
+
+    def quantile(self, q, regime=None, region=None):
+        """
+        Inverse of the distribution of source values, for drawing random samples.
+        Args:
+          q: array of probabilities in [0, 1], like numpy.random.Generator.random(n).
+          regime: string name of the thermal moisture regime to select sources for.
+          region: string name of the world region to select sources for.
+
+        Returns:
+          array of values the same shape as q. Sources are selected as in avg_high_low()
+          and each is drawn with probability proportional to its weight if use_weight,
+          otherwise equally likely. If fixed_summary is set the source values are not
+          used, values are drawn from a triangular distribution with mode mean between
+          low and high. NaN if there are no sources.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.fixed_summary is not None:
+            (mean, high, low) = self.fixed_summary
+            (mode, high, low) = (float(mean), float(high), float(low))
+            if high <= low:
+                return np.full(q.shape, mode)
+            split = (mode - low) / (high - low)
+            below = low + np.sqrt(q * (high - low) * (mode - low))
+            above = high - np.sqrt((1.0 - q) * (high - low) * (high - mode))
+            return np.where(q < split, below, above)
+
+        df = self._sources(regime=regime, region=region) if not self.df.empty else self.df
+        values = df['Value'].to_numpy(dtype=np.float64)
+        if self.use_weight:
+            weights = df['Weight'].fillna(1.0).to_numpy(dtype=np.float64)
+        else:
+            weights = np.ones(len(values))
+        valid = ~np.isnan(values) & (weights > 0)
+        (values, weights) = (values[valid], weights[valid])
+        if not len(values):
+            return np.full(q.shape, np.nan)
+        order = np.argsort(values, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        idx = np.searchsorted(cumulative / cumulative[-1], q, side='right')
+        return values[order][np.minimum(idx, len(values) - 1)]
+
     def avg_high_low(self, key=None, regime=None, region=None):
         """
         Args:
@@ -252,48 +448,13 @@ class VMA:
           By default returns (mean, high, low) using low_sd/high_sd.
           If key is specified will return associated value only
         """
-        if self.use_weight:
-            # Sum the weights before discarding outliers, to match Excel.
-            # https://docs.google.com/document/d/19sq88J_PXY-y_EnqbSJDl0v9CdJArOdFLatNNUFhjEA/edit#heading=h.qkdzs364y2t2
-            # Once reproducing Excel results is no longer essential, total_weight computation
-            # can be moved down to the second use_weight conditional below. That way the sum
-            # of the weights will only include sources which are being included in the mean.
-            total_weights = self.df['Weight'].fillna(1.0).sum()
-            total_weights = total_weights if total_weights != 0.0 else 1.0
-            all_weights = self.df['Weight'].fillna(1.0)
-            M = (all_weights != 0).sum()
-
         if self.fixed_summary is not None:
             (mean, high, low) = self.fixed_summary
         elif self.df.empty:
             mean = high = low = np.nan
         else:
-            df = self._discard_outliers() if self.stat_correction else self.df
-            df = df.loc[df['Exclude?'] == False]
-            if regime:
-                df = df.loc[df['TMR'] == regime]
-            if region in model.dd.SPECIAL_COUNTRIES:
-                df = df.loc[df['Region'] == region]
-            elif region in model.dd.MAIN_REGIONS:
-                # include values for special countries in corresponding main regions' statistics
-                df = df.loc[df['Main Region'] == region]
-
-            if self.use_weight:
-                weights = df['Weight'].fillna(1.0)
-                mean = (df['Value'] * weights).sum(skipna=True) / total_weights
-                if M == 0.0:
-                    sd = 0.0
-                else:
-                    # A weighted standard deviation is not the same as stddev()
-                    numerator = (weights * ((df['Value'] - mean) ** 2)).sum()
-                    # when Excel is deprecated, remove all_weights and use: M = (weights != 0).sum()
-                    denominator = ((M - 1) / M) * total_weights
-                    sd = math.sqrt(numerator / denominator)
-            else:
-                mean = df['Value'].mean(skipna=True)
-                # whole population stddev, ddof=0
-                sd = df['Value'].std(ddof=0)
-
+            # Statistics of all groups of sources are computed once, see _compute_summaries.
+            (mean, sd) = self._summary(regime=regime, region=region)
             high = mean + (self.high_sd * sd)
             low = mean - (self.low_sd * sd)
 
@@ -0,0 +1,215 @@
+"""Run many solution scenarios in parallel.
+
+Fans (solution, scenario) pairs out across a pool of worker processes. Each worker
+pre-imports the solution modules it will need, so the cost of loading VMAs and
+Advanced Controls is paid once per worker rather than once per scenario. Results
+are streamed back as each job finishes, together with its wall time and any error.
+
+It can be run as a script ala `python -m solution.batch --workers 32 --output results.csv`
+With --share, reference data is published once to shared memory for all the workers,
+see model/shared_data.py.
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import dataclasses
+import importlib
+import os
+import sys
+import time
+import traceback
+import typing
+
+import pandas as pd
+
+from model import shared_data
+from solution import factory
+from solution import registry
+
+
+@dataclasses.dataclass(frozen=True)
+class JobResult:
+    """Outcome of computing a single solution scenario.
+
+       solution: solution directory name, like 'solarpvutil'
+       scenario: name of the scenario within that solution
+       result: whatever result_func returned for the constructed Scenario, or None on error
+       seconds: wall time spent in the worker for this job
+       error: formatted traceback if the job failed, else None
+    """
+    solution: str
+    scenario: str
+    result: typing.Any = None
+    seconds: float = 0.0
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def co2eq_mmt_reduced_world(obj):
+    """Default result_func: World CO2-eq MMT reduced per year for the scenario."""
+    return obj.c2.co2eq_mmt_reduced()['World']
+
+
+def all_jobs(solutions=None):
+    """Returns a list of (solution, scenario) pairs for every scenario of every solution.
+       solutions: optional list of solution names to restrict to, default all solutions.
+    """
+    if solutions is None:
+        solutions = factory.all_solutions()
+    jobs = []
+    for name in solutions:
+        jobs.extend((name, scenario) for scenario in registry.scenarios(name))
+    return jobs
+
+
+def _init_worker(solutions):
+    """Import solution modules once per worker process, before any job is run."""
+    for name in solutions:
+        importlib.import_module('solution.' + name)
+
+
+def run_job(solution, scenario, result_func=co2eq_mmt_reduced_world):
+    """Construct one scenario and apply result_func to it, capturing wall time and errors.
+       Exceptions are caught and reported in JobResult.error so that a single failing
+       scenario does not abort a whole batch.
+    """
+    start = time.perf_counter()
+    try:
+        m = importlib.import_module('solution.' + solution)
+        obj = m.Scenario(scenario=scenario)
+        result = result_func(obj) if result_func is not None else None
+    except Exception:
+        return JobResult(solution=solution, scenario=scenario,
+                seconds=time.perf_counter() - start, error=traceback.format_exc())
+    return JobResult(solution=solution, scenario=scenario, result=result,
+            seconds=time.perf_counter() - start)
+
+
+def unique_jobs(jobs):
+    """Drop jobs which would compute the same results as an earlier job.
+
+       Scenarios of one solution are the same if their Advanced Controls have the same
+       content_hash(), as happens when a scenario was saved again under a new name.
+       Returns (jobs, duplicates): the remaining jobs, and a dict of each job dropped to
+       the job which computes its results.
+    """
+    seen = {}
+    unique = []
+    duplicates = {}
+    for (solution, scenario) in jobs:
+        m = importlib.import_module('solution.' + solution)
+        ac = getattr(m, 'scenarios', {}).get(scenario, None)
+        key = (solution, ac.content_hash()) if ac is not None else (solution, scenario)
+        if key in seen:
+            duplicates[(solution, scenario)] = seen[key]
+        else:
+            seen[key] = (solution, scenario)
+            unique.append((solution, scenario))
+    return (unique, duplicates)
+
+
+def _run_jobs(jobs, max_workers, result_func, pool=None):
+    if pool is not None:
+        yield from pool.map(jobs, result_func=result_func)
+        return
+    if max_workers == 0:
+        for (solution, scenario) in jobs:
+            yield run_job(solution, scenario, result_func)
+        return
+
+    solutions = sorted(set(solution for (solution, _) in jobs))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers,
+            initializer=_init_worker, initargs=(solutions,)) as executor:
+        futures = {executor.submit(run_job, solution, scenario, result_func): (solution, scenario)
+                for (solution, scenario) in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                yield future.result()
+            except Exception:
+                # The worker itself died (e.g. BrokenProcessPool), not just the scenario.
+                (solution, scenario) = futures[future]
+                yield JobResult(solution=solution, scenario=scenario,
+                        error=traceback.format_exc())
+
+
+def run_batch(jobs, max_workers=None, result_func=co2eq_mmt_reduced_world, dedupe=False,
+        pool=None):
+    """Compute (solution, scenario) jobs across a pool of processes.
+
+       jobs: iterable of (solution, scenario) pairs, for example from all_jobs().
+       max_workers: number of worker processes, default os.cpu_count().
+         max_workers=0 runs every job in the calling process, which is useful for debugging.
+       result_func: picklable callable applied to each constructed Scenario in the worker,
+         its return value is sent back in JobResult.result.
+       dedupe: if True, scenarios with the same Advanced Controls as another job (see
+         unique_jobs) are computed once. Each still gets a JobResult, with the result of
+         the job which was computed and zero seconds.
+       pool: a started solution.pool.WarmPool to run the jobs on, instead of starting
+         worker processes for this batch. max_workers is not used.
+
+       Yields JobResult objects in completion order, not submission order.
+    """
+    jobs = list(jobs)
+    copies = {}
+    if dedupe:
+        (jobs, duplicates) = unique_jobs(jobs)
+        for (job, original) in duplicates.items():
+            copies.setdefault(original, []).append(job)
+    for r in _run_jobs(jobs, max_workers, result_func, pool=pool):
+        yield r
+        for (_, scenario) in copies.get((r.solution, r.scenario), []):
+            yield dataclasses.replace(r, scenario=scenario, seconds=0.0)
+
+
+def summarize(results):
+    """Returns a DataFrame of per-job timing and status, one row per JobResult."""
+    rows = [(r.solution, r.scenario, r.seconds, r.ok, r.error) for r in results]
+    return pd.DataFrame(rows, columns=['Solution', 'Scenario', 'Seconds', 'OK', 'Error'])
+
+
+def main(solutions=None, max_workers=None, output=None, dedupe=False, share=False,
+        stream=sys.stdout):
+    jobs = all_jobs(solutions=solutions)
+    print(f"Running {len(jobs)} scenarios with {max_workers or os.cpu_count()} workers",
+            file=stream)
+    start = time.perf_counter()
+    results = []
+    with shared_data.publish() if share else contextlib.nullcontext():
+        for r in run_batch(jobs, max_workers=max_workers, dedupe=dedupe):
+            status = 'ok' if r.ok else 'FAILED'
+            print(f"{r.seconds:8.2f}s {status:6s} {r.solution}: {r.scenario}", file=stream)
+            results.append(r)
+    summary = summarize(results)
+    failed = summary.loc[~summary['OK']]
+    print(f"{len(results)} scenarios in {time.perf_counter() - start:.2f}s, "
+            f"{len(failed)} failed", file=stream)
+    for (_, row) in failed.iterrows():
+        print(f"\n{row['Solution']}: {row['Scenario']}\n{row['Error']}", file=stream)
+    if output:
+        summary.to_csv(output, index=False)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+            description='Compute every solution scenario in parallel, reporting timing and failures.')
+    parser.add_argument('--solutions', default=None, required=False,
+            help='Comma separated list of solutions to run, default all solutions.')
+    parser.add_argument('--workers', default=None, type=int, required=False,
+            help='Number of worker processes, default is the number of CPUs. 0 runs in-process.')
+    parser.add_argument('--output', default=None, required=False,
+            help='CSV file to write per-scenario timing and failures to.')
+    parser.add_argument('--dedupe', default=False, action='store_true',
+            help='Compute scenarios with identical Advanced Controls only once.')
+    parser.add_argument('--share', default=False, action='store_true',
+            help='Share reference data between the workers through shared memory.')
+    args = parser.parse_args(sys.argv[1:])
+
+    solutions = args.solutions.split(',') if args.solutions else None
+    summary = main(solutions=solutions, max_workers=args.workers, output=args.output,
+            dedupe=args.dedupe, share=args.share)
+    sys.exit(0 if summary['OK'].all() else 1)
@@ -7,6 +7,8 @@ import pandas as pd
 
 from functools import lru_cache
 
+from solution import lazy as lazy_scenario
+
 def all_solutions():
     path = pathlib.Path(__file__).parents[1].joinpath('data', 'overview', 'solutions.csv')
     overview = pd.read_csv(path, index_col=False, skipinitialspace=True, header=0,
@@ -20,8 +22,43 @@ def one_solution_scenarios(solution):
     return (m.Scenario, list(m.scenarios.keys()))
 
 
+def load_scenario(solution, scenario=None, lazy=False):
+    """Construct a Scenario of one solution.
+       lazy: if True, model objects like tm, ua or c2 are only built when first accessed,
+         see solution/lazy.py.
+    """
+    (constructor, _) = one_solution_scenarios(solution)
+    if lazy:
+        return lazy_scenario.Scenario(constructor, scenario=scenario)
+    return constructor(scenario=scenario)
+
+
+class _Constructor:
+    """Stands in for the Scenario class of a solution, importing the solution only when a
+       Scenario is constructed or an attribute of the class is used."""
+
+    def __init__(self, solution):
+        self.solution = solution
+
+    def __call__(self, *args, **kwargs):
+        (constructor, _) = one_solution_scenarios(self.solution)
+        return constructor(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        if attr == 'solution' or attr.startswith('__'):
+            raise AttributeError(attr)
+        (constructor, _) = one_solution_scenarios(self.solution)
+        return getattr(constructor, attr)
+
+
 def all_solutions_scenarios():
+    """Returns a dict of solution name to (Scenario class, list of scenario names).
+       Scenario names come from solution/registry.py, the solutions are not imported until
+       a Scenario is constructed."""
+    from solution import registry
+
     everything = {}
-    for solution in all_solutions():
-        everything[solution] = one_solution_scenarios(solution)
+    for (solution, entry) in registry.index().items():
+        scenarios = [s['name'] for s in entry['scenarios']]
+        everything[solution] = (_Constructor(solution), scenarios)
     return everything
@@ -0,0 +1,403 @@
+"""Lazy, selective construction of solution Scenarios.
+
+A Scenario's __init__ eagerly builds every model object (tm, ad, ht, ua, fc, oc, c4, c2,
+...) even when the caller only needs one of them. Scenario(cls, scenario) here builds
+an instance of the solution's own Scenario class which runs only the parts of __init__
+needed to produce an attribute, the first time that attribute is accessed:
+
+    obj = lazy.Scenario(solution.solarpvutil.Scenario, scenario='...')
+    obj.c2.co2eq_mmt_reduced()   # never constructs FirstCost or OperatingCost
+
+The Scenario classes are code generated and differ in the details of each module's
+arguments, but all follow the same shape: a sequence of top-level statements in
+__init__, each assigning locals or self.<attr> from what came before. Rather than
+declaring the dependencies of every solution by hand, the dependency graph is derived
+once per class from the source of its __init__: each top-level statement depends on
+every earlier statement which writes a local variable or self.<attr> that it reads.
+Materializing an attribute executes, in their original order, the statements it
+transitively depends on which have not already run.
+
+Writes are recognized from assignment targets (including x.loc[...] = ... and
+self.x.y = ...) and from methods called in bare expression statements, which may
+mutate their receiver. Method calls on the right hand side of an assignment are
+assumed not to mutate, as is the case for the @lru_cache'd methods of the model
+classes. Classes whose __init__ cannot be analyzed are constructed eagerly.
+
+obj.with_changes(field=value, ...) returns a new lazy Scenario with those Advanced
+Controls fields changed, sharing every model object which does not depend on them with
+obj (including their already computed, cached results):
+
+    obj2 = obj.with_changes(npv_discount_rate=0.05)   # only obj2.oc is rebuilt
+
+The Advanced Controls fields each statement depends on are found from the statement
+itself (self.ac.<field>) and, for model objects it constructs with ac=self.ac, from the
+source of that class: every self.ac.<field> read by any of its methods, with properties
+and methods of AdvancedControls expanded to the fields they read. A statement is rebuilt
+if it reads a changed field, or depends on a statement which is rebuilt.
+"""
+
+import ast
+import dataclasses
+import functools
+import inspect
+import textwrap
+
+from model import advanced_controls
+
+
+class _Statement:
+    """One top-level statement of an __init__ method."""
+
+    def __init__(self, code, reads, writes, fields):
+        self.code = code
+        self.reads = reads
+        self.writes = writes
+        self.fields = fields  # Advanced Controls fields read, None if it cannot be known.
+
+
+def _root_key(node):
+    """Name an expression being read or written: 'x' for x, x.loc[...] or x.y, and
+       'self.x' for self.x, self.x.y or self.x[...]. Returns None for anything else."""
+    attrs = []
+    while isinstance(node, (ast.Attribute, ast.Subscript)):
+        if isinstance(node, ast.Attribute):
+            attrs.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    if node.id == 'self' and attrs:
+        return 'self.' + attrs[-1]
+    return node.id
+
+
+def _reads_and_writes(stmt):
+    reads = set()
+    writes = set()
+    for node in ast.walk(stmt):
+        if isinstance(node, (ast.Name, ast.Attribute, ast.Subscript)):
+            key = _root_key(node)
+            if key is None:
+                continue
+            if isinstance(node.ctx, ast.Load):
+                reads.add(key)
+            else:
+                writes.add(key)
+                reads.add(key)
+        elif isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            writes.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            writes.update((a.asname or a.name).split('.')[0] for a in node.names)
+    if isinstance(stmt, ast.Expr):
+        for node in ast.walk(stmt):
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                key = _root_key(node.func.value)
+                if key is not None:
+                    writes.add(key)
+    reads.discard('self')
+    writes.discard('self')
+    return (reads, writes)
+
+
+def _is_plain(stmt):
+    """False if stmt returns, yields or uses global/nonlocal/__class__ at the top level of
+       __init__, which would behave differently when run on its own."""
+    todo = [stmt]
+    while todo:
+        node = todo.pop()
+        if isinstance(node, (ast.Return, ast.Yield, ast.YieldFrom, ast.Nonlocal, ast.Global)):
+            return False
+        if isinstance(node, ast.Name) and node.id in ('__class__', 'super'):
+            return False
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+            continue  # a nested function may return, the statement defining it does not.
+        todo.extend(ast.iter_child_nodes(node))
+    return True
+
+
+def _is_self_ac(node):
+    return (isinstance(node, ast.Attribute) and node.attr == 'ac' and
+            isinstance(node.value, ast.Name) and node.value.id == 'self')
+
+
+def _controls_fields(names):
+    """Expand properties and methods of AdvancedControls in names to the fields they read,
+       dropping anything which is not a field."""
+    cls = advanced_controls.AdvancedControls
+    valid = set(f.name for f in dataclasses.fields(cls))
+    fields = set()
+    todo = list(names)
+    seen = set()
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        if name in valid:
+            fields.add(name)
+            continue
+        attr = inspect.getattr_static(cls, name, None)
+        func = attr.fget if isinstance(attr, property) else attr
+        if not inspect.isfunction(func):
+            continue
+        tree = ast.parse(textwrap.dedent(inspect.getsource(func)))
+        todo.extend(node.attr for node in ast.walk(tree) if isinstance(node, ast.Attribute)
+                and isinstance(node.value, ast.Name) and node.value.id == 'self')
+    return frozenset(fields)
+
+
+@functools.lru_cache()
+def controls_read(cls):
+    """Advanced Controls fields which methods of cls (like UnitAdoption) may read through
+       self.ac or an ac argument, or None if its source is not available."""
+    names = set()
+    for klass in cls.__mro__:
+        if klass is object:
+            continue
+        try:
+            tree = ast.parse(textwrap.dedent(inspect.getsource(klass)))
+        except (OSError, TypeError):
+            return None
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute) and (_is_self_ac(node.value) or
+                    (isinstance(node.value, ast.Name) and node.value.id == 'ac')):
+                names.add(node.attr)
+    return _controls_fields(names)
+
+
+def _resolve(node, namespace):
+    """Object named by a Name or dotted Attribute expression, or None."""
+    if isinstance(node, ast.Name):
+        return namespace.get(node.id, None)
+    if isinstance(node, ast.Attribute):
+        return getattr(_resolve(node.value, namespace), node.attr, None)
+    return None
+
+
+def _statement_fields(stmt, namespace):
+    """Advanced Controls fields read by a statement of Scenario.__init__, including those
+       read by model objects it constructs with self.ac. None if it cannot be determined."""
+    parents = {}
+    for node in ast.walk(stmt):
+        for child in ast.iter_child_nodes(node):
+            parents[child] = node
+    names = set()
+    for node in ast.walk(stmt):
+        if not _is_self_ac(node) or isinstance(node.ctx, ast.Store):
+            continue
+        parent = parents.get(node, None)
+        if isinstance(parent, ast.Attribute):
+            names.add(parent.attr)
+            continue
+        call = parents.get(parent, None) if isinstance(parent, ast.keyword) else parent
+        if isinstance(call, ast.Call):
+            cls = _resolve(call.func, namespace)
+            fields = controls_read(cls) if isinstance(cls, type) else None
+            if fields is not None:
+                names.update(fields)
+                continue
+        return None
+    return _controls_fields(names)
+
+
+class _Graph:
+    """Top-level statements of a Scenario.__init__ and the dependencies between them."""
+
+    def __init__(self, cls):
+        func = cls.__init__
+        filename = inspect.getsourcefile(func)
+        (lines, firstline) = inspect.getsourcelines(func)
+        tree = ast.parse(textwrap.dedent(''.join(lines)))
+        funcdef = tree.body[0]
+        if not isinstance(funcdef, ast.FunctionDef):
+            raise ValueError(f"cannot analyze {cls.__qualname__}.__init__")
+        args = funcdef.args
+        self.params = [a.arg for a in args.args[1:]]
+        self.defaults = dict(zip(self.params[::-1],
+                [ast.literal_eval(d) for d in args.defaults[::-1]]))
+        if args.vararg or args.kwarg or args.kwonlyargs:
+            raise ValueError(f"cannot analyze {cls.__qualname__}.__init__")
+
+        namespace = inspect.getmodule(cls).__dict__
+        self.statements = []
+        for stmt in funcdef.body:
+            if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant):
+                continue  # docstring
+            if not _is_plain(stmt):
+                raise ValueError(f"cannot analyze {cls.__qualname__}.__init__")
+            (reads, writes) = _reads_and_writes(stmt)
+            module = ast.Module(body=[stmt], type_ignores=[])
+            ast.increment_lineno(module, firstline - 1)
+            code = compile(module, filename, 'exec')
+            self.statements.append(_Statement(code=code, reads=reads, writes=writes,
+                fields=_statement_fields(stmt, namespace)))
+
+        self.depends = []
+        writers = {}
+        for (i, stmt) in enumerate(self.statements):
+            deps = set()
+            for key in stmt.reads:
+                deps.update(writers.get(key, ()))
+            self.depends.append(deps)
+            for key in stmt.writes:
+                writers.setdefault(key, []).append(i)
+        self.writers = writers
+        self.attributes = sorted(k[len('self.'):] for k in writers if k.startswith('self.'))
+        self.controls = set(self.closure('self.ac')) | set(self.closure('self.scenario'))
+
+    def closure(self, key):
+        """Indices of the statements needed to produce key, in execution order."""
+        todo = list(self.writers.get(key, ()))
+        needed = set()
+        while todo:
+            i = todo.pop()
+            if i not in needed:
+                needed.add(i)
+                todo.extend(self.depends[i])
+        return sorted(needed)
+
+    def invalidated(self, fields):
+        """Indices of the statements to re-run when Advanced Controls fields change."""
+        stale = set(i for (i, stmt) in enumerate(self.statements) if i not in self.controls
+                and (stmt.fields is None or stmt.fields & fields))
+        changed = True
+        while changed:
+            changed = False
+            for (i, deps) in enumerate(self.depends):
+                if i not in stale and deps & stale:
+                    stale.add(i)
+                    changed = True
+            # an object mutated by a statement being re-run must be created afresh, not
+            # modified in place where it is shared with the original Scenario.
+            for i in list(stale):
+                for key in self.statements[i].writes:
+                    for j in self.writers[key]:
+                        if j not in stale and j not in self.controls:
+                            stale.add(j)
+                            changed = True
+        return stale
+
+
+@functools.lru_cache()
+def _graph(cls):
+    try:
+        return _Graph(cls)
+    except (OSError, TypeError, ValueError, SyntaxError):
+        return None
+
+
+def dependencies(cls):
+    """Returns {attribute: set of attributes it is built from} for a Scenario class,
+       or None if its __init__ cannot be analyzed."""
+    graph = _graph(cls)
+    if graph is None:
+        return None
+    result = {}
+    for attr in graph.attributes:
+        deps = set()
+        for i in graph.closure('self.' + attr):
+            deps.update(k[len('self.'):] for k in graph.statements[i].reads
+                    if k.startswith('self.'))
+        deps.intersection_update(graph.attributes)
+        deps.discard(attr)
+        result[attr] = deps
+    return result
+
+
+def invalidated(cls, **changes):
+    """Returns the set of attributes of a Scenario class which with_changes(**changes)
+       rebuilds, or None if its __init__ cannot be analyzed."""
+    graph = _graph(cls)
+    if graph is None:
+        return None
+    stale = graph.invalidated(set(changes))
+    return set(k[len('self.'):] for i in stale for k in graph.statements[i].writes
+            if k.startswith('self.'))
+
+
+class _LazyMixin:
+    """Materializes attributes of a Scenario on first access."""
+
+    def __getattr__(self, name):
+        state = self.__dict__.get('_lazy_state', None)
+        if state is None or name.startswith('__'):
+            raise AttributeError(name)
+        (graph, namespace, done) = state
+        indices = [i for i in graph.closure('self.' + name) if i not in done]
+        if not indices:
+            raise AttributeError(name)
+        for i in indices:
+            exec(graph.statements[i].code, namespace)
+            done.add(i)
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            raise AttributeError(name) from None  # only assigned under some conditions.
+
+    def materialize(self):
+        """Build every remaining attribute, as the eager __init__ would have."""
+        (graph, namespace, done) = self.__dict__['_lazy_state']
+        for i in range(len(graph.statements)):
+            if i not in done:
+                exec(graph.statements[i].code, namespace)
+                done.add(i)
+        return self
+
+    def with_changes(self, **changes):
+        """A new Scenario with the given Advanced Controls fields changed.
+
+           Model objects which do not depend on the changed fields are shared with self,
+           the others are rebuilt when first accessed.
+        """
+        (graph, namespace, done) = self.__dict__['_lazy_state']
+        ac = dataclasses.replace(self.ac, **changes)
+        stale = graph.invalidated(set(changes))
+        keys = set(k for i in stale for k in graph.statements[i].writes)
+        module = inspect.getmodule(type(self)).__dict__
+        obj = object.__new__(type(self))
+        namespace = dict(namespace)
+        for key in keys:
+            if key.startswith('self.'):
+                continue
+            if key in module:
+                namespace[key] = module[key]
+            else:
+                namespace.pop(key, None)
+        namespace['self'] = obj
+        obj.__dict__.update((k, v) for (k, v) in self.__dict__.items()
+                if k != '_lazy_state' and 'self.' + k not in keys)
+        obj.__dict__['ac'] = ac
+        obj.__dict__['_lazy_state'] = (graph, namespace, done - stale)
+        return obj
+
+
+@functools.lru_cache()
+def _lazy_class(cls):
+    return type(cls.__name__, (_LazyMixin, cls), {'__module__': cls.__module__,
+        '__qualname__': cls.__qualname__, '__doc__': cls.__doc__})
+
+
+def Scenario(cls, *args, **kwargs):
+    """Construct cls(*args, **kwargs) lazily, see module docstring.
+
+       The statements needed for self.scenario and self.ac are run immediately, so an
+       unknown scenario name raises right away as it would for cls(). Classes whose
+       __init__ cannot be analyzed are constructed eagerly.
+    """
+    graph = _graph(cls)
+    if graph is None:
+        return cls(*args, **kwargs)
+    unknown = set(kwargs) - set(graph.params)
+    if len(args) > len(graph.params) or unknown:
+        raise TypeError(f"{cls.__qualname__}() got unexpected arguments")
+    signature = dict(graph.defaults)
+    signature.update(zip(graph.params, args))
+    signature.update(kwargs)
+    obj = object.__new__(_lazy_class(cls))
+    namespace = dict(inspect.getmodule(cls).__dict__)
+    namespace.update(signature)
+    namespace['self'] = obj
+    obj.__dict__['_lazy_state'] = (graph, namespace, set())
+    for name in ('scenario', 'ac'):
+        if 'self.' + name in graph.writers:
+            getattr(obj, name)
+    return obj
@@ -0,0 +1,221 @@
+"""Monte Carlo uncertainty ranges for solution scenarios.
+
+Advanced Controls take each VMA-linked parameter as a single statistic (mean, high or low)
+of its Variable Meta-Analysis table. This module instead draws many parameter sets from
+the source values of those tables, computes the scenario for each and reports percentile
+bands of the results.
+
+  + Each parameter is drawn from the sources of the VMA table it is linked to, selected
+    the same way as VMA.avg_high_low(): excluded sources and outliers are dropped, regime
+    and region filters apply, and sources are weighted if the table uses weights.
+  + Parameters linked to the same VMA table (like pds_2014_cost and ref_2014_cost) always
+    take the same draw. Other tables are drawn independently unless a correlation between
+    them is given, which is applied with a Gaussian copula.
+  + Samples are split into chunks evaluated across a pool of worker processes. Each worker
+    computes the outputs of the base scenario once and derives each sample from it with
+    lazy.with_changes(), so only the model objects affected by the sampled parameters
+    are recomputed.
+
+It can be run as a script ala `python -m solution.montecarlo solarpvutil --samples 1000`
+"""
+
+import argparse
+import concurrent.futures
+import dataclasses
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from solution import factory
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+_erf = np.vectorize(math.erf, otypes=[np.float64])
+
+
+def co2eq_mmt_reduced(obj):
+    """World CO2-eq MMT reduced per year."""
+    return obj.c2.co2eq_mmt_reduced()['World']
+
+
+def soln_net_present_value(obj):
+    """Net present value of the marginal cash flow per year."""
+    return obj.oc.soln_net_present_value()
+
+
+OUTPUTS = {
+    'co2eq_mmt_reduced': co2eq_mmt_reduced,
+    'soln_net_present_value': soln_net_present_value,
+}
+
+
+def linked_fields(ac):
+    """Returns a dict of Advanced Controls field name to the title of the VMA table it is
+       drawn from, for every scalar field linked to a VMA with source values in ac.vmas.
+       The first of the field's vma_titles with a valid mean is used, as Advanced Controls do.
+    """
+    result = {}
+    for field in dataclasses.fields(ac):
+        titles = field.metadata.get('vma_titles', None)
+        value = getattr(ac, field.name)
+        if not titles or not ac.vmas or isinstance(value, (bool, pd.Series, dict)):
+            continue
+        if not isinstance(value, (int, float)):
+            continue
+        for title in titles:
+            v = ac.vmas.get(title, None)
+            if v and not pd.isna(v.avg_high_low(key='mean')):
+                result[field.name] = title
+                break
+    return result
+
+
+def _uniforms(titles, n, rng, correlation):
+    """(n x len(titles)) array of uniform draws, correlated between titles as given."""
+    if not correlation:
+        return rng.random((n, len(titles)))
+    matrix = np.eye(len(titles))
+    applied = {}
+    for ((a, b), rho) in correlation.items():
+        if a in titles and b in titles:
+            (i, j) = (titles.index(a), titles.index(b))
+            matrix[i, j] = matrix[j, i] = rho
+            applied[(a, b)] = rho
+    if np.linalg.eigvalsh(matrix).min() <= 0:
+        raise ValueError(f"correlations {applied} are not consistent with each other "
+                "(the correlation matrix is not positive definite)")
+    z = rng.standard_normal((n, len(titles))) @ np.linalg.cholesky(matrix).T
+    return 0.5 * (1.0 + _erf(z / math.sqrt(2.0)))
+
+
+def sample_controls(ac, n, seed=None, fields=None, correlation=None, filters=None):
+    """Draw n sets of VMA-linked Advanced Controls parameters.
+
+       ac: AdvancedControls of the scenario, supplying the VMA tables.
+       n: number of samples.
+       seed: seed for numpy.random.default_rng, for reproducible samples.
+       fields: list of field names to sample, default every field from linked_fields(ac).
+       correlation: dict of (title, title) to correlation coefficient between VMA tables.
+       filters: dict of VMA title to dict(regime=..., region=...) restricting its sources.
+
+       Returns a DataFrame with one row per sample and one column per field. Fields whose
+       VMA has no usable sources keep their value in ac.
+    """
+    linked = linked_fields(ac)
+    if fields is not None:
+        missing = [f for f in fields if f not in linked]
+        if missing:
+            raise KeyError(f"{missing} are not linked to a VMA with source values")
+        linked = {f: linked[f] for f in fields}
+    titles = sorted(set(linked.values()))
+    rng = np.random.default_rng(seed)
+    u = _uniforms(titles, n, rng, correlation or {})
+    filters = filters or {}
+    drawn = {title: ac.vmas[title].quantile(u[:, i], **filters.get(title, {}))
+            for (i, title) in enumerate(titles)}
+    samples = pd.DataFrame(index=pd.RangeIndex(n, name='Sample'))
+    for (field, title) in linked.items():
+        values = drawn[title]
+        samples[field] = values if not np.isnan(values).all() else getattr(ac, field)
+    return samples
+
+
+def _base(solution, scenario, outputs):
+    """Lazy Scenario to derive samples from, with the model objects and results which
+       outputs need already computed so that with_changes() shares those not affected."""
+    base = factory.load_scenario(solution, scenario=scenario, lazy=True)
+    for name in outputs:
+        OUTPUTS[name](base)
+    return base
+
+
+def _evaluate(solution, scenario, samples, outputs):
+    """Compute outputs for each sample, a list of dicts of field to value."""
+    base = _base(solution, scenario, outputs)
+    results = []
+    for changes in samples:
+        obj = base.with_changes(**changes)
+        results.append({name: OUTPUTS[name](obj) for name in outputs})
+    return results
+
+
+def run(solution, scenario=None, n=1000, seed=None, fields=None, correlation=None,
+        filters=None, outputs=None, max_workers=None):
+    """Monte Carlo simulation of one solution scenario.
+
+       solution: solution name, like 'solarpvutil'
+       scenario: scenario name, default the solution's default scenario.
+       n, seed, fields, correlation, filters: as for sample_controls().
+       outputs: list of names from OUTPUTS, default all of them.
+       max_workers: number of worker processes, default os.cpu_count().
+         max_workers=0 computes every sample in the calling process.
+
+       Returns (samples, results): the sampled parameters as from sample_controls() and a
+       dict of output name to DataFrame with one row per sample and one column per year.
+    """
+    outputs = list(outputs if outputs is not None else OUTPUTS.keys())
+    base = factory.load_scenario(solution, scenario=scenario, lazy=True)
+    samples = sample_controls(base.ac, n, seed=seed, fields=fields,
+            correlation=correlation, filters=filters)
+    records = samples.to_dict(orient='records')
+    scenario = base.scenario
+
+    if max_workers == 0:
+        evaluated = _evaluate(solution, scenario, records, outputs)
+    else:
+        chunks = np.array_split(np.arange(len(records)), 4 * (max_workers or os.cpu_count()))
+        chunks = [c for c in chunks if len(c)]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_evaluate, solution, scenario,
+                [records[i] for i in chunk], outputs) for chunk in chunks]
+            evaluated = [r for future in futures for r in future.result()]
+
+    results = {}
+    for name in outputs:
+        results[name] = pd.DataFrame([r[name] for r in evaluated], index=samples.index)
+    return (samples, results)
+
+
+def percentile_bands(results, percentiles=DEFAULT_PERCENTILES):
+    """Returns a dict of output name to DataFrame indexed by year with one column per
+       percentile, from the results of run()."""
+    bands = {}
+    for (name, df) in results.items():
+        values = np.nanpercentile(df.to_numpy(dtype=np.float64), percentiles, axis=0)
+        bands[name] = pd.DataFrame(values.T, index=df.columns, columns=list(percentiles))
+    return bands
+
+
+def main(solution, scenario=None, n=1000, seed=None, max_workers=None, output=None,
+        stream=sys.stdout):
+    (samples, results) = run(solution, scenario=scenario, n=n, seed=seed,
+            max_workers=max_workers)
+    bands = percentile_bands(results)
+    print(f"{solution}: {n} samples of {', '.join(samples.columns)}", file=stream)
+    for (name, band) in bands.items():
+        print(f"\n{name}\n{band.loc[[2030, 2040, 2050]].to_string()}", file=stream)
+    if output:
+        pd.concat(bands, axis=1).to_csv(output)
+    return bands
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+            description='Percentile bands of solution results from VMA uncertainty.')
+    parser.add_argument('solution', help='Solution name, like solarpvutil')
+    parser.add_argument('--scenario', default=None, required=False,
+            help='Scenario name, default the solution\'s default scenario.')
+    parser.add_argument('--samples', default=1000, type=int, required=False,
+            help='Number of parameter sets to draw.')
+    parser.add_argument('--seed', default=None, type=int, required=False,
+            help='Random seed, for reproducible results.')
+    parser.add_argument('--workers', default=None, type=int, required=False,
+            help='Number of worker processes, default is the number of CPUs. 0 runs in-process.')
+    parser.add_argument('--output', default=None, required=False,
+            help='CSV file to write percentile bands to.')
+    args = parser.parse_args(sys.argv[1:])
+
+    main(solution=args.solution, scenario=args.scenario, n=args.samples, seed=args.seed,
+            max_workers=args.workers, output=args.output)
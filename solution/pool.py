@@ -0,0 +1,451 @@
+"""Pool of pre-forked worker processes for serving scenario requests.
+
+solution.batch starts fresh worker processes for every batch, and each of them imports
+the solution modules, reads the VMA and Advanced Controls files and fills the model caches
+before it can compute anything. For a long-running server that cost would be paid by the
+first requests to each worker, and again whenever a worker is replaced.
+
+WarmPool instead does that work once, in the parent process:
+
+  + imports the solution modules, parsing their Advanced Controls,
+  + reads every VMA of those modules (see vma.VMA, which otherwise reads on first use),
+  + optionally constructs the default scenario of each solution, which fills
+    csv_cache, MetaclassCache and the lru_caches of the shared model objects,
+
+and then forks a template process from it, sharing its memory copy-on-write. The template
+forks the workers. Workers which crash or exceed the timeout are replaced, and every worker
+is replaced after max_tasks_per_child jobs so that memory growth in long-running workers
+is bounded. Replacements are also forked by the template, so they start at full speed too.
+
+The template is forked in start(), before the pool starts its own thread, and never starts
+any thread itself. Workers are therefore never forked from a multi-threaded process, where
+a lock held by another thread (the import lock, a logging handler, a BLAS thread pool)
+would be inherited held and could deadlock the worker. This is the approach of
+multiprocessing's forkserver with set_forkserver_preload(), without re-importing anything.
+The caller should still create the pool before starting threads of its own:
+
+    with pool.WarmPool(solutions=['solarpvutil', 'afforestation'], workers=8) as p:
+        r = p.run('solarpvutil', 'PDS-25p2050-Plausible-customPDS-avg-Jan2020')
+        futures = [p.submit(solution, scenario) for (solution, scenario) in jobs]
+        print(p.health())
+
+Forking requires a platform with the 'fork' start method, which excludes Windows.
+"""
+
+import collections
+import concurrent.futures
+import importlib
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.reduction
+import os
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+import traceback
+
+import pandas as pd
+
+from model import vma
+from solution import batch
+from solution import factory
+
+
+def preload(solutions, warm=True):
+    """Import solutions and read everything they need which does not depend on the scenario.
+       warm: also construct the default scenario of each solution, to fill the caches of
+         input files and shared model objects.
+       Returns a dict of solution name to the exception raised while loading it, if any.
+    """
+    errors = {}
+    for name in solutions:
+        try:
+            m = importlib.import_module('solution.' + name)
+            for v in getattr(m, 'VMAs', {}).values():
+                if isinstance(v, vma.VMA):
+                    _ = v.df
+            if warm:
+                m.Scenario()
+        except Exception as e:
+            errors[name] = e
+    return errors
+
+
+def _worker(conn):
+    """Main loop of a worker process: run jobs received on conn until told to stop."""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        (solution, scenario, result_func) = job
+        result = batch.run_job(solution, scenario, result_func)
+        try:
+            conn.send(result)
+        except Exception as e:
+            # the result could not be pickled.
+            conn.send(batch.JobResult(solution=solution, scenario=scenario,
+                    seconds=result.seconds, error=f'{type(e).__name__}: {e}'))
+
+
+def _reap(status):
+    """Report the exit code of every child which exited to its status pipe."""
+    while True:
+        try:
+            (pid, code) = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        fd = status.pop(pid, None)
+        if fd is not None:
+            os.write(fd, struct.pack('q', os.waitstatus_to_exitcode(code)))
+            os.close(fd)
+
+
+def _template(control, close):
+    """Main loop of the template process: fork a worker for every pair of file descriptors
+       (connection, status pipe) received on the control socket, replying with its pid.
+       When the worker exits, its exit code is written to the status pipe."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent decides when to stop.
+    for c in close:
+        c.close()
+    (wakeup_r, wakeup_w) = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda *args: None)
+    status = {}  # pid -> write end of the status pipe of a running worker
+    while control is not None or status:
+        ready = multiprocessing.connection.wait([wakeup_r] + ([control] if control else []))
+        if wakeup_r in ready:
+            try:
+                while os.read(wakeup_r, 512):
+                    pass
+            except BlockingIOError:
+                pass
+            _reap(status)
+        if control is None or control not in ready:
+            continue
+        try:
+            (conn_fd, status_fd) = multiprocessing.reduction.recvfds(control, 2)
+        except EOFError:
+            control.close()
+            control = None
+            continue
+        pid = os.fork()
+        if pid == 0:
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            for fd in [wakeup_r, wakeup_w, status_fd] + list(status.values()):
+                os.close(fd)
+            control.close()
+            code = 0
+            try:
+                _worker(multiprocessing.connection.Connection(conn_fd))
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        os.close(conn_fd)
+        status[pid] = status_fd
+        control.sendall(struct.pack('q', pid))
+        _reap(status)  # in case the worker exited before status held its pipe.
+
+
+class _Process:
+    """Parent side handle of a worker process forked by the template, with the subset of
+       the multiprocessing.Process interface the pool uses."""
+
+    def __init__(self, pid, status):
+        self.pid = pid
+        self.sentinel = status  # read end of the status pipe, readable once exited.
+        self.exitcode = None
+
+    def join(self, timeout=None):
+        if self.exitcode is None and multiprocessing.connection.wait([self.sentinel],
+                timeout=timeout):
+            data = os.read(self.sentinel, 8)
+            # -1 if the template exited without reporting the exit code.
+            self.exitcode = struct.unpack('q', data)[0] if len(data) == 8 else -1
+
+    def is_alive(self):
+        self.join(timeout=0)
+        return self.exitcode is None
+
+    def kill(self):
+        if self.is_alive():
+            try:
+                os.kill(self.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def close(self):
+        os.close(self.sentinel)
+
+
+class _Worker:
+    """Parent side of one worker process."""
+
+    def __init__(self, number, process, conn):
+        self.number = number
+        self.process = process
+        self.conn = conn
+        self.started = time.time()
+        self.tasks = 0
+        self.job = None  # (future, solution, scenario, start time) while busy
+
+
+class WarmPool:
+    """Worker processes forked from a parent which has already loaded the solutions.
+
+       solutions: list of solution names to preload, default all solutions. Jobs for other
+         solutions still work, but load the solution in the worker which runs them.
+       workers: number of worker processes, default os.cpu_count().
+       max_tasks_per_child: replace a worker after it has run this many jobs, default never.
+       timeout: seconds a job may run before its worker is killed and replaced, default no
+         limit. The job's JobResult reports the timeout as its error.
+       warm: construct the default scenario of each solution before forking, see preload().
+       result_func: default result_func for jobs, see batch.run_batch().
+    """
+
+    def __init__(self, solutions=None, workers=None, max_tasks_per_child=None, timeout=None,
+            warm=True, result_func=batch.co2eq_mmt_reduced_world):
+        self.solutions = list(solutions) if solutions is not None else factory.all_solutions()
+        self.num_workers = workers or os.cpu_count()
+        self.max_tasks_per_child = max_tasks_per_child
+        self.timeout = timeout
+        self.warm = warm
+        self.result_func = result_func
+        self.preload_errors = {}
+        self.replaced = collections.Counter()  # reason -> number of workers replaced
+        self._context = multiprocessing.get_context('fork')
+        self._template = None
+        self._control = None
+        self._workers = []
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._wakeup = None
+        self._thread = None
+        self._closing = False
+        self._next_number = 0
+
+    def start(self):
+        """Preload the solutions and fork the workers. Returns self."""
+        if self._thread is not None:
+            raise RuntimeError('pool is already started')
+        self.preload_errors = preload(self.solutions, warm=self.warm)
+        (self._control, control) = socket.socketpair()
+        self._template = self._context.Process(target=_template,
+                args=(control, [self._control]),
+                name='WarmPool-template', daemon=True)
+        self._template.start()
+        control.close()
+        self._wakeup = self._context.Pipe(duplex=False)
+        self._workers = [self._fork() for _ in range(self.num_workers)]
+        self._thread = threading.Thread(target=self._dispatch, name='WarmPool', daemon=True)
+        self._thread.start()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _fork(self):
+        """Have the template fork a new worker. Only called by one thread at a time."""
+        (parent_conn, child_conn) = self._context.Pipe()
+        (status_r, status_w) = os.pipe()
+        try:
+            multiprocessing.reduction.sendfds(self._control,
+                    [child_conn.fileno(), status_w])
+            reply = b''
+            while len(reply) < 8:
+                data = self._control.recv(8 - len(reply))
+                if not data:
+                    raise RuntimeError('WarmPool template process exited')
+                reply += data
+        except BaseException:
+            parent_conn.close()
+            os.close(status_r)
+            raise
+        finally:
+            child_conn.close()
+            os.close(status_w)
+        (pid,) = struct.unpack('q', reply)
+        worker = _Worker(self._next_number, _Process(pid, status_r), parent_conn)
+        self._next_number += 1
+        return worker
+
+    def submit(self, solution, scenario, result_func=None):
+        """Queue one scenario, returning a concurrent.futures.Future of its JobResult."""
+        if self._thread is None or self._closing:
+            raise RuntimeError('pool is not running')
+        future = concurrent.futures.Future()
+        result_func = result_func if result_func is not None else self.result_func
+        with self._lock:
+            self._pending.append((future, solution, scenario, result_func))
+            self._wakeup[1].send_bytes(b'')
+        return future
+
+    def run(self, solution, scenario, result_func=None):
+        """Compute one scenario, returning its JobResult."""
+        return self.submit(solution, scenario, result_func=result_func).result()
+
+    def map(self, jobs, result_func=None):
+        """Compute (solution, scenario) jobs, yielding JobResults in completion order."""
+        futures = [self.submit(s, n, result_func=result_func) for (s, n) in jobs]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+    def health(self):
+        """DataFrame with one row per worker process: Worker, PID, Alive, Tasks, Busy,
+           Job Seconds (time spent on the current job) and Uptime, in seconds."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for w in self._workers:
+                busy = w.job is not None
+                rows.append((w.number, w.process.pid, w.process.is_alive(), w.tasks, busy,
+                    time.perf_counter() - w.job[3] if busy else 0.0, now - w.started))
+        return pd.DataFrame(rows, columns=['Worker', 'PID', 'Alive', 'Tasks', 'Busy',
+            'Job Seconds', 'Uptime']).set_index('Worker')
+
+    def close(self, wait=True):
+        """Stop the workers once the queued jobs are done, or cancel them if not wait."""
+        if self._thread is None:
+            return
+        with self._lock:
+            self._closing = True
+            if not wait:
+                while self._pending:
+                    self._pending.popleft()[0].cancel()
+            self._wakeup[1].send_bytes(b'')
+        self._thread.join()
+        self._thread = None
+        for w in self._workers:
+            try:
+                w.conn.send(None)
+            except OSError:
+                pass
+        for w in self._workers:
+            w.process.join(timeout=5)
+            if w.process.is_alive():
+                w.process.kill()
+                w.process.join()
+            w.conn.close()
+            w.process.close()
+        self._workers = []
+        for c in self._wakeup:
+            c.close()
+        self._control.close()
+        self._template.join(timeout=5)
+        if self._template.is_alive():
+            self._template.kill()
+            self._template.join()
+
+    def _replace(self, worker, reason):
+        """Stop worker and fork a new one in its place."""
+        if worker.process.is_alive():
+            if reason == 'recycled':
+                worker.conn.send(None)
+                worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+        worker.process.close()
+        replacement = self._fork()
+        with self._lock:
+            self._workers[self._workers.index(worker)] = replacement
+            self.replaced[reason] += 1
+
+    def _finish(self, worker, result):
+        (future, _, _, _) = worker.job
+        with self._lock:
+            worker.job = None
+        future.set_result(result)
+
+    def _assign(self):
+        """Send queued jobs to idle workers. Returns the list of busy workers."""
+        failed = []
+        with self._lock:
+            idle = [w for w in self._workers if w.job is None]
+            while idle and self._pending:
+                (future, solution, scenario, result_func) = self._pending.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                w = idle.pop()
+                w.job = (future, solution, scenario, time.perf_counter())
+                try:
+                    w.conn.send((solution, scenario, result_func))
+                except OSError:
+                    pass  # the worker died, the job is reported as failed when noticed.
+                except Exception as e:
+                    # result_func could not be pickled.
+                    w.job = None
+                    idle.append(w)
+                    failed.append((future, batch.JobResult(solution=solution,
+                        scenario=scenario, error=f'{type(e).__name__}: {e}')))
+            busy = [w for w in self._workers if w.job is not None]
+        for (future, result) in failed:
+            future.set_result(result)
+        return busy
+
+    def _dispatch(self):
+        """Assign queued jobs to idle workers, collect results and replace workers."""
+        while True:
+            busy = self._assign()
+            with self._lock:
+                if self._closing and not busy and not self._pending:
+                    return
+
+            wait_for = [self._wakeup[0]]
+            for w in self._workers:
+                wait_for.extend([w.conn, w.process.sentinel])
+            timeout = None
+            if self.timeout is not None and busy:
+                oldest = min(w.job[3] for w in busy)
+                timeout = max(0.0, oldest + self.timeout - time.perf_counter())
+            ready = multiprocessing.connection.wait(wait_for, timeout=timeout)
+
+            if self._wakeup[0] in ready:
+                while self._wakeup[0].poll():
+                    self._wakeup[0].recv_bytes()
+            for w in list(self._workers):
+                result = None
+                if w.conn in ready and w.job is not None:
+                    try:
+                        result = w.conn.recv()
+                    except (EOFError, OSError):
+                        pass  # the worker died.
+                if result is not None:
+                    self._finish(w, result)
+                    w.tasks += 1
+                    if self.max_tasks_per_child and w.tasks >= self.max_tasks_per_child:
+                        self._replace(w, 'recycled')
+                elif w.conn in ready or w.process.sentinel in ready:
+                    # The worker closed its end of the connection, so it is exiting.
+                    w.process.join()
+                    if w.job is not None:
+                        (_, solution, scenario, start) = w.job
+                        self._finish(w, batch.JobResult(solution=solution, scenario=scenario,
+                            seconds=time.perf_counter() - start,
+                            error=f'worker exited with code {w.process.exitcode}'))
+                    self._replace(w, 'crashed')
+                elif (self.timeout is not None and w.job is not None and
+                        time.perf_counter() - w.job[3] > self.timeout):
+                    (_, solution, scenario, start) = w.job
+                    self._finish(w, batch.JobResult(solution=solution, scenario=scenario,
+                        seconds=time.perf_counter() - start,
+                        error=f'timed out after {self.timeout} seconds'))
+                    self._replace(w, 'timed out')
@@ -0,0 +1,199 @@
+"""Index of solutions and their scenarios, without importing the solution modules.
+
+Importing a solution module constructs all of its VMA objects and parses every Advanced
+Controls file, which makes enumerating ~80 solutions take many seconds. The registry
+instead reads what it needs straight from the source of each solution:
+
+  + name, units and solution_category from the module-level assignments in __init__.py,
+  + scenario names and adoption bases from the ac/*.json files loaded by
+    load_scenarios_from_json(), in the same order the module would load them, along with
+    a digest of each file.
+
+Solutions which do not follow that layout (for example with scenarios written out in
+Python) are imported once to find the same information.
+
+The index is kept in $DRAWDOWN_CACHE_DIR/registry/index.json (see model/csv_cache.py).
+Each solution is checked against the modification time and size of its source files
+whenever it is looked up, and is read again if any of them changed.
+"""
+
+import ast
+import glob
+import hashlib
+import importlib
+import json
+import os
+import pathlib
+import tempfile
+import threading
+
+from model import advanced_controls
+from model import csv_cache
+from solution import factory
+
+SOLUTION_DIR = pathlib.Path(__file__).parents[0]
+INDEX_VERSION = 2
+
+_lock = threading.Lock()
+_index = None
+
+
+def _signature(solution):
+    """Modification time and size of the files an entry is read from."""
+    directory = SOLUTION_DIR.joinpath(solution)
+    files = [directory.joinpath('__init__.py')]
+    files.extend(sorted(directory.joinpath('ac').glob('*.json')))
+    signature = []
+    for path in files:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        signature.append([str(path.relative_to(directory)), st.st_mtime_ns, st.st_size])
+    return signature
+
+
+def _static_info(source):
+    """name, units, category and scenario directory from the module-level statements of
+       a solution's __init__.py, or None if any of them cannot be found."""
+    info = {}
+    for node in ast.parse(source).body:
+        if not (isinstance(node, ast.Assign) and len(node.targets) == 1 and
+                isinstance(node.targets[0], ast.Name)):
+            continue
+        (target, value) = (node.targets[0].id, node.value)
+        try:
+            if target in ('name', 'units'):
+                info[target] = ast.literal_eval(value)
+            elif target == 'solution_category' and isinstance(value, ast.Attribute):
+                info['category'] = value.attr
+            elif (target == 'scenarios' and isinstance(value, ast.Call) and
+                    getattr(value.func, 'attr', None) == 'load_scenarios_from_json'):
+                directory = [k.value for k in value.keywords if k.arg == 'directory'][0]
+                info['ac_dir'] = ast.literal_eval(directory.args[0])
+        except (ValueError, IndexError, AttributeError):
+            return None
+    if set(info.keys()) != {'name', 'units', 'category', 'ac_dir'}:
+        return None
+    return info
+
+
+def _adoption_bases(pds, ref):
+    """soln_pds_adoption_basis and soln_ref_adoption_basis as AdvancedControls has them."""
+    translate = advanced_controls.translate_adoption_bases
+    return {'pds_adoption_basis': translate.get(pds, pds),
+            'ref_adoption_basis': translate.get(ref, ref)}
+
+
+def _read_static(solution, info):
+    directory = SOLUTION_DIR.joinpath(solution, info['ac_dir'])
+    scenarios = {}
+    # Same order, and same handling of repeated names, as load_scenarios_from_json.
+    for filename in glob.glob(str(directory.joinpath('*.json'))):
+        with open(filename, 'rb') as f:
+            data = f.read()
+        js = json.loads(data)
+        scenarios[js.get('name', None)] = {'file': os.path.relpath(filename, SOLUTION_DIR),
+                'digest': hashlib.sha256(data).hexdigest(),
+                **_adoption_bases(js.get('soln_pds_adoption_basis', None),
+                    js.get('soln_ref_adoption_basis', None))}
+    return {'name': info['name'], 'category': info['category'], 'units': info['units'],
+            'scenarios': [dict(name=k, **v) for (k, v) in scenarios.items()]}
+
+
+def _read_module(solution):
+    m = importlib.import_module('solution.' + solution)
+    category = getattr(m, 'solution_category', None)
+    if category is None:
+        category = next(iter(m.scenarios.values())).solution_category
+    scenarios = [{'name': k, 'file': None, 'digest': None,
+            **_adoption_bases(ac.soln_pds_adoption_basis, ac.soln_ref_adoption_basis)}
+            for (k, ac) in m.scenarios.items()]
+    return {'name': getattr(m, 'name', None) or m.Scenario.name,
+            'category': getattr(category, 'name', category),
+            'units': getattr(m, 'units', None) or m.Scenario.units,
+            'scenarios': scenarios}
+
+
+def _read(solution):
+    """Index entry of one solution, from its source files."""
+    signature = _signature(solution)
+    with open(SOLUTION_DIR.joinpath(solution, '__init__.py'), 'r', encoding='utf-8') as f:
+        info = _static_info(f.read())
+    entry = _read_static(solution, info) if info is not None else _read_module(solution)
+    entry['signature'] = signature
+    return entry
+
+
+def _index_path():
+    directory = csv_cache.cache_dir('registry')
+    return directory.joinpath('index.json') if directory is not None else None
+
+
+def _load_index():
+    path = _index_path()
+    if path is None:
+        return {}
+    try:
+        with open(path, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if index.get('version', None) != INDEX_VERSION:
+        return {}
+    return index.get('solutions', {})
+
+
+def _store_index(solutions):
+    path = _index_path()
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        (fd, tmpname) = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'solutions': solutions}, f)
+        os.replace(tmpname, path)
+    except OSError:
+        pass
+
+
+def _entries(solutions):
+    """Current index entries of solutions, reading any which changed."""
+    global _index
+    with _lock:
+        if _index is None:
+            _index = _load_index()
+        changed = False
+        for solution in solutions:
+            entry = _index.get(solution, None)
+            if entry is None or entry['signature'] != _signature(solution):
+                _index[solution] = _read(solution)
+                changed = True
+        if changed:
+            _store_index(_index)
+        return {solution: _index[solution] for solution in solutions}
+
+
+def entry(solution):
+    """dict of name, category, units and scenarios (a list of dicts of name, file and
+       digest of the Advanced Controls file, pds_adoption_basis and ref_adoption_basis)
+       for one solution, like 'solarpvutil'."""
+    return _entries([solution])[solution]
+
+
+def index():
+    """dict of solution name to entry() for every solution."""
+    return _entries(factory.all_solutions())
+
+
+def scenarios(solution):
+    """Names of the scenarios of solution, the default scenario first."""
+    return [s['name'] for s in entry(solution)['scenarios']]
+
+
+def clear():
+    """Forget the index held in this process, it is read again when next used."""
+    global _index
+    with _lock:
+        _index = None
@@ -0,0 +1,56 @@
+"""Tests for batch.py."""
+
+import io
+
+from . import batch
+
+
+def test_all_jobs():
+    jobs = batch.all_jobs(solutions=['airplanes'])
+    assert len(jobs) > 1
+    assert all(solution == 'airplanes' for (solution, _) in jobs)
+
+
+def test_run_batch_in_process():
+    jobs = batch.all_jobs(solutions=['airplanes'])[:1]
+    results = list(batch.run_batch(jobs, max_workers=0))
+    assert len(results) == 1
+    assert results[0].ok
+    assert results[0].seconds > 0
+    assert results[0].result.loc[2050] > 0
+
+
+def test_run_batch_pool():
+    jobs = batch.all_jobs(solutions=['airplanes'])[:2]
+    results = list(batch.run_batch(jobs, max_workers=2))
+    assert sorted((r.solution, r.scenario) for r in results) == sorted(jobs)
+    assert all(r.ok for r in results)
+
+
+def test_failure_is_reported():
+    jobs = [('airplanes', 'no such scenario')]
+    results = list(batch.run_batch(jobs, max_workers=1))
+    assert len(results) == 1
+    assert not results[0].ok
+    assert 'KeyError' in results[0].error
+    assert results[0].result is None
+
+
+def test_main():
+    stream = io.StringIO()
+    summary = batch.main(solutions=['airplanes'], max_workers=2, stream=stream)
+    assert summary['OK'].all()
+    assert len(summary.index) == len(batch.all_jobs(solutions=['airplanes']))
+    assert '0 failed' in stream.getvalue()
+
+
+def test_dedupe():
+    jobs = [('perennialbioenergy', 'PDS-89p2050-Drawdown-PDSCustom-max-Nov2019'),
+            ('perennialbioenergy', 'PDS-72p2050-Drawdown-customPDS-high-Jan2020')]
+    (unique, duplicates) = batch.unique_jobs(jobs)
+    assert unique == jobs[:1]
+    assert duplicates == {jobs[1]: jobs[0]}
+    results = list(batch.run_batch(jobs, max_workers=0, dedupe=True))
+    assert [(r.solution, r.scenario) for r in results] == jobs
+    assert results[1].result is results[0].result
+    assert results[1].seconds == 0.0
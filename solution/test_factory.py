@@ -26,3 +26,11 @@ def test_all_solutions_present():
     factory_solutions = factory.all_solutions_scenarios()
     for (_, val) in all_solutions['DirName'].dropna().iteritems():
         assert val in factory_solutions.keys()
+
+def test_load_scenario():
+    (_, scenarios) = factory.one_solution_scenarios('solarpvutil')
+    obj = factory.load_scenario('solarpvutil', scenarios[0])
+    assert 'fc' in vars(obj)
+    obj = factory.load_scenario('solarpvutil', scenarios[0], lazy=True)
+    assert 'fc' not in vars(obj)
+    assert obj.scenario == scenarios[0]
@@ -0,0 +1,116 @@
+"""Tests for lazy.py."""
+
+import pandas as pd
+import pytest
+
+from . import factory
+from . import lazy
+from solution import solarpvutil
+
+
+def test_dependencies():
+    deps = lazy.dependencies(solarpvutil.Scenario)
+    assert deps['ac'] == set()
+    assert 'ua' in deps['c2']
+    assert 'fc' not in deps['c2']
+    assert 'fc' in deps['oc']
+
+
+def test_selective():
+    scenario = list(solarpvutil.scenarios.keys())[0]
+    obj = lazy.Scenario(solarpvutil.Scenario, scenario=scenario)
+    assert isinstance(obj, solarpvutil.Scenario)
+    assert obj.ac is solarpvutil.scenarios[scenario]
+    assert 'ua' not in vars(obj)
+    result = obj.c2.co2eq_mmt_reduced()
+    assert 'ua' in vars(obj)
+    assert 'fc' not in vars(obj)
+    assert 'oc' not in vars(obj)
+    expected = solarpvutil.Scenario(scenario=scenario)
+    pd.testing.assert_frame_equal(result, expected.c2.co2eq_mmt_reduced())
+    pd.testing.assert_series_equal(obj.oc.soln_pds_annual_operating_cost(),
+            expected.oc.soln_pds_annual_operating_cost())
+    obj.materialize()
+    assert set(vars(expected)) <= set(vars(obj))
+
+
+def test_errors():
+    with pytest.raises(KeyError):
+        lazy.Scenario(solarpvutil.Scenario, scenario='no such scenario')
+    with pytest.raises(TypeError):
+        lazy.Scenario(solarpvutil.Scenario, no_such_argument=1)
+    obj = lazy.Scenario(solarpvutil.Scenario)
+    with pytest.raises(AttributeError):
+        obj.no_such_attribute
+
+
+def test_conditional_attribute():
+    # afforestation assigns c_tla only when use_custom_tla is set.
+    obj = factory.load_scenario('afforestation', lazy=True)
+    assert not obj.ac.use_custom_tla
+    assert not hasattr(obj, 'c_tla')
+    assert getattr(obj, 'c_tla', None) is None
+    eager = factory.load_scenario('afforestation')
+    assert hasattr(eager, 'c_tla') == hasattr(obj, 'c_tla')
+
+
+class Unanalyzable:
+    def __init__(self, x=1):
+        self.x = x
+        if x > 1:
+            return
+        self.y = 2
+
+
+def test_fallback_to_eager():
+    assert lazy.dependencies(Unanalyzable) is None
+    obj = lazy.Scenario(Unanalyzable)
+    assert type(obj) is Unanalyzable
+    assert obj.y == 2
+
+
+def test_controls_read():
+    from model import operatingcost
+    fields = lazy.controls_read(operatingcost.OperatingCost)
+    assert 'npv_discount_rate' in fields
+    # properties of AdvancedControls are expanded to the fields they read.
+    assert 'soln_lifetime_capacity' in fields
+    assert 'soln_lifetime_replacement' not in fields
+
+
+def test_invalidated():
+    assert lazy.invalidated(solarpvutil.Scenario, npv_discount_rate=0.05) == {'oc'}
+    stale = lazy.invalidated(solarpvutil.Scenario, emissions_grid_source=None)
+    assert 'ef' in stale and 'c2' in stale
+    assert 'ua' not in stale and 'tm' not in stale
+
+
+def test_with_changes():
+    scenario = list(solarpvutil.scenarios.keys())[0]
+    obj = lazy.Scenario(solarpvutil.Scenario, scenario=scenario)
+    npv = obj.oc.soln_net_present_value()
+    obj.c2
+    obj2 = obj.with_changes(npv_discount_rate=obj.ac.npv_discount_rate + 0.02)
+    assert obj2.ac.npv_discount_rate == obj.ac.npv_discount_rate + 0.02
+    assert obj.ac.npv_discount_rate != obj2.ac.npv_discount_rate
+    assert obj2.ua is obj.ua
+    assert obj2.c2 is obj.c2
+    assert obj2.oc is not obj.oc
+    assert obj2.oc.soln_net_present_value().sum() != npv.sum()
+    pd.testing.assert_series_equal(obj.oc.soln_net_present_value(), npv)
+
+    original = solarpvutil.scenarios[scenario]
+    solarpvutil.scenarios[scenario] = obj2.ac
+    try:
+        expected = solarpvutil.Scenario(scenario=scenario)
+    finally:
+        solarpvutil.scenarios[scenario] = original
+    pd.testing.assert_series_equal(obj2.oc.soln_net_present_value(),
+            expected.oc.soln_net_present_value())
+
+    obj3 = obj.with_changes(soln_avg_annual_use=obj.ac.soln_avg_annual_use * 1.1)
+    assert obj3.tm is obj.tm
+    assert obj3.ua is not obj.ua
+    pd.testing.assert_frame_equal(obj.c2.co2eq_mmt_reduced(), obj2.c2.co2eq_mmt_reduced())
+    with pytest.raises(TypeError):
+        obj.with_changes(no_such_field=1)
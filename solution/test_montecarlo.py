@@ -0,0 +1,76 @@
+"""Tests for montecarlo.py."""
+
+import numpy as np
+import pytest
+
+from . import factory
+from . import montecarlo
+
+
+def test_sample_controls():
+    ac = factory.load_scenario('solarpvutil', lazy=True).ac
+    linked = montecarlo.linked_fields(ac)
+    assert linked['pds_2014_cost'] == 'SOLUTION First Cost per Implementation Unit'
+    samples = montecarlo.sample_controls(ac, 50, seed=4)
+    assert len(samples.index) == 50
+    assert set(samples.columns) == set(linked.keys())
+    # fields drawn from the same VMA take the same value.
+    np.testing.assert_array_equal(samples['pds_2014_cost'], samples['ref_2014_cost'])
+    v = ac.vmas['SOLUTION First Cost per Implementation Unit']
+    assert samples['pds_2014_cost'].isin(v.df['Value'].astype(float)).all()
+    again = montecarlo.sample_controls(ac, 50, seed=4)
+    assert samples.equals(again)
+    with pytest.raises(KeyError):
+        montecarlo.sample_controls(ac, 5, fields=['report_end_year'])
+
+
+def test_correlation():
+    ac = factory.load_scenario('solarpvutil', lazy=True).ac
+    (a, b) = ('SOLUTION Average Annual Use', 'CONVENTIONAL Average Annual Use')
+    fields = ['soln_avg_annual_use', 'conv_avg_annual_use']
+    samples = montecarlo.sample_controls(ac, 2000, seed=1, fields=fields,
+            correlation={(a, b): 0.9})
+    assert samples.rank().corr().iloc[0, 1] > 0.7
+    samples = montecarlo.sample_controls(ac, 2000, seed=1, fields=fields)
+    assert abs(samples.rank().corr().iloc[0, 1]) < 0.1
+
+
+def test_inconsistent_correlation():
+    ac = factory.load_scenario('solarpvutil', lazy=True).ac
+    (a, b, c) = ('SOLUTION Average Annual Use', 'CONVENTIONAL Average Annual Use',
+            'SOLUTION Lifetime Capacity')
+    fields = ['soln_avg_annual_use', 'conv_avg_annual_use', 'soln_lifetime_capacity']
+    # a and b move together, as do a and c, so b and c cannot be opposed.
+    correlation = {(a, b): 0.9, (a, c): 0.9, (b, c): -0.9}
+    with pytest.raises(ValueError, match='not positive definite') as e:
+        montecarlo.sample_controls(ac, 10, seed=1, fields=fields, correlation=correlation)
+    assert str((b, c)) in str(e.value)
+
+
+def test_run():
+    (samples, results) = montecarlo.run('solarpvutil', n=3, seed=2,
+            fields=['pds_2014_cost', 'ref_2014_cost'], max_workers=0)
+    co2 = results['co2eq_mmt_reduced']
+    assert co2.shape[0] == 3
+    # emissions do not depend on first cost, net present value does.
+    np.testing.assert_allclose(co2.iloc[0], co2.iloc[1])
+    npv = results['soln_net_present_value']
+    assert npv[2030].nunique() == samples['pds_2014_cost'].nunique()
+    bands = montecarlo.percentile_bands(results, percentiles=(10, 90))
+    assert list(bands['soln_net_present_value'].columns) == [10, 90]
+    assert (bands['soln_net_present_value'][10] <= bands['soln_net_present_value'][90]).all()
+
+
+def test_samples_share_unaffected_objects():
+    outputs = list(montecarlo.OUTPUTS.keys())
+    base = montecarlo._base('solarpvutil', None, outputs)
+    samples = montecarlo.sample_controls(base.ac, 2, seed=3,
+            fields=['soln_fixed_oper_cost_per_iunit'])
+    (s1, s2) = [base.with_changes(**r) for r in samples.to_dict(orient='records')]
+    for name in outputs:
+        montecarlo.OUTPUTS[name](s1)
+        montecarlo.OUTPUTS[name](s2)
+    assert s1.tm is s2.tm is base.tm
+    assert s1.ua is s2.ua is base.ua
+    assert s1.c2 is s2.c2
+    assert s1.oc is not s2.oc
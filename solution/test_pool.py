@@ -0,0 +1,110 @@
+"""Tests for pool.py."""
+
+import os
+import threading
+import time
+
+import pytest
+
+from . import batch
+from . import factory
+from . import pool
+
+
+def worker_pid(obj):
+    return os.getpid()
+
+
+def crash(obj):
+    os._exit(3)
+
+
+def hang(obj):
+    time.sleep(60)
+
+
+_lock = threading.Lock()
+
+
+def acquire_lock(obj):
+    """Whether the worker's copy of _lock is free, it is held in the parent."""
+    if not _lock.acquire(timeout=2):
+        return False
+    _lock.release()
+    return True
+
+
+@pytest.fixture(scope='module')
+def scenarios():
+    (_, scenarios) = factory.one_solution_scenarios('airplanes')
+    return scenarios
+
+
+def test_run(scenarios):
+    with pool.WarmPool(solutions=['airplanes'], workers=2) as p:
+        assert not p.preload_errors
+        r = p.run('airplanes', scenarios[0])
+        assert r.ok
+        expected = batch.run_job('airplanes', scenarios[0])
+        assert list(r.result) == pytest.approx(list(expected.result))
+        results = list(p.map([('airplanes', s) for s in scenarios[:3]]))
+        assert sorted(r.scenario for r in results) == sorted(scenarios[:3])
+        health = p.health()
+        assert len(health.index) == 2
+        assert health['Alive'].all()
+        assert health['Tasks'].sum() == 4
+
+
+def test_failure_is_reported(scenarios):
+    with pool.WarmPool(solutions=['airplanes'], workers=1, warm=False) as p:
+        r = p.run('airplanes', 'no such scenario')
+        assert not r.ok
+        assert 'KeyError' in r.error
+
+
+def test_max_tasks_per_child(scenarios):
+    with pool.WarmPool(solutions=['airplanes'], workers=1, max_tasks_per_child=2,
+            warm=False) as p:
+        pids = [p.run('airplanes', scenarios[0], result_func=worker_pid).result
+                for _ in range(5)]
+        assert pids[0] == pids[1]
+        assert pids[1] != pids[2]
+        assert len(set(pids)) == 3
+        assert p.replaced['recycled'] == 2
+        assert os.getpid() not in pids
+
+
+def test_crashed_worker_is_replaced(scenarios):
+    with pool.WarmPool(solutions=['airplanes'], workers=1, warm=False) as p:
+        r = p.run('airplanes', scenarios[0], result_func=crash)
+        assert not r.ok
+        assert 'exited with code 3' in r.error
+        assert p.run('airplanes', scenarios[0]).ok
+        assert p.replaced['crashed'] == 1
+
+
+def test_timeout(scenarios):
+    with pool.WarmPool(solutions=['airplanes'], workers=1, timeout=2, warm=False) as p:
+        r = p.run('airplanes', scenarios[0], result_func=hang)
+        assert 'timed out' in r.error
+        assert p.run('airplanes', scenarios[0]).ok
+        assert p.replaced['timed out'] == 1
+
+
+def test_run_batch(scenarios):
+    jobs = [('airplanes', s) for s in scenarios[:2]]
+    with pool.WarmPool(solutions=['airplanes'], workers=2, warm=False) as p:
+        results = list(batch.run_batch(jobs, pool=p))
+    assert sorted((r.solution, r.scenario) for r in results) == sorted(jobs)
+    assert all(r.ok for r in results)
+
+
+def test_replacement_while_parent_holds_lock(scenarios):
+    with pool.WarmPool(solutions=['airplanes'], workers=1, max_tasks_per_child=1,
+            warm=False) as p:
+        with _lock:
+            # another thread holding a lock while the replacement worker is forked.
+            results = [p.run('airplanes', scenarios[0], result_func=acquire_lock)
+                    for _ in range(3)]
+    assert p.replaced['recycled'] == 3
+    assert [r.result for r in results] == [True, True, True]
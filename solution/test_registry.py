@@ -0,0 +1,74 @@
+"""Tests for registry.py."""
+
+import importlib
+import json
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from . import factory
+from . import registry
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('DRAWDOWN_CACHE_DIR', str(tmp_path))
+    registry.clear()
+    yield tmp_path
+    registry.clear()
+
+
+def test_entry(index_dir):
+    entry = registry.entry('airplanes')
+    assert entry['name'] == 'Aircraft Fuel Efficiency'
+    assert entry['category'] == 'REDUCTION'
+    assert entry['units']['functional unit'] == 'Billion passenger km'
+    (_, scenarios) = factory.one_solution_scenarios('airplanes')
+    assert registry.scenarios('airplanes') == scenarios
+    assert all(len(s['digest']) == 64 for s in entry['scenarios'])
+    assert index_dir.joinpath('registry', 'index.json').exists()
+
+
+def test_module_fallback(index_dir):
+    # scenarios are written out in Python rather than loaded from ac/*.json
+    entry = registry.entry('bottomtrawling')
+    assert entry['category'] == 'OCEAN'
+    assert registry.scenarios('bottomtrawling') == ['default']
+
+
+def test_refresh(index_dir, monkeypatch):
+    solution_dir = index_dir.joinpath('solution')
+    shutil.copytree(registry.SOLUTION_DIR.joinpath('airplanes'), solution_dir.joinpath('airplanes'),
+            ignore=shutil.ignore_patterns('testdata', 'tam', 'ca_*', 'vma_data'))
+    monkeypatch.setattr(registry, 'SOLUTION_DIR', solution_dir)
+    before = registry.scenarios('airplanes')
+    acfile = next(solution_dir.joinpath('airplanes', 'ac').glob('*.json'))
+    js = json.loads(acfile.read_text())
+    js['name'] = 'renamed'
+    acfile.write_text(json.dumps(js))
+    registry.clear()  # also picked up from the index file on disk.
+    after = registry.scenarios('airplanes')
+    assert 'renamed' in after
+    assert len(after) == len(before)
+
+
+def test_adoption_bases(index_dir):
+    m = importlib.import_module('solution.afforestation')
+    for s in registry.entry('afforestation')['scenarios']:
+        assert s['pds_adoption_basis'] == m.scenarios[s['name']].soln_pds_adoption_basis
+        assert s['ref_adoption_basis'] == m.scenarios[s['name']].soln_ref_adoption_basis
+
+
+def test_all_solutions_scenarios_does_not_import(index_dir):
+    code = ('import sys; from solution import factory;'
+            'result = factory.all_solutions_scenarios();'
+            'print("solution.airplanes" in sys.modules, result["airplanes"][1][0])')
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+            check=True, cwd=str(registry.SOLUTION_DIR.parent)).stdout
+    (constructor, scenarios) = factory.all_solutions_scenarios()['airplanes']
+    assert output.split('\n')[0] == f'False {scenarios[0]}'
+    assert scenarios == registry.scenarios('airplanes')
+    assert constructor.name == 'Aircraft Fuel Efficiency'
+    assert constructor(scenario=scenarios[0]).scenario == scenarios[0]
@@ -0,0 +1,87 @@
+"""Tests for warehouse.py."""
+
+import dataclasses
+import io
+
+import pandas as pd
+import pytest
+
+from . import factory
+from . import warehouse
+
+
+@pytest.fixture(scope='module')
+def airplanes():
+    (_, scenarios) = factory.one_solution_scenarios('airplanes')
+    return [factory.load_scenario('airplanes', scenario=s) for s in scenarios[:2]]
+
+
+def test_write_and_read_table(tmp_path, airplanes):
+    obj = airplanes[0]
+    wh = warehouse.Warehouse(tmp_path)
+    manifest = wh.write(obj)
+    assert manifest['solution'] == 'airplanes'
+    assert 'c2.co2eq_mmt_reduced' in manifest['tables']
+    pd.testing.assert_frame_equal(wh.table('airplanes', obj.scenario, 'c2.co2eq_mmt_reduced'),
+            obj.c2.co2eq_mmt_reduced(), check_dtype=False, check_column_type=False,
+            check_index_type=False)
+    series = obj.fc.soln_pds_annual_world_first_cost()
+    pd.testing.assert_series_equal(wh.table('airplanes', obj.scenario,
+        'fc.soln_pds_annual_world_first_cost'), series, check_dtype=False,
+        check_index_type=False)
+    with pytest.raises(KeyError):
+        wh.table('airplanes', obj.scenario, 'no.such_table')
+    with pytest.raises(KeyError):
+        wh.table('airplanes', 'no such scenario', 'c2.co2eq_mmt_reduced')
+
+
+def test_query(tmp_path, airplanes):
+    wh = warehouse.Warehouse(tmp_path)
+    for obj in airplanes:
+        wh.write(obj)
+    assert len(wh.scenarios()) == 2
+    df = wh.query('c2.co2eq_mmt_reduced', region='World', years=range(2020, 2051))
+    assert list(df.index) == list(range(2020, 2051))
+    assert list(df.columns.names) == ['Solution', 'Scenario']
+    for obj in airplanes:
+        expected = obj.c2.co2eq_mmt_reduced().loc[2020:2050, 'World']
+        assert list(df[('airplanes', obj.scenario)]) == pytest.approx(list(expected), nan_ok=True)
+    assert wh.query('c2.co2eq_mmt_reduced', solutions=['solarpvutil']).empty
+
+
+def test_query_reads_manifests_once(tmp_path, airplanes, monkeypatch):
+    wh = warehouse.Warehouse(tmp_path)
+    for obj in airplanes:
+        wh.write(obj)
+    loads = []
+    load = warehouse.json.load
+    monkeypatch.setattr(warehouse.json, 'load', lambda f: loads.append(f.name) or load(f))
+    df = wh.query('c2.co2eq_mmt_reduced', scenarios=[airplanes[1].scenario])
+    assert list(df.columns) == [('airplanes', airplanes[1].scenario)]
+    assert len(loads) == len(set(loads)) == 2
+    loads.clear()
+    assert wh.query('c2.co2eq_mmt_reduced', solutions=['solarpvutil']).empty
+    assert loads == []
+
+
+def test_rewrite_only_when_controls_change(tmp_path, airplanes):
+    obj = airplanes[0]
+    wh = warehouse.Warehouse(tmp_path)
+    key = wh.write(obj)['key']
+    assert wh.is_current(obj)
+    path = tmp_path.joinpath('solution=airplanes')
+    before = sorted(p.stat().st_mtime_ns for p in path.rglob('values.npy'))
+    assert wh.write(obj)['key'] == key
+    assert sorted(p.stat().st_mtime_ns for p in path.rglob('values.npy')) == before
+
+    changed = dataclasses.replace(obj.ac, npv_discount_rate=obj.ac.npv_discount_rate + 0.01)
+    assert warehouse.controls_key(changed) != key
+    assert warehouse.controls_key(dataclasses.replace(obj.ac)) == key
+
+
+def test_main(tmp_path):
+    stream = io.StringIO()
+    warehouse.main(str(tmp_path), solutions=['airplanes'], max_workers=0, stream=stream)
+    (_, scenarios) = factory.one_solution_scenarios('airplanes')
+    assert f'Stored {len(scenarios)} of {len(scenarios)}' in stream.getvalue()
+    assert sorted(warehouse.Warehouse(tmp_path).scenarios()['Scenario']) == sorted(scenarios)
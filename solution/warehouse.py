@@ -0,0 +1,300 @@
+"""Columnar store of computed solution scenario results.
+
+Every @data_func result of every model object of a Scenario (ua, fc, oc, c2, ...) is
+written once to disk, so that consumers which only read results, like dashboards,
+whole-portfolio summaries or the Jupyter UI, can fetch them without constructing the
+scenario again:
+
+    wh = warehouse.Warehouse('results')
+    wh.write(solution.solarpvutil.Scenario())
+    wh.query('c2.co2eq_mmt_reduced', region='World', years=range(2020, 2051))
+
+The store is partitioned by solution, scenario and table, hive style:
+
+    <root>/solution=<name>/scenario=<name>/_manifest.json
+    <root>/solution=<name>/scenario=<name>/table=<module.func>/values.npy
+
+values.npy holds the table as a float64 (row x column) array in column-major order, so
+each column is contiguous on disk. It is opened memory-mapped, and a query for one
+region only reads that column of each table. Row and column labels and scalar results
+are kept in _manifest.json, together with a digest of the scenario's Advanced Controls.
+A stored scenario whose Advanced Controls have since changed is reported as stale and is
+replaced the next time it is written.
+
+Plain .npy files are used rather than Parquet, which would need pyarrow.
+
+It can be run as a script ala `python -m solution.warehouse results --workers 8 solarpvutil`
+to compute and store every scenario of the given solutions.
+"""
+
+import argparse
+import functools
+import json
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+
+from model.data_handler import DataHandler
+
+MANIFEST = '_manifest.json'
+
+
+def controls_key(ac):
+    """Digest of the Advanced Controls, see AdvancedControls.content_hash()."""
+    return ac.content_hash()
+
+
+def solution_name(obj):
+    """Solution directory name of a Scenario object, like 'solarpvutil'."""
+    return type(obj).__module__.split('.')[1]
+
+
+def _quote(name):
+    return urllib.parse.quote(str(name), safe=' ()-_.,+')
+
+
+def _label_to_json(label):
+    if isinstance(label, np.generic):
+        return label.item()
+    if isinstance(label, tuple):
+        return [_label_to_json(x) for x in label]
+    return label
+
+
+def _label_from_json(label):
+    return tuple(label) if isinstance(label, list) else label
+
+
+def _scalar(value):
+    """value as a JSON-serializable scalar, or raise TypeError."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(type(value))
+
+
+def tables(obj):
+    """Yields (table name, result) for every data function of every model object of obj.
+       Tables are named '<attribute>.<data function>', like 'c2.co2eq_mmt_reduced'.
+       The result is the exception raised if a data function cannot be computed for obj.
+    """
+    for (attr, value) in sorted(vars(obj).items()):
+        if isinstance(value, DataHandler):
+            for name in value.data_functions():
+                try:
+                    data = getattr(value, name)()
+                except Exception as e:
+                    data = e
+                yield (f'{attr}.{name}', data)
+
+
+class Warehouse:
+    """Scenario results stored under directory root."""
+
+    def __init__(self, root):
+        self.root = pathlib.Path(root)
+
+    def _dir(self, solution, scenario):
+        return self.root.joinpath(f'solution={_quote(solution)}', f'scenario={_quote(scenario)}')
+
+    def write(self, obj, solution=None, overwrite=False):
+        """Store every data function result of Scenario obj.
+
+           solution: solution name, default the name of the module obj comes from.
+           overwrite: write the results even if they are already stored with the same
+             Advanced Controls.
+
+           Returns the manifest of the stored scenario.
+        """
+        solution = solution if solution is not None else solution_name(obj)
+        key = controls_key(obj.ac)
+        if not overwrite:
+            manifest = self.manifest(solution, obj.scenario)
+            if manifest is not None and manifest['key'] == key:
+                return manifest
+
+        target = self._dir(solution, obj.scenario)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmpdir = pathlib.Path(tempfile.mkdtemp(dir=target.parent, suffix='.tmp'))
+        try:
+            manifest = {'solution': solution, 'scenario': obj.scenario, 'key': key,
+                    'tables': {}, 'scalars': {}, 'errors': {}}
+            for (name, data) in tables(obj):
+                if isinstance(data, Exception):
+                    manifest['errors'][name] = repr(data)
+                elif isinstance(data, (pd.DataFrame, pd.Series)):
+                    self._write_table(tmpdir, name, data, manifest)
+                else:
+                    try:
+                        manifest['scalars'][name] = _scalar(data)
+                    except TypeError:
+                        pass
+            with open(tmpdir.joinpath(MANIFEST), 'w') as f:
+                json.dump(manifest, f)
+            self._replace(tmpdir, target)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        return manifest
+
+    @staticmethod
+    def _write_table(directory, name, data, manifest):
+        frame = data.to_frame() if isinstance(data, pd.Series) else data
+        try:
+            values = np.asfortranarray(frame.to_numpy(dtype=np.float64))
+        except (TypeError, ValueError):
+            return  # not numeric, like a table of source names.
+        path = directory.joinpath(f'table={_quote(name)}')
+        path.mkdir()
+        np.save(path.joinpath('values.npy'), values)
+        manifest['tables'][name] = {
+            'series': isinstance(data, pd.Series),
+            'index': [_label_to_json(i) for i in frame.index],
+            'index_name': _label_to_json(frame.index.name),
+            'columns': [_label_to_json(c) for c in frame.columns],
+        }
+
+    @staticmethod
+    def _replace(tmpdir, target):
+        """Move the completed tmpdir into place as target, replacing any older copy."""
+        old = None
+        if target.exists():
+            old = target.with_name(target.name + f'.{os.getpid()}.old')
+            os.replace(target, old)
+        try:
+            os.replace(tmpdir, target)
+        except OSError:
+            # Another process stored the same scenario first, theirs is just as good.
+            pass
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def manifest(self, solution, scenario):
+        """Manifest of a stored scenario, or None if it is not stored."""
+        try:
+            with open(self._dir(solution, scenario).joinpath(MANIFEST), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_current(self, obj, solution=None):
+        """True if Scenario obj is stored with its current Advanced Controls."""
+        solution = solution if solution is not None else solution_name(obj)
+        manifest = self.manifest(solution, obj.scenario)
+        return manifest is not None and manifest['key'] == controls_key(obj.ac)
+
+    def _manifests(self, solution=None):
+        """Parsed manifests of the stored scenarios of solution, default all solutions."""
+        pattern = f'solution={_quote(solution) if solution else "*"}/scenario=*/{MANIFEST}'
+        for path in sorted(self.root.glob(pattern)):
+            with open(path, 'r') as f:
+                yield json.load(f)
+
+    def scenarios(self, solution=None):
+        """DataFrame of the stored scenarios with columns Solution, Scenario and Key."""
+        rows = [(m['solution'], m['scenario'], m['key']) for m in self._manifests(solution)]
+        return pd.DataFrame(rows, columns=['Solution', 'Scenario', 'Key'])
+
+    def table(self, solution, scenario, name):
+        """Stored result of one data function, as a DataFrame or Series like the original.
+           The values are a read-only memory-mapped view of the file."""
+        manifest = self.manifest(solution, scenario)
+        if manifest is None:
+            raise KeyError(f'{solution}: {scenario} is not stored')
+        if name in manifest['scalars']:
+            return manifest['scalars'][name]
+        info = manifest['tables'].get(name, None)
+        if info is None:
+            raise KeyError(f'{solution}: {scenario} has no table {name}')
+        values = self._values(solution, scenario, name)
+        index = pd.Index([_label_from_json(i) for i in info['index']], name=info['index_name'])
+        columns = [_label_from_json(c) for c in info['columns']]
+        if info['series']:
+            return pd.Series(values[:, 0], index=index, name=columns[0])
+        return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+    def _values(self, solution, scenario, name):
+        path = self._dir(solution, scenario).joinpath(f'table={_quote(name)}', 'values.npy')
+        return np.load(path, mmap_mode='r')
+
+    def query(self, name, solutions=None, scenarios=None, region='World', years=None):
+        """One region of a table across many stored scenarios.
+
+           name: table name, like 'c2.co2eq_mmt_reduced'.
+           solutions: list of solution names, default every stored solution.
+           scenarios: list of scenario names, default every stored scenario.
+           region: column of the table to return. Series results have a single column,
+             which is returned whatever the region.
+           years: list of row labels to return, default every row.
+
+           Returns a DataFrame with one column per (Solution, Scenario), NaN where a
+           scenario does not have the table or region.
+        """
+        if solutions is not None:
+            manifests = [m for solution in sorted(set(solutions))
+                    for m in self._manifests(solution)]
+        else:
+            manifests = self._manifests()
+        results = {}
+        for m in manifests:
+            (solution, scenario) = (m['solution'], m['scenario'])
+            if scenarios is not None and scenario not in scenarios:
+                continue
+            info = m['tables'].get(name, None)
+            if info is None:
+                continue
+            columns = [_label_from_json(c) for c in info['columns']]
+            if info['series']:
+                col = 0
+            elif region in columns:
+                col = columns.index(region)
+            else:
+                continue
+            values = self._values(solution, scenario, name)[:, col]
+            rows = pd.Index([_label_from_json(i) for i in info['index']])
+            results[(solution, scenario)] = pd.Series(np.array(values), index=rows)
+        if not results:
+            df = pd.DataFrame(columns=pd.MultiIndex.from_tuples([],
+                names=['Solution', 'Scenario']), dtype=np.float64)
+        else:
+            df = pd.concat(results, axis=1, names=['Solution', 'Scenario'])
+        if years is not None:
+            df = df.reindex(list(years))
+        return df
+
+
+def store(obj, root):
+    """result_func for solution.batch.run_batch: write obj to Warehouse(root), and return
+       the key it was stored with."""
+    return Warehouse(root).write(obj)['key']
+
+
+def main(root, solutions=None, max_workers=None, stream=sys.stdout):
+    from solution import batch
+
+    jobs = batch.all_jobs(solutions=solutions)
+    failed = 0
+    for r in batch.run_batch(jobs, max_workers=max_workers,
+            result_func=functools.partial(store, root=root)):
+        if not r.ok:
+            failed += 1
+            print(f"{r.solution}: {r.scenario} failed\n{r.error}", file=stream)
+    print(f"Stored {len(jobs) - failed} of {len(jobs)} scenarios in {root}", file=stream)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+            description='Compute solution scenarios and store their results.')
+    parser.add_argument('root', help='Directory to store results in.')
+    parser.add_argument('solutions', nargs='*', help='Solution names, default all solutions.')
+    parser.add_argument('--workers', default=None, type=int, required=False,
+            help='Number of worker processes, default is the number of CPUs. 0 runs in-process.')
+    args = parser.parse_args(sys.argv[1:])
+
+    main(root=args.root, solutions=args.solutions or None, max_workers=args.workers)
@@ -6,38 +6,25 @@ same reasons.
 """
 # pylint: disable=line-too-long
 
+import argparse
+import concurrent.futures
+import contextlib
 import functools
+import importlib
+import os
 import pathlib
 import re
+import sys
+import time
+import traceback
 import numpy as np
 import pandas as pd
 import pytest
-import zipfile
 
-
-solutiondir = pathlib.Path(__file__).parents[1].joinpath('solution')
-
-
-def cell_to_offsets(cell):
-    """Convert an Excel reference like C33 to (row, col)."""
-    (col, row) = filter(None, re.split(r'(\d+)', cell))
-    colnum = 0
-    for i, c in enumerate(col):
-        colnum = (colnum + min(i, 1)) * 26 + (ord(c.upper()) - ord('A'))
-    return (colnum, int(row) - 1)
+from tools.expected_results import ExpectedResults
 
 
-def get_pd_read_excel_args(r):
-    """Convert 'A11:G55' notation to (usecols, skiprows, nrows) for pd.read_excel."""
-    (start, end) = r.split(':')
-    (startcol, startrow) = cell_to_offsets(start)
-    startrow = int(startrow)
-    (endcol, endrow) = cell_to_offsets(end)
-    endrow = int(endrow)
-    usecols = range(startcol, endcol + 1)
-    skiprows = startrow
-    nrows = endrow - startrow + 1
-    return (usecols, skiprows, nrows)
+solutiondir = pathlib.Path(__file__).parents[1].joinpath('solution')
 
 
 def verify_aez_data(obj, verify, cohort):
@@ -830,21 +817,14 @@ def is_custom_ad_with_no_regional_data(obj):
 
 def excel_read_cell_any_scenario(zip_f, sheetname, cell):
     """Find the first instance of sheetname, and return the value of cell."""
-    for name in zip_f.namelist():
-        if sheetname in name:
-            zip_csv_f = zip_f.open(name=name)
-            (col, row) = cell_to_offsets(cell)
-            df = pd.read_csv(filepath_or_buffer=zip_csv_f, header=None, index_col=None,
-                    usecols=[col], skiprows=row, nrows=1)
-            return df.loc[0, col]
-    return None
+    return zip_f.cell_any_scenario(sheetname=sheetname, cell=cell)
 
 
 def RRS_solution_verify_list(obj, zip_f):
     """Assemble verification for the modules used in RRS solutions.
           Arguments:
               obj: a solution object to be verified.
-              zip_f: expected.zip of the Excel file to verify against.
+              zip_f: ExpectedResults of the Excel file to verify against.
     """
     verify = {}
     include_regional_data = not is_custom_ad_with_no_regional_data(obj)
@@ -897,7 +877,7 @@ def LAND_solution_verify_list(obj, zip_f):
 
     Arguments:
         obj: a solution object to be verified.
-        zip_f: expected.zip of the Excel file to verify against.
+        zip_f: ExpectedResults of the Excel file to verify against.
     """
     verify = {}
 
@@ -947,15 +927,21 @@ def compare_dataframes(actual_df, expected_df, description='', mask=None, absign
     (nrows, ncols) = actual_df.shape
     msg = ''
     rel = 1e-6 if absignore else None  # if abs & !rel, rel is ignored. We want rel.
+    # Positional access to numpy arrays, DataFrame.iloc per cell dominates the runtime.
+    actual = actual_df.to_numpy(dtype=object)
+    expected = expected_df.to_numpy(dtype=object)
+    if mask is not None:
+        mask = mask.to_numpy()
     for r in range(nrows):
         for c in range(ncols):
-            if mask is not None:
-                mask.iloc[r, c]
-            if mask is not None and mask.iloc[r, c]:
+            if mask is not None and mask[r, c]:
                 continue
             matches = True
-            act = actual_df.iloc[r, c]
-            exp = expected_df.iloc[r, c]
+            act = actual[r, c]
+            exp = expected[r, c]
+            if act is exp or act == exp:
+                # identical values always match, skip the more expensive checks below.
+                continue
             if isinstance(act, str) and isinstance(exp, str):
                 matches = (act == exp)
             elif (pd.isna(act) or act == '' or act is None or act == 0 or act == pytest.approx(0.0)
@@ -983,11 +969,7 @@ def check_excel_against_object(obj, zip_f, scenario, verify):
     for sheetname in verify.keys():
         print(sheetname)
         for (cellrange, actual_df, actual_mask, expected_mask) in verify[sheetname]:
-            (usecols, skiprows, nrows) = get_pd_read_excel_args(cellrange)
-            arcname = f'{scenario}/{sheetname}'
-            zip_csv_f = zip_f.open(name=arcname)
-            expected_df = pd.read_csv(filepath_or_buffer=zip_csv_f, header=None,
-                index_col=None, usecols=usecols, skiprows=skiprows, nrows=nrows)
+            expected_df = zip_f.sheet(scenario, sheetname).range(cellrange)
             absignore = None
             if expected_mask is not None:
                 if isinstance(expected_mask, str) and expected_mask == "Excel_NaN":
@@ -1017,7 +999,7 @@ def test_Afforestation_LAND():
     from solution import afforestation
     zipfilename = str(solutiondir.joinpath(
         'afforestation', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in afforestation.scenarios.keys():
         obj = afforestation.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1030,7 +1012,7 @@ def test_Airplanes_RRS():
     from solution import airplanes
     zipfilename = str(solutiondir.joinpath(
         'airplanes', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in airplanes.scenarios.keys():
         obj = airplanes.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1043,7 +1025,7 @@ def test_AltCement_RRS():
     from solution import altcement
     zipfilename = str(solutiondir.joinpath(
         'altcement', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in altcement.scenarios.keys():
         obj = altcement.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1056,7 +1038,7 @@ def test_BikeInfrastructure_RRS():
     from solution import bikeinfrastructure
     zipfilename = str(solutiondir.joinpath(
         'bikeinfrastructure', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in bikeinfrastructure.scenarios.keys():
         obj = bikeinfrastructure.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1069,7 +1051,7 @@ def test_Bamboo_LAND():
     from solution import bamboo
     zipfilename = str(solutiondir.joinpath(
         'bamboo', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in bamboo.scenarios.keys():
         obj = bamboo.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1082,7 +1064,7 @@ def test_Biochar_RRS():
     from solution import biochar
     zipfilename = str(solutiondir.joinpath(
         'biochar', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in biochar.scenarios.keys():
         obj = biochar.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1095,7 +1077,7 @@ def test_Biogas_RRS():
     from solution import biogas
     zipfilename = str(solutiondir.joinpath(
         'biogas', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in biogas.scenarios.keys():
         obj = biogas.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1108,7 +1090,7 @@ def test_Biogas_Small_RRS():
     from solution import biogas_small
     zipfilename = str(solutiondir.joinpath(
         'biogas_small', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in biogas_small.scenarios.keys():
         obj = biogas_small.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1121,7 +1103,7 @@ def test_Biomass_RRS():
     from solution import biomass
     zipfilename = str(solutiondir.joinpath(
         'biomass', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in biomass.scenarios.keys():
         obj = biomass.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1134,7 +1116,7 @@ def test_Bioplastic_RRS():
     from solution import bioplastic
     zipfilename = str(solutiondir.joinpath(
         'bioplastic', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in ['PDS1-33p2050-Feedstock Limit-385MMT (Book Ed.1)']:
         obj = bioplastic.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1147,7 +1129,7 @@ def test_BuildingAutomation_RRS():
     from solution import buildingautomation
     zipfilename = str(solutiondir.joinpath(
         'buildingautomation', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in buildingautomation.scenarios.keys():
         obj = buildingautomation.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1160,7 +1142,7 @@ def test_Carpooling_RRS():
     from solution import carpooling
     zipfilename = str(solutiondir.joinpath(
         'carpooling', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in carpooling.scenarios.keys():
         obj = carpooling.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1173,7 +1155,7 @@ def test_Composting_RRS():
     from solution import composting
     zipfilename = str(solutiondir.joinpath(
         'composting', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in composting.scenarios.keys():
         obj = composting.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1186,7 +1168,7 @@ def test_ConcentratedSolar_RRS():
     from solution import concentratedsolar
     zipfilename = str(solutiondir.joinpath(
         'concentratedsolar', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in concentratedsolar.scenarios.keys():
         obj = concentratedsolar.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1199,7 +1181,7 @@ def test_ConservationAgriculture_LAND():
     from solution import conservationagriculture
     zipfilename = str(solutiondir.joinpath(
         'conservationagriculture', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in conservationagriculture.scenarios.keys():
         obj = conservationagriculture.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1212,7 +1194,7 @@ def test_CoolRoofs_RRS():
     from solution import coolroofs
     zipfilename = str(solutiondir.joinpath(
         'coolroofs', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in coolroofs.scenarios.keys():
         obj = coolroofs.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1225,7 +1207,7 @@ def test_DistrictHeating_RRS():
     from solution import districtheating
     zipfilename = str(solutiondir.joinpath(
         'districtheating', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in districtheating.scenarios.keys():
         obj = districtheating.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1238,7 +1220,7 @@ def test_ElectricBikes_RRS():
     from solution import electricbikes
     zipfilename = str(solutiondir.joinpath(
         'electricbikes', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in electricbikes.scenarios.keys():
         obj = electricbikes.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1251,7 +1233,7 @@ def test_ElectricVehicles_RRS():
     from solution import electricvehicles
     zipfilename = str(solutiondir.joinpath(
         'electricvehicles', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in electricvehicles.scenarios.keys():
         obj = electricvehicles.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1264,7 +1246,7 @@ def test_FarmlandRestoration_LAND():
     from solution import farmlandrestoration
     zipfilename = str(solutiondir.joinpath(
         'farmlandrestoration', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in farmlandrestoration.scenarios.keys():
         obj = farmlandrestoration.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1277,7 +1259,7 @@ def test_ForestProtection_LAND():
     from solution import forestprotection
     zipfilename = str(solutiondir.joinpath(
         'forestprotection', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in forestprotection.scenarios.keys():
         obj = forestprotection.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1290,7 +1272,7 @@ def test_Geothermal_RRS():
     from solution import geothermal
     zipfilename = str(solutiondir.joinpath(
         'geothermal', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in geothermal.scenarios.keys():
         obj = geothermal.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1303,7 +1285,7 @@ def test_GrasslandProtection_LAND():
     from solution import grasslandprotection
     zipfilename = str(solutiondir.joinpath(
         'grasslandprotection', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in grasslandprotection.scenarios.keys():
         obj = grasslandprotection.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1315,7 +1297,7 @@ def test_GreenRoofs_RRS():
     from solution import greenroofs
     zipfilename = str(solutiondir.joinpath(
         'greenroofs', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in greenroofs.scenarios.keys():
         obj = greenroofs.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1328,7 +1310,7 @@ def test_HeatPumps_RRS():
     from solution import heatpumps
     zipfilename = str(solutiondir.joinpath(
         'heatpumps', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in heatpumps.scenarios.keys():
         obj = heatpumps.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1341,7 +1323,7 @@ def test_HighSpeedRail_RRS():
     from solution import highspeedrail
     zipfilename = str(solutiondir.joinpath(
         'highspeedrail', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in highspeedrail.scenarios.keys():
         obj = highspeedrail.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1354,7 +1336,7 @@ def test_HybridCars_RRS():
     from solution import hybridcars
     zipfilename = str(solutiondir.joinpath(
         'hybridcars', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in hybridcars.scenarios.keys():
         obj = hybridcars.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1367,7 +1349,7 @@ def test_ImprovedCookStoves_RRS():
     from solution import improvedcookstoves
     zipfilename = str(solutiondir.joinpath(
         'improvedcookstoves', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in improvedcookstoves.scenarios.keys():
         obj = improvedcookstoves.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1380,7 +1362,7 @@ def test_ImprovedRice_LAND():
     from solution import improvedrice
     zipfilename = str(solutiondir.joinpath(
         'improvedrice', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in improvedrice.scenarios.keys():
         obj = improvedrice.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1393,7 +1375,7 @@ def test_IndigenousPeoplesLand_LAND():
     from solution import indigenouspeoplesland
     zipfilename = str(solutiondir.joinpath(
         'indigenouspeoplesland', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in indigenouspeoplesland.scenarios.keys():
         obj = indigenouspeoplesland.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1406,7 +1388,7 @@ def test_InstreamHydro_RRS():
     from solution import instreamhydro
     zipfilename = str(solutiondir.joinpath(
         'instreamhydro', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in instreamhydro.scenarios.keys():
         obj = instreamhydro.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1419,7 +1401,7 @@ def test_Insulation_RRS():
     from solution import insulation
     zipfilename = str(solutiondir.joinpath(
         'insulation', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in insulation.scenarios.keys():
         obj = insulation.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1432,7 +1414,7 @@ def test_IrrigationEfficiency_LAND():
     from solution import irrigationefficiency
     zipfilename = str(solutiondir.joinpath(
         'irrigationefficiency', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in irrigationefficiency.scenarios.keys():
         obj = irrigationefficiency.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1445,7 +1427,7 @@ def test_LandfillMethane_RRS():
     from solution import landfillmethane
     zipfilename = str(solutiondir.joinpath(
         'landfillmethane', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in landfillmethane.scenarios.keys():
         obj = landfillmethane.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1458,7 +1440,7 @@ def test_LEDCommercialLighting_RRS():
     from solution import leds_commercial
     zipfilename = str(solutiondir.joinpath(
         'leds_commercial', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in leds_commercial.scenarios.keys():
         obj = leds_commercial.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1471,7 +1453,7 @@ def test_LEDResidentialLighting_RRS():
     from solution import leds_residential
     zipfilename = str(solutiondir.joinpath(
         'leds_residential', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in leds_residential.scenarios.keys():
         obj = leds_residential.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1484,7 +1466,7 @@ def test_ManagedGrazing_LAND():
     from solution import managedgrazing
     zipfilename = str(solutiondir.joinpath(
         'managedgrazing', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in managedgrazing.scenarios.keys():
         obj = managedgrazing.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1497,7 +1479,7 @@ def test_MangroveRestoration_LAND():
     from solution import mangroverestoration
     zipfilename = str(solutiondir.joinpath(
         'mangroverestoration', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in mangroverestoration.scenarios.keys():
         obj = mangroverestoration.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1510,7 +1492,7 @@ def test_MassTransit_RRS():
     from solution import masstransit
     zipfilename = str(solutiondir.joinpath(
         'masstransit', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in masstransit.scenarios.keys():
         obj = masstransit.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1523,7 +1505,7 @@ def test_MicroWind_RRS():
     from solution import microwind
     zipfilename = str(solutiondir.joinpath(
         'microwind', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in microwind.scenarios.keys():
         obj = microwind.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1540,7 +1522,7 @@ def test_MultistrataAgroforestry_LAND():
     from solution import multistrataagroforestry
     zipfilename = str(solutiondir.joinpath(
         'multistrataagroforestry', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in multistrataagroforestry.scenarios.keys():
         obj = multistrataagroforestry.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1553,7 +1535,7 @@ def test_Nuclear_RRS():
     from solution import nuclear
     zipfilename = str(solutiondir.joinpath(
         'nuclear', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in nuclear.scenarios.keys():
         obj = nuclear.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1566,7 +1548,7 @@ def test_NutrientManagement_LAND():
     from solution import nutrientmanagement
     zipfilename = str(solutiondir.joinpath(
         'nutrientmanagement', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in nutrientmanagement.scenarios.keys():
         obj = nutrientmanagement.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1579,7 +1561,7 @@ def test_OffshoreWind_RRS():
     from solution import offshorewind
     zipfilename = str(solutiondir.joinpath(
         'offshorewind', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in offshorewind.scenarios.keys():
         obj = offshorewind.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1592,7 +1574,7 @@ def test_OnshoreWind_RRS():
     from solution import onshorewind
     zipfilename = str(solutiondir.joinpath(
         'onshorewind', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in onshorewind.scenarios.keys():
         obj = onshorewind.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1605,7 +1587,7 @@ def test_Peatlands_LAND():
     from solution import peatlands
     zipfilename = str(solutiondir.joinpath(
         'peatlands', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in peatlands.scenarios.keys():
         obj = peatlands.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1618,7 +1600,7 @@ def test_PerennialBioenergy_LAND():
     from solution import perennialbioenergy
     zipfilename = str(solutiondir.joinpath(
         'perennialbioenergy', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in perennialbioenergy.scenarios.keys():
         obj = perennialbioenergy.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1631,7 +1613,7 @@ def test_RecycledPaper_RRS():
     from solution import recycledpaper
     zipfilename = str(solutiondir.joinpath(
         'recycledpaper', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in recycledpaper.scenarios.keys():
         obj = recycledpaper.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1644,7 +1626,7 @@ def test_Refrigerants_RRS():
     from solution import refrigerants
     zipfilename = str(solutiondir.joinpath(
         'refrigerants', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in refrigerants.scenarios.keys():
         obj = refrigerants.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1657,7 +1639,7 @@ def test_RegenerativeAgriculture_LAND():
     from solution import regenerativeagriculture
     zipfilename = str(solutiondir.joinpath(
         'regenerativeagriculture', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in regenerativeagriculture.scenarios.keys():
         obj = regenerativeagriculture.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1670,7 +1652,7 @@ def test_RiceIntensification_LAND():
     from solution import riceintensification
     zipfilename = str(solutiondir.joinpath(
         'riceintensification', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in riceintensification.scenarios.keys():
         obj = riceintensification.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1683,7 +1665,7 @@ def test_Ships_RRS():
     from solution import ships
     zipfilename = str(solutiondir.joinpath(
         'ships', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in ships.scenarios.keys():
         obj = ships.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1696,7 +1678,7 @@ def test_Silvopasture_LAND():
     from solution import silvopasture
     zipfilename = str(solutiondir.joinpath(
         'silvopasture', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in silvopasture.scenarios.keys():
         obj = silvopasture.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1710,7 +1692,7 @@ def test_SmartGlass_RRS():
     from solution import smartglass
     zipfilename = str(solutiondir.joinpath(
         'smartglass', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in smartglass.scenarios.keys():
         obj = smartglass.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1723,7 +1705,7 @@ def test_SmartThermostats_RRS():
     from solution import smartthermostats
     zipfilename = str(solutiondir.joinpath(
         'smartthermostats', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in smartthermostats.scenarios.keys():
         obj = smartthermostats.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1736,7 +1718,7 @@ def test_SolarHotWater_RRS():
     from solution import solarhotwater
     zipfilename = str(solutiondir.joinpath(
         'solarhotwater', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     # Need to figure out how to handle 'Aggressive, High Growth, early' source in
     # PDS CustomAdoption, which varies according to data coming from UnitAdoption.
     # The checked-in CSV file is a snapshot of the first scenario values.
@@ -1752,7 +1734,7 @@ def test_SolarRooftop_RRS():
     from solution import solarpvroof
     zipfilename = str(solutiondir.joinpath(
         'solarpvroof', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in solarpvroof.scenarios.keys():
         obj = solarpvroof.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1765,7 +1747,7 @@ def test_SolarPVUtility_RRS():
     from solution import solarpvutil
     zipfilename = str(solutiondir.joinpath(
         'solarpvutil', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in solarpvutil.scenarios.keys():
         obj = solarpvutil.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1778,7 +1760,7 @@ def test_Telepresence_RRS():
     from solution import telepresence
     zipfilename = str(solutiondir.joinpath(
         'telepresence', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in telepresence.scenarios.keys():
         obj = telepresence.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1791,7 +1773,7 @@ def test_TemperateForests_LAND():
     from solution import temperateforests
     zipfilename = str(solutiondir.joinpath(
         'temperateforests', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario, ac in temperateforests.scenarios.items():
         obj = temperateforests.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1804,7 +1786,7 @@ def test_TreeIntercropping_LAND():
     from solution import treeintercropping
     zipfilename = str(solutiondir.joinpath(
         'treeintercropping', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in treeintercropping.scenarios.keys():
         obj = treeintercropping.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1817,7 +1799,7 @@ def test_Trains_RRS():
     from solution import trains
     zipfilename = str(solutiondir.joinpath(
         'trains', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in trains.scenarios.keys():
         obj = trains.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1830,7 +1812,7 @@ def test_TropicalForests_LAND():
     from solution import tropicalforests
     zipfilename = str(solutiondir.joinpath(
         'tropicalforests', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario, ac in tropicalforests.scenarios.items():
         obj = tropicalforests.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1843,7 +1825,7 @@ def test_TropicalTreeStaples_LAND():
     from solution import tropicaltreestaples
     zipfilename = str(solutiondir.joinpath(
         'tropicaltreestaples', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in tropicaltreestaples.scenarios.keys():
         obj = tropicaltreestaples.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1856,7 +1838,7 @@ def test_Trucks_RRS():
     from solution import trucks
     zipfilename = str(solutiondir.joinpath(
         'trucks', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in trucks.scenarios.keys():
         obj = trucks.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1869,7 +1851,7 @@ def test_WalkableCities_RRS():
     from solution import walkablecities
     zipfilename = str(solutiondir.joinpath(
         'walkablecities', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in walkablecities.scenarios.keys():
         obj = walkablecities.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1882,7 +1864,7 @@ def test_WasteToEnergy_RRS():
     from solution import wastetoenergy
     zipfilename = str(solutiondir.joinpath(
         'wastetoenergy', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in wastetoenergy.scenarios.keys():
         obj = wastetoenergy.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1895,7 +1877,7 @@ def test_WaterDistribution_RRS():
     from solution import waterdistribution
     zipfilename = str(solutiondir.joinpath(
         'waterdistribution', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in waterdistribution.scenarios.keys():
         obj = waterdistribution.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1908,7 +1890,7 @@ def test_WaterEfficiency_RRS():
     from solution import waterefficiency
     zipfilename = str(solutiondir.joinpath(
         'waterefficiency', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in waterefficiency.scenarios.keys():
         obj = waterefficiency.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1921,7 +1903,7 @@ def test_WaveAndTidal_RRS():
     from solution import waveandtidal
     zipfilename = str(solutiondir.joinpath(
         'waveandtidal', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in waveandtidal.scenarios.keys():
         obj = waveandtidal.Scenario(scenario=scenario)
         verify = RRS_solution_verify_list(obj=obj, zip_f=zip_f)
@@ -1934,9 +1916,61 @@ def test_WomenSmallholders_LAND():
     from solution import womensmallholders
     zipfilename = str(solutiondir.joinpath(
         'womensmallholders', 'testdata', 'expected.zip'))
-    zip_f = zipfile.ZipFile(file=zipfilename)
+    zip_f = ExpectedResults(zipfilename)
     for scenario in womensmallholders.scenarios.keys():
         obj = womensmallholders.Scenario(scenario=scenario)
         verify = LAND_solution_verify_list(obj=obj, zip_f=zip_f)
         check_excel_against_object(
             obj=obj, zip_f=zip_f, scenario=scenario, verify=verify)
+
+
+def _run_test(name):
+    """Run one test function of this module, returns (name, seconds, error or None)."""
+    module = importlib.import_module('tests.test_excel_integration')
+    start = time.perf_counter()
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            getattr(module, name)()
+    except pytest.skip.Exception as e:
+        return (name, time.perf_counter() - start, f'skipped: {e}')
+    except (Exception, pytest.fail.Exception):
+        return (name, time.perf_counter() - start, traceback.format_exc())
+    return (name, time.perf_counter() - start, None)
+
+
+def main(match=None, max_workers=None, stream=sys.stdout):
+    """Run the Excel integration tests across a pool of processes, one solution per job.
+
+       match: regular expression selecting test names, default all of them.
+       max_workers: number of worker processes, default os.cpu_count().
+
+       Returns the number of tests which failed.
+    """
+    names = sorted(name for (name, func) in globals().items()
+            if name.startswith('test_') and callable(func) and re.search(match or '', name))
+    print(f"Running {len(names)} tests with {max_workers or os.cpu_count()} workers", file=stream)
+    failed = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_test, name) for name in names]
+        for future in concurrent.futures.as_completed(futures):
+            (name, seconds, error) = future.result()
+            skipped = error is not None and error.startswith('skipped')
+            status = 'ok' if error is None else 'skip' if skipped else 'FAILED'
+            print(f"{seconds:8.2f}s {status:6s} {name}", file=stream)
+            if error is not None and not skipped:
+                failed.append((name, error))
+    for (name, error) in failed:
+        print(f"\n{name}\n{error}", file=stream)
+    print(f"{len(names)} tests, {len(failed)} failed", file=stream)
+    return len(failed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+            description='Run the Excel integration tests in parallel, one solution per process.')
+    parser.add_argument('--match', default=None, required=False,
+            help='Regular expression selecting the tests to run, like "RRS" or "Biochar".')
+    parser.add_argument('--workers', default=None, type=int, required=False,
+            help='Number of worker processes, default is the number of CPUs.')
+    args = parser.parse_args(sys.argv[1:])
+    sys.exit(1 if main(match=args.match, max_workers=args.workers) else 0)
@@ -0,0 +1,157 @@
+"""Parsed contents of the expected.zip files of Excel results, for tests/test_excel_integration.py.
+
+expected.zip holds one CSV file per scenario and sheet of the Excel workbook, see
+create_expected_zip.py. The integration test compares hundreds of cell ranges per scenario,
+and reading each one with pd.read_csv(usecols=..., skiprows=..., nrows=...) decompresses and
+tokenizes the whole sheet again every time. ExpectedResults parses each sheet once into a
+dense array of cell values, and returns cell ranges as slices of it.
+
+Parsed sheets are also kept on disk in $DRAWDOWN_CACHE_DIR/expected (see model/csv_cache.py),
+keyed by the path, modification time and size of the expected.zip file.
+"""
+
+import csv
+import hashlib
+import io
+import pathlib
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from model import csv_cache
+
+_BOOL_VALUES = {'True': True, 'TRUE': True, 'true': True,
+                'False': False, 'FALSE': False, 'false': False}
+_INT_RE = re.compile(r'^\s*[+-]?\d+\s*$')
+
+
+def cell_to_offsets(cell):
+    """Convert an Excel reference like C33 to (row, col)."""
+    (col, row) = filter(None, re.split(r'(\d+)', cell))
+    colnum = 0
+    for i, c in enumerate(col):
+        colnum = (colnum + min(i, 1)) * 26 + (ord(c.upper()) - ord('A'))
+    return (colnum, int(row) - 1)
+
+
+def range_offsets(cellrange):
+    """Convert 'A11:G55' notation to (first column, first row, last column, last row)."""
+    (start, end) = cellrange.split(':')
+    (startcol, startrow) = cell_to_offsets(start)
+    (endcol, endrow) = cell_to_offsets(end)
+    return (startcol, startrow, endcol, endrow)
+
+
+class ExpectedSheet:
+    """One sheet of one scenario.
+
+       raw: object array of the text of each cell, NaN for empty cells (or any of the values
+         pd.read_csv treats as NaN by default).
+       numbers: float64 array of the numeric value of each cell, NaN if not a number.
+    """
+
+    def __init__(self, raw, numbers):
+        self.raw = raw
+        self.numbers = numbers
+
+    @classmethod
+    def parse(cls, data):
+        """Parse the bytes of a sheet CSV file."""
+        text = data.decode('utf-8')
+        width = max((len(row) for row in csv.reader(io.StringIO(text))), default=0)
+        if width == 0:
+            return cls(np.empty((0, 0), dtype=object), np.empty((0, 0)))
+        df = pd.read_csv(io.StringIO(text), header=None, names=range(width), dtype=str,
+                index_col=False, skip_blank_lines=False)
+        raw = df.to_numpy(dtype=object)
+        numbers = pd.to_numeric(pd.Series(raw.ravel()), errors='coerce')
+        numbers = numbers.to_numpy(dtype=np.float64).reshape(raw.shape)
+        return cls(raw, numbers)
+
+    def _column(self, rows, col):
+        """Values of one column of a range, with the dtype pd.read_csv would infer for it."""
+        raw = self.raw[rows, col]
+        numbers = self.numbers[rows, col]
+        na = pd.isna(raw)
+        if (~na & np.isnan(numbers)).any():
+            if all(v in _BOOL_VALUES for v in raw[~na]):
+                values = [_BOOL_VALUES[v] if not n else np.nan for (v, n) in zip(raw, na)]
+                return np.array(values, dtype=bool if not na.any() else object)
+            return raw.copy()
+        if len(raw) and not na.any() and all(_INT_RE.match(v) for v in raw):
+            return numbers.astype(np.int64)
+        return numbers.copy()
+
+    def range(self, cellrange):
+        """DataFrame of the cells in an Excel range like 'A11:G55'.
+
+           Identical to pd.read_csv(sheet, header=None, index_col=None, usecols=...,
+           skiprows=..., nrows=...): columns are labeled by their column number and
+           each column has the dtype read_csv would infer from just the cells in range.
+        """
+        (startcol, startrow, endcol, endrow) = range_offsets(cellrange)
+        (nrows, ncols) = self.raw.shape
+        if endcol >= ncols:
+            raise ValueError(f"{cellrange} is beyond the {ncols} columns of the sheet")
+        rows = slice(startrow, min(endrow + 1, nrows))
+        columns = {col: self._column(rows, col) for col in range(startcol, endcol + 1)}
+        return pd.DataFrame(columns, index=pd.RangeIndex(len(range(nrows)[rows])))
+
+    def cell(self, cell):
+        """Value of a single cell like 'N45', None if it is beyond the end of the sheet."""
+        (col, row) = cell_to_offsets(cell)
+        if row >= self.raw.shape[0] or col >= self.raw.shape[1]:
+            return None
+        return self._column(slice(row, row + 1), col)[0]
+
+
+class ExpectedResults:
+    """Sheets of an expected.zip file, each parsed once when first used.
+
+       filename: path to the expected.zip file.
+    """
+
+    def __init__(self, filename):
+        self.filename = pathlib.Path(filename)
+        self._zip = None
+        self._sheets = {}
+        st = self.filename.stat()
+        text = f"{self.filename.resolve()}\0{st.st_mtime_ns}\0{st.st_size}\0{pd.__version__}"
+        self._key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @property
+    def zip(self):
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(file=self.filename)
+        return self._zip
+
+    def namelist(self):
+        """Names of the members of expected.zip, like '<scenario>/<sheet>'."""
+        return self.zip.namelist()
+
+    def sheet(self, scenario, sheetname):
+        """ExpectedSheet for the given scenario and sheet name."""
+        return self.member(f'{scenario}/{sheetname}')
+
+    def member(self, name):
+        sheet = self._sheets.get(name, None)
+        if sheet is None:
+            key = hashlib.sha256(f"{self._key}\0{name}".encode('utf-8')).hexdigest()
+            data = csv_cache.load('expected', key)
+            if isinstance(data, tuple) and len(data) == 2:
+                sheet = ExpectedSheet(*data)
+            else:
+                sheet = ExpectedSheet.parse(self.zip.read(name))
+                csv_cache.store('expected', key, (sheet.raw, sheet.numbers))
+            self._sheets[name] = sheet
+        return sheet
+
+    def cell_any_scenario(self, sheetname, cell):
+        """Find the first instance of sheetname, and return the value of cell."""
+        for name in self.namelist():
+            if sheetname in name:
+                return self.member(name).cell(cell)
+        return None
+
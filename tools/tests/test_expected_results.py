@@ -0,0 +1,63 @@
+"""Tests for expected_results.py"""
+
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+from tools import expected_results
+
+SHEET = ('a,b,c,d\n'
+         '1,2.5,x,TRUE\n'
+         '2,,y,FALSE\n'
+         '\n'
+         '3,4,,true\n'
+         '4,5.25,z\n')
+
+
+@pytest.fixture
+def zipfilename(tmp_path, monkeypatch):
+    monkeypatch.setenv('DRAWDOWN_CACHE_DIR', str(tmp_path.joinpath('cache')))
+    filename = tmp_path.joinpath('expected.zip')
+    with zipfile.ZipFile(filename, 'w') as zf:
+        zf.writestr('PDS-1/Unit Adoption Calculations', SHEET)
+        zf.writestr('PDS-2/Unit Adoption Calculations', SHEET.replace('1,2.5', '9,2.5'))
+    return filename
+
+
+@pytest.mark.parametrize('cellrange', ['A2:D6', 'A2:B3', 'B2:B6', 'C1:D4', 'A5:D6', 'D2:D3',
+    'A2:A3', 'A3:C5'])
+def test_range_matches_read_csv(zipfilename, cellrange):
+    (startcol, startrow, endcol, endrow) = expected_results.range_offsets(cellrange)
+    expected = pd.read_csv(io.StringIO(SHEET), header=None, index_col=None,
+            usecols=range(startcol, endcol + 1), skiprows=startrow,
+            nrows=endrow - startrow + 1, skip_blank_lines=False)
+    er = expected_results.ExpectedResults(zipfilename)
+    result = er.sheet('PDS-1', 'Unit Adoption Calculations').range(cellrange)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_cell_to_offsets():
+    assert expected_results.cell_to_offsets('A1') == (0, 0)
+    assert expected_results.cell_to_offsets('C33') == (2, 32)
+    assert expected_results.cell_to_offsets('AA10') == (26, 9)
+    assert expected_results.range_offsets('B2:AB5') == (1, 1, 27, 4)
+
+
+def test_cell_any_scenario(zipfilename):
+    er = expected_results.ExpectedResults(zipfilename)
+    assert er.cell_any_scenario('Unit Adoption Calculations', 'A2') == 1
+    assert er.cell_any_scenario('Unit Adoption Calculations', 'B2') == 2.5
+    assert er.cell_any_scenario('Unit Adoption Calculations', 'A99') is None
+    assert er.cell_any_scenario('No Such Sheet', 'A2') is None
+    assert er.sheet('PDS-2', 'Unit Adoption Calculations').cell('A2') == 9
+
+
+def test_disk_cache(zipfilename, tmp_path):
+    er = expected_results.ExpectedResults(zipfilename)
+    first = er.sheet('PDS-1', 'Unit Adoption Calculations').range('A2:D6')
+    assert list(tmp_path.joinpath('cache', 'expected').glob('*.pkl'))
+    er = expected_results.ExpectedResults(zipfilename)
+    er._zip = False  # the zip file must not be read again.
+    second = er.sheet('PDS-1', 'Unit Adoption Calculations').range('A2:D6')
+    pd.testing.assert_frame_equal(first, second)